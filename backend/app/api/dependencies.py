@@ -1,11 +1,11 @@
 """API依存関数"""
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, use_primary
 from app.core.security import decode_access_token
 from app.models.user import User
 
@@ -41,9 +41,9 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # ユーザーIDを取得
+    # ユーザーIDを取得（用途を限定したトークン（SSE の接続チケットなど）は受け付けない）
     user_id_str: str = payload.get("sub")
-    if user_id_str is None:
+    if user_id_str is None or payload.get("scope") is not None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="認証トークンが無効です",
@@ -61,6 +61,9 @@ def get_current_user(
 
     # ユーザーを取得
     user = db.query(User).filter(User.user_id == user_id).first()
+    if user is None and use_primary(db):
+        # 登録直後はレプリカに未反映の場合があるため、プライマリで再確認する
+        user = db.query(User).filter(User.user_id == user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,3 +72,22 @@ def get_current_user(
         )
 
     return user
+
+
+def get_ledger_id(
+    ledger_id: UUID | None = Query(None, description="共有台帳のID（所有者のユーザーID。省略時は自分の台帳）"),
+    current_user: User = Depends(get_current_user),
+) -> UUID:
+    """
+    操作対象の台帳IDを取得
+
+    権限はここでは確認せず、各クエリの条件（app.core.ledgers.ledger_scope）で確認する。
+
+    Args:
+        ledger_id: 共有台帳のID
+        current_user: 認証済みユーザー
+
+    Returns:
+        台帳ID（省略時は自分のユーザーID）
+    """
+    return ledger_id or current_user.user_id
@@ -1,105 +1,370 @@
 """予算関連のエンドポイント"""
+import uuid
 from datetime import date
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_ledger_id
 from app.core.database import get_db
+from app.core.dates import month_range, next_period
+from app.core.ledgers import ledger_scope
+from app.core.outbox import record_change
+from app.core.sql import upsert_insert
 from app.models.budget import Budget
 from app.models.category import Category
 from app.models.user import User
-from app.schemas.budget import BudgetCreate, BudgetResponse, BudgetUpdate
+from app.schemas.budget import (
+    BudgetBulkCreate,
+    BudgetCopyForward,
+    BudgetCreate,
+    BudgetResponse,
+    BudgetUpdate,
+)
 
 router = APIRouter()
 
+# 一意制約 uq_budgets_user_id_category_id_month の列（ON CONFLICT の対象。SQLite では制約名を指定できない）
+_UNIQUE_COLUMNS = [Budget.user_id, Budget.category_id, Budget.month]
 
-@router.post("", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-def create_budget(
-    budget_data: BudgetCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
+
+def _get_verified_category(db: Session, category_id: UUID, user_id: UUID, ledger_id: UUID) -> Category:
     """
-    予算を作成
+    予算に使うカテゴリの存在確認と権限確認を行う（台帳と書き込み権限はクエリの条件で確認する）
 
     Args:
-        budget_data: 予算作成情報
-        current_user: 認証済みユーザー
         db: データベースセッション
+        category_id: カテゴリID
+        user_id: ユーザーID
+        ledger_id: 台帳ID
 
     Returns:
-        作成された予算
+        検証済みのカテゴリ
 
     Raises:
         HTTPException: カテゴリが見つからない、または権限がない場合
     """
-    # カテゴリの存在チェックと所有者確認
-    category = db.query(Category).filter(Category.category_id == budget_data.category_id).first()
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="カテゴリが見つかりません",
+    category = db.scalars(
+        select(Category).where(
+            Category.category_id == category_id,
+            ledger_scope(Category.user_id, user_id, ledger_id, write=True),
         )
-
-    if category.user_id != current_user.user_id:
+    ).first()
+    if category is None:
+        exists = db.execute(select(Category.category_id).where(Category.category_id == category_id)).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="カテゴリが見つかりません",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="このカテゴリを使用する権限がありません",
         )
+    return category
 
-    # 同じカテゴリ・同じ月の予算が既に存在しないかチェック
-    existing_budget = (
-        db.query(Budget)
-        .filter(
-            Budget.user_id == current_user.user_id,
-            Budget.category_id == budget_data.category_id,
-            Budget.month == budget_data.month,
+
+def _get_verified_budget(
+    db: Session,
+    budget_id: UUID,
+    user_id: UUID,
+    ledger_id: UUID,
+    action: str = "アクセス",
+    write: bool = False,
+) -> Budget:
+    """
+    予算の存在確認と権限確認を行う（台帳と権限はクエリの条件で確認する）
+
+    Args:
+        db: データベースセッション
+        budget_id: 予算ID
+        user_id: ユーザーID
+        ledger_id: 台帳ID
+        action: エラーメッセージ用のアクション名
+        write: 書き込み権限を要求するか
+
+    Returns:
+        検証済みの予算
+
+    Raises:
+        HTTPException: 予算が見つからない、または権限がない場合
+    """
+    budget = db.scalars(
+        select(Budget).where(
+            Budget.budget_id == budget_id,
+            ledger_scope(Budget.user_id, user_id, ledger_id, write=write),
         )
-        .first()
-    )
+    ).first()
+    if budget is None:
+        # 見つからない場合のみ、存在しないのか権限がないのかを区別する
+        exists = db.execute(select(Budget.budget_id).where(Budget.budget_id == budget_id)).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="予算が見つかりません",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"この予算を{action}する権限がありません",
+        )
+    return budget
 
-    if existing_budget:
+
+def _commit_budget(db: Session) -> None:
+    """
+    予算の変更をコミットし、同じカテゴリ・同じ月の予算との重複は 400 にする
+
+    Args:
+        db: データベースセッション
+
+    Raises:
+        HTTPException: 同じカテゴリと月の予算が既に存在する場合
+    """
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="このカテゴリと月の予算は既に存在します",
+        ) from e
+
+
+def _upsert_budgets(db: Session, rows: list[dict], overwrite: bool) -> list[Budget]:
+    """
+    予算を1つの INSERT ... ON CONFLICT 文で一括登録
+
+    Args:
+        db: データベースセッション
+        rows: 登録する予算（user_id, category_id, amount, month）
+        overwrite: 既存の予算の金額を上書きするか
+
+    Returns:
+        登録・更新された予算（overwrite=False で既存だったものは含まない）
+
+    Raises:
+        HTTPException: 同時に行われた変更（カテゴリの削除など）と競合した、またはコミットに失敗した場合
+    """
+    stmt = upsert_insert(db, Budget).values(rows)
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=_UNIQUE_COLUMNS,
+            set_={"amount": stmt.excluded.amount},
         )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=_UNIQUE_COLUMNS)
+    stmt = stmt.returning(Budget)
+    try:
+        budgets = db.scalars(stmt, execution_options={"populate_existing": True}).all()
+        if budgets:
+            record_change(db, rows[0]["user_id"], "budget", "updated")
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="同時に行われた変更と競合したため、予算を一括登録できませんでした。再度お試しください",
+        ) from e
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="予算の一括登録に失敗しました",
+        ) from e
+    return sorted(budgets, key=lambda budget: (budget.month, str(budget.category_id)))
+
+
+@router.post("", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
+def create_budget(
+    budget_data: BudgetCreate,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    予算を作成
+
+    共有された台帳には編集者（editor）のみ作成できる。
+
+    Args:
+        budget_data: 予算作成情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        作成された予算
+
+    Raises:
+        HTTPException: カテゴリが見つからない、権限がない、または同じカテゴリと月の予算が既に存在する場合
+    """
+    # カテゴリの存在チェックと台帳への書き込み権限の確認
+    _get_verified_category(db, budget_data.category_id, current_user.user_id, ledger_id)
 
     new_budget = Budget(
-        user_id=current_user.user_id,
+        # 変更イベントに ID を記録するため、フラッシュ（一意制約の検出）の前に採番する
+        budget_id=uuid.uuid4(),
+        user_id=ledger_id,
         category_id=budget_data.category_id,
         amount=budget_data.amount,
         month=budget_data.month,
     )
 
     db.add(new_budget)
-    db.commit()
+    record_change(db, ledger_id, "budget", "created", new_budget.budget_id)
+    # 同じカテゴリ・同じ月の予算の重複は一意制約で検出する
+    _commit_budget(db)
     db.refresh(new_budget)
 
     return new_budget
 
 
+@router.post("/bulk", response_model=list[BudgetResponse])
+def bulk_upsert_budgets(
+    bulk_data: BudgetBulkCreate,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    予算テンプレートを開始月から複数月に一括適用
+
+    カテゴリごとの金額を開始月から months か月分まとめて登録する。
+    同じカテゴリ・同じ月の予算が既にある場合は overwrite に従って金額を上書きするか残す。
+    共有された台帳には編集者（editor）のみ登録できる。
+
+    Args:
+        bulk_data: 予算一括設定情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        登録・更新された予算一覧
+
+    Raises:
+        HTTPException: 台帳のものでない（または書き込み権限のない台帳の）カテゴリが含まれる場合
+    """
+    category_ids = {item.category_id for item in bulk_data.items}
+    # 台帳と書き込み権限はクエリの条件で確認する
+    owned_count = (
+        db.query(Category.category_id)
+        .filter(
+            Category.category_id.in_(category_ids),
+            ledger_scope(Category.user_id, current_user.user_id, ledger_id, write=True),
+        )
+        .count()
+    )
+    if owned_count != len(category_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="カテゴリが見つかりません",
+        )
+
+    months = []
+    month, _ = month_range(bulk_data.start_month)
+    for _ in range(bulk_data.months):
+        months.append(month)
+        month = next_period(month, "month")
+
+    rows = [
+        {
+            "user_id": ledger_id,
+            "category_id": item.category_id,
+            "amount": item.amount,
+            "month": target_month,
+        }
+        for target_month in months
+        for item in bulk_data.items
+    ]
+    return _upsert_budgets(db, rows, bulk_data.overwrite)
+
+
+@router.post("/copy-forward", response_model=list[BudgetResponse])
+def copy_budgets_forward(
+    copy_data: BudgetCopyForward,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    指定月の予算を翌月以降の複数月にコピー
+
+    共有された台帳には編集者（editor）のみコピーできる。
+
+    Args:
+        copy_data: 予算コピー情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        登録・更新された予算一覧
+
+    Raises:
+        HTTPException: コピー元の月に予算がない（または台帳への書き込み権限がない）場合
+    """
+    source_start, source_end = month_range(copy_data.source_month)
+    # 台帳と書き込み権限はクエリの条件で確認する（権限がなければコピー元が空になる）
+    source_budgets = (
+        db.query(Budget.category_id, Budget.amount)
+        .filter(
+            ledger_scope(Budget.user_id, current_user.user_id, ledger_id, write=True),
+            Budget.month >= source_start,
+            Budget.month <= source_end,
+        )
+        .all()
+    )
+    if not source_budgets:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="コピー元の月の予算が見つかりません",
+        )
+
+    # 月初以外の日付で登録された予算が同じカテゴリに複数ある場合は1件にまとめる
+    amounts = {category_id: amount for category_id, amount in source_budgets}
+
+    rows = []
+    month = source_start
+    for _ in range(copy_data.months):
+        month = next_period(month, "month")
+        rows.extend(
+            {
+                "user_id": ledger_id,
+                "category_id": category_id,
+                "amount": amount,
+                "month": month,
+            }
+            for category_id, amount in amounts.items()
+        )
+    return _upsert_budgets(db, rows, copy_data.overwrite)
+
+
 @router.get("", response_model=list[BudgetResponse])
 def get_budgets(
     month: date | None = Query(None, description="月（YYYY-MM-DD）"),
     category_id: UUID | None = Query(None, description="カテゴリID"),
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
-    予算一覧を取得（フィルタリング対応）
+    予算一覧を取得（フィルタリング対応。参照権限のない台帳を指定した場合は空の一覧）
 
     Args:
         month: 月
         category_id: カテゴリID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Returns:
         予算一覧
     """
-    query = db.query(Budget).filter(Budget.user_id == current_user.user_id)
+    query = db.query(Budget).filter(ledger_scope(Budget.user_id, current_user.user_id, ledger_id))
 
     # フィルタリング
     if month:
@@ -115,6 +380,7 @@ def get_budgets(
 @router.get("/{budget_id}", response_model=BudgetResponse)
 def get_budget(
     budget_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -123,6 +389,7 @@ def get_budget(
 
     Args:
         budget_id: 予算ID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -132,21 +399,7 @@ def get_budget(
     Raises:
         HTTPException: 予算が見つからない、または権限がない場合
     """
-    budget = db.query(Budget).filter(Budget.budget_id == budget_id).first()
-
-    if not budget:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="予算が見つかりません",
-        )
-
-    # 所有者チェック
-    if budget.user_id != current_user.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この予算にアクセスする権限がありません",
-        )
-
+    budget = _get_verified_budget(db, budget_id, current_user.user_id, ledger_id)
     return budget
 
 
@@ -154,6 +407,7 @@ def get_budget(
 def update_budget(
     budget_id: UUID,
     budget_data: BudgetUpdate,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -163,6 +417,7 @@ def update_budget(
     Args:
         budget_id: 予算ID
         budget_data: 予算更新情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -170,44 +425,21 @@ def update_budget(
         更新された予算
 
     Raises:
-        HTTPException: 予算が見つからない、または権限がない場合
+        HTTPException: 予算が見つからない、権限がない、または同じカテゴリと月の予算が既に存在する場合
     """
-    budget = db.query(Budget).filter(Budget.budget_id == budget_id).first()
-
-    if not budget:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="予算が見つかりません",
-        )
-
-    # 所有者チェック
-    if budget.user_id != current_user.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この予算を更新する権限がありません",
-        )
+    budget = _get_verified_budget(db, budget_id, current_user.user_id, ledger_id, action="更新", write=True)
 
     # カテゴリIDが更新される場合は、カテゴリの存在チェック
     if budget_data.category_id:
-        category = db.query(Category).filter(Category.category_id == budget_data.category_id).first()
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="カテゴリが見つかりません",
-            )
-
-        if category.user_id != current_user.user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="このカテゴリを使用する権限がありません",
-            )
+        _get_verified_category(db, budget_data.category_id, current_user.user_id, ledger_id)
 
     # 更新処理
     update_data = budget_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(budget, field, value)
+    record_change(db, ledger_id, "budget", "updated", budget_id)
 
-    db.commit()
+    _commit_budget(db)
     db.refresh(budget)
 
     return budget
@@ -216,6 +448,7 @@ def update_budget(
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_budget(
     budget_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -224,26 +457,15 @@ def delete_budget(
 
     Args:
         budget_id: 予算ID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Raises:
         HTTPException: 予算が見つからない、または権限がない場合
     """
-    budget = db.query(Budget).filter(Budget.budget_id == budget_id).first()
-
-    if not budget:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="予算が見つかりません",
-        )
-
-    # 所有者チェック
-    if budget.user_id != current_user.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この予算を削除する権限がありません",
-        )
+    budget = _get_verified_budget(db, budget_id, current_user.user_id, ledger_id, action="削除", write=True)
 
     db.delete(budget)
+    record_change(db, ledger_id, "budget", "deleted", budget_id)
     db.commit()
@@ -1,32 +1,54 @@
 """カテゴリ関連のエンドポイント"""
-from datetime import date, timedelta
+from datetime import date, datetime
 from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
-
-from app.api.dependencies import get_current_user
-from app.core.database import get_db
+from sqlalchemy import func, insert, literal, select
+
+from app.api.dependencies import get_current_user, get_ledger_id
+from app.core.archive import archived_before, reaches_archive
+from app.core.balance import invalidate_balance_checkpoints
+from app.core.cache import MISSING, create_user_cache, invalidate_user_caches
+from app.core.database import get_db, read_from_replica
+from app.core.dates import month_range
+from app.core.ledgers import has_ledger_access, ledger_scope
+from app.core.outbox import record_change
+from app.core.suggest import memo_suggester
+from app.jobs import enqueue_job
+from app.models.archive import ArchivedTransaction
 from app.models.category import Category
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TransactionTombstone
 from app.models.user import User
 from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
+from app.schemas.job import JobResponse
 
 router = APIRouter()
 
+# 未登録固定費の (ユーザー, 月) 単位のキャッシュ（取引・カテゴリの書き込みで無効化）
+_unregistered_cache = create_user_cache(maxsize=4096)
+
 
-def _get_verified_category(db: Session, category_id: UUID, user_id: UUID, action: str = "アクセス") -> Category:
+def _get_verified_category(
+    db: Session,
+    category_id: UUID,
+    user_id: UUID,
+    ledger_id: UUID,
+    action: str = "アクセス",
+    write: bool = False,
+) -> Category:
     """
-    カテゴリの存在確認と所有者検証を行う
+    カテゴリの存在確認と権限確認を行う（台帳と権限はクエリの条件で確認する）
 
     Args:
         db: データベースセッション
         category_id: カテゴリID
         user_id: ユーザーID
+        ledger_id: 台帳ID
         action: エラーメッセージ用のアクション名
+        write: 書き込み権限を要求するか
 
     Returns:
         検証済みのカテゴリ
@@ -34,13 +56,20 @@ def _get_verified_category(db: Session, category_id: UUID, user_id: UUID, action
     Raises:
         HTTPException: カテゴリが見つからない、または権限がない場合
     """
-    category = db.query(Category).filter(Category.category_id == category_id).first()
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="カテゴリが見つかりません",
+    category = db.scalars(
+        select(Category).where(
+            Category.category_id == category_id,
+            ledger_scope(Category.user_id, user_id, ledger_id, write=write),
         )
-    if category.user_id != user_id:
+    ).first()
+    if category is None:
+        # 見つからない場合のみ、存在しないのか権限がないのかを区別する
+        exists = db.execute(select(Category.category_id).where(Category.category_id == category_id)).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="カテゴリが見つかりません",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"このカテゴリを{action}する権限がありません",
@@ -69,25 +98,81 @@ def _safe_commit(db: Session, error_message: str = "データベースエラー
         ) from e
 
 
+def _query_unregistered_recurring(db: Session, user_id: UUID, start_date: date, end_date: date) -> list[Category]:
+    """
+    期間内に取引が登録されていない固定費カテゴリを取得
+
+    NOT EXISTS によるアンチジョインで、固定費カテゴリは部分インデックス
+    （ix_categories_user_id_recurring）、取引の存在確認は (category_id, date) の
+    インデックスで引くため、月内の全取引を走査しない。アーカイブの境界より前の月は
+    アーカイブ済みの取引も確認する。
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        start_date: 期間の開始日
+        end_date: 期間の終了日
+
+    Returns:
+        未登録の固定費カテゴリ一覧
+    """
+    has_transaction_in_month = (
+        select(Transaction.transaction_id)
+        .where(
+            Transaction.category_id == Category.category_id,
+            Transaction.date >= start_date,
+            Transaction.date <= end_date,
+        )
+        .exists()
+    )
+    # is_recurring は部分インデックスの条件と同じ形で書く（IS true は PostgreSQL で部分インデックスに一致しない）
+    conditions = [Category.user_id == user_id, Category.is_recurring, ~has_transaction_in_month]
+    if reaches_archive(archived_before(db, user_id), start_date):
+        conditions.append(
+            ~select(ArchivedTransaction.transaction_id)
+            .where(
+                ArchivedTransaction.user_id == user_id,
+                ArchivedTransaction.category_id == Category.category_id,
+                ArchivedTransaction.date >= start_date,
+                ArchivedTransaction.date <= end_date,
+            )
+            .exists()
+        )
+    return db.query(Category).filter(*conditions).all()
+
+
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
     category_data: CategoryCreate,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     カテゴリを作成
 
+    共有された台帳には編集者（editor）のみ作成できる。
+
     Args:
         category_data: カテゴリ作成情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Returns:
         作成されたカテゴリ
+
+    Raises:
+        HTTPException: 台帳への書き込み権限がない場合
     """
+    if not has_ledger_access(db, current_user.user_id, ledger_id, write=True):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="この台帳にカテゴリを作成する権限がありません",
+        )
+
     new_category = Category(
-        user_id=current_user.user_id,
+        user_id=ledger_id,
         name=category_data.name,
         type=category_data.type,
         color=category_data.color,
@@ -97,7 +182,10 @@ def create_category(
     )
 
     db.add(new_category)
+    db.flush()
+    record_change(db, ledger_id, "category", "created", new_category.category_id)
     _safe_commit(db, "カテゴリの作成に失敗しました")
+    invalidate_user_caches(ledger_id)
     db.refresh(new_category)
 
     return new_category
@@ -105,13 +193,15 @@ def create_category(
 
 @router.get("", response_model=list[CategoryResponse])
 def get_categories(
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
-    ユーザーのカテゴリ一覧を取得
+    台帳のカテゴリ一覧を取得（参照権限のない台帳を指定した場合は空の一覧）
 
     Args:
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -120,7 +210,7 @@ def get_categories(
     """
     categories = (
         db.query(Category)
-        .filter(Category.user_id == current_user.user_id)
+        .filter(ledger_scope(Category.user_id, current_user.user_id, ledger_id))
         .order_by(Category.created_at.desc())
         .all()
     )
@@ -131,6 +221,7 @@ def get_categories(
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(
     category_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -139,6 +230,7 @@ def get_category(
 
     Args:
         category_id: カテゴリID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -148,7 +240,7 @@ def get_category(
     Raises:
         HTTPException: カテゴリが見つからない、または権限がない場合
     """
-    category = _get_verified_category(db, category_id, current_user.user_id)
+    category = _get_verified_category(db, category_id, current_user.user_id, ledger_id)
     return category
 
 
@@ -156,6 +248,7 @@ def get_category(
 def update_category(
     category_id: UUID,
     category_data: CategoryUpdate,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -165,6 +258,7 @@ def update_category(
     Args:
         category_id: カテゴリID
         category_data: カテゴリ更新情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -174,14 +268,16 @@ def update_category(
     Raises:
         HTTPException: カテゴリが見つからない、または権限がない場合
     """
-    category = _get_verified_category(db, category_id, current_user.user_id, action="更新")
+    category = _get_verified_category(db, category_id, current_user.user_id, ledger_id, action="更新", write=True)
 
     # 更新処理
     update_data = category_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(category, field, value)
+    record_change(db, ledger_id, "category", "updated", category_id)
 
     _safe_commit(db, "カテゴリの更新に失敗しました")
+    invalidate_user_caches(ledger_id)
     db.refresh(category)
 
     return category
@@ -191,6 +287,7 @@ def update_category(
 def delete_category(
     category_id: UUID,
     force: bool = Query(False, description="関連取引があっても強制削除するか"),
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -200,19 +297,23 @@ def delete_category(
     Args:
         category_id: カテゴリID
         force: 関連取引があっても強制削除するか（デフォルト: False）
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Raises:
         HTTPException: カテゴリが見つからない、権限がない、または関連取引がある場合
     """
-    category = _get_verified_category(db, category_id, current_user.user_id, action="削除")
-
-    # 関連する取引の存在チェック
-    transaction_count = (
-        db.query(Transaction)
-        .filter(Transaction.category_id == category_id)
-        .count()
+    category = _get_verified_category(db, category_id, current_user.user_id, ledger_id, action="削除", write=True)
+
+    # 関連する取引の件数（(category_id, date) インデックスのみで数える。アーカイブ済みの取引を含む）
+    archived = reaches_archive(archived_before(db, ledger_id), None)
+    models = (Transaction, ArchivedTransaction) if archived else (Transaction,)
+    transaction_count = sum(
+        db.execute(
+            select(func.count()).select_from(model).where(model.category_id == category_id)
+        ).scalar_one()
+        for model in models
     )
 
     if transaction_count > 0 and not force:
@@ -221,8 +322,30 @@ def delete_category(
             detail=f"このカテゴリには{transaction_count}件の取引が紐づいています。削除するには force=true を指定してください",
         )
 
+    if transaction_count > 0:
+        # 連鎖削除される取引の墓標を一括で残す（差分同期用）
+        for model in models:
+            db.execute(
+                insert(TransactionTombstone).from_select(
+                    ["transaction_id", "user_id", "deleted_at"],
+                    select(
+                        model.transaction_id,
+                        model.user_id,
+                        literal(datetime.utcnow()),
+                    ).where(model.category_id == category_id),
+                )
+            )
+        invalidate_balance_checkpoints(db, ledger_id)
+        record_change(db, ledger_id, "transaction", "deleted")
+
+    # 取引・予算は DB 側の ON DELETE CASCADE で削除される（passive_deletes）
     db.delete(category)
+    record_change(db, ledger_id, "budget", "deleted")
+    record_change(db, ledger_id, "category", "deleted", category_id)
     _safe_commit(db, "カテゴリの削除に失敗しました")
+    invalidate_user_caches(ledger_id)
+    # 連鎖削除された取引のメモは差分で反映できないため、推定用の索引を作り直す
+    memo_suggester.invalidate(ledger_id)
 
 
 @router.get("/recurring/unregistered", response_model=list[CategoryResponse])
@@ -245,42 +368,44 @@ def get_unregistered_recurring_categories(
     Returns:
         未登録の固定費カテゴリ一覧
     """
-    # 対象月の設定（デフォルトは当月）
-    target_date = month if month else date.today()
-    year = target_date.year
-    month_num = target_date.month
-
-    # 月の開始日と終了日を計算
-    start_date = date(year, month_num, 1)
-    if month_num == 12:
-        end_date = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(year, month_num + 1, 1) - timedelta(days=1)
-
-    # 一度のクエリで未登録の固定費カテゴリを取得（N+1問題を回避）
-    # サブクエリ: 対象月に取引があるカテゴリIDを取得
-    registered_category_ids = (
-        db.query(Transaction.category_id)
-        .filter(
-            Transaction.user_id == current_user.user_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
-        .distinct()
-        .subquery()
-    )
+    # 対象月の開始日と終了日（デフォルトは当月）
+    start_date, end_date = month_range(month if month else date.today())
+
+    # 書き込みがあるまで同じ (ユーザー, 月) の結果を使い回す（世代はクエリの前に取得する）
+    generation = _unregistered_cache.generation(current_user.user_id)
+    cached = _unregistered_cache.get(current_user.user_id, start_date)
+    if cached is not MISSING:
+        return cached
+
+    unregistered = _query_unregistered_recurring(db, current_user.user_id, start_date, end_date)
+    result = [CategoryResponse.model_validate(category) for category in unregistered]
+    if not read_from_replica(db):
+        _unregistered_cache.set(current_user.user_id, start_date, result, generation)
+    return result
 
-    # 固定費カテゴリのうち、対象月に取引がないものを取得
-    unregistered = (
-        db.query(Category)
-        .filter(
-            Category.user_id == current_user.user_id,
-            Category.is_recurring.is_(True),
-            ~Category.category_id.in_(
-                select(registered_category_ids)
-            )
-        )
-        .all()
-    )
 
-    return unregistered
+@router.post("/recurring/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def generate_recurring_transactions(
+    month: Optional[date] = Query(None, description="対象月（YYYY-MM-DD形式）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    未登録の固定費を既定金額で一括登録するジョブを登録
+
+    登録処理はワーカー（python -m app.worker）で実行される。
+    進捗は GET /api/jobs/{job_id} で確認する。同じ月のジョブが実行待ち・実行中の場合はそのジョブを返す。
+
+    Args:
+        month: 対象月（省略時は当月）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        登録されたジョブ
+    """
+    start_date, _ = month_range(month if month else date.today())
+    job = enqueue_job(db, current_user.user_id, "recurring.generate", {"month": start_date.isoformat()}, dedupe=True)
+    _safe_commit(db, "ジョブの登録に失敗しました")
+    db.refresh(job)
+    return job
@@ -0,0 +1,106 @@
+"""ダッシュボード関連のエンドポイント"""
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.core.archive import archived_before, reaches_archive
+from app.core.currency import FxRateNotFoundError, fx_rates
+from app.core.database import get_db
+from app.core.dates import month_range
+from app.models.archive import ArchivedTransaction
+from app.models.budget import Budget
+from app.models.category import Category, TransactionType
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.dashboard import DashboardResponse
+
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardResponse)
+def get_dashboard(
+    month: date | None = Query(None, description="対象月（YYYY-MM-DD形式、省略時は当月）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    ダッシュボードの初期表示に必要なデータを一括取得
+
+    カテゴリ・対象月の取引・対象月の予算・未登録の固定費を1回のリクエスト
+    （1つのDBセッション、認証1回）で返す。未登録の固定費は取得済みのカテゴリと
+    取引から算出するため、追加のクエリは発行しない。アーカイブの境界より前の月は
+    アーカイブ済みの取引も合わせて返す。
+
+    Args:
+        month: 対象月（省略時は当月）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        ダッシュボード表示用データ
+    """
+    start_date, end_date = month_range(month if month else date.today())
+
+    categories = (
+        db.query(Category)
+        .filter(Category.user_id == current_user.user_id)
+        .order_by(Category.created_at.desc())
+        .all()
+    )
+    models = [Transaction]
+    if reaches_archive(archived_before(db, current_user.user_id), start_date):
+        models.append(ArchivedTransaction)
+    transactions = []
+    for model in models:
+        transactions.extend(
+            db.query(model)
+            .filter(
+                model.user_id == current_user.user_id,
+                model.date >= start_date,
+                model.date <= end_date,
+            )
+            .all()
+        )
+    transactions.sort(key=lambda t: (t.date, t.created_at), reverse=True)
+    budgets = (
+        db.query(Budget)
+        .filter(Budget.user_id == current_user.user_id, Budget.month == start_date)
+        .order_by(Budget.created_at.desc())
+        .all()
+    )
+
+    registered_category_ids = {t.category_id for t in transactions}
+    unregistered_ids = [
+        c.category_id
+        for c in categories
+        if c.is_recurring and c.category_id not in registered_category_ids
+    ]
+
+    # 収支は基準通貨（JPY）に換算して合計する
+    try:
+        income = sum(
+            fx_rates.to_base(db, t.amount, t.currency, t.date)
+            for t in transactions
+            if t.type == TransactionType.INCOME
+        )
+        expense = sum(
+            fx_rates.to_base(db, t.amount, t.currency, t.date)
+            for t in transactions
+            if t.type == TransactionType.EXPENSE
+        )
+    except FxRateNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"為替レートが登録されていない通貨の取引があります: {e}",
+        ) from e
+
+    return {
+        "month": start_date,
+        "categories": categories,
+        "transactions": transactions,
+        "budgets": budgets,
+        "unregistered_recurring_category_ids": unregistered_ids,
+        "summary": {"income": income, "expense": expense, "balance": income - expense},
+    }
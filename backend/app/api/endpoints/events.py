@@ -0,0 +1,218 @@
+"""変更イベントのエンドポイント"""
+import json
+from datetime import timedelta
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.api.dependencies import get_current_user
+from app.core.broadcast import BroadcastLimitError, change_broadcaster
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.ledgers import has_ledger_access
+from app.core.outbox import ChangeEvent, replay_changes
+from app.core.security import create_access_token, decode_access_token
+from app.models.user import User
+from app.schemas.event import EventTicketResponse
+
+router = APIRouter()
+
+# EventSource はヘッダーを付けられないため、ヘッダーがない場合は接続チケットで認証する
+_optional_bearer = HTTPBearer(auto_error=False)
+# 接続チケットの用途（通常の API ではこのトークンを受け付けない）
+_TICKET_SCOPE = "events"
+# 再接続時に補うイベントの上限（超えた場合は resync を送り、クライアントに再読み込みさせる）
+_REPLAY_LIMIT = 1000
+# 切断後にクライアントが再接続するまでの待ち時間（ミリ秒）
+_RETRY_MILLISECONDS = 3000
+_RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="認証トークンが無効です",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _authenticate(
+    credentials: HTTPAuthorizationCredentials | None,
+    ticket: str | None,
+    ledger_id: UUID | None = None,
+) -> UUID:
+    """
+    アクセストークンまたは接続チケットを検証し、購読する台帳のIDを取得
+
+    ストリームの間データベース接続を保持しないよう、get_db ではなく専用のセッションで確認する。
+
+    Returns:
+        台帳ID（省略時は自分のユーザーID）
+
+    Raises:
+        HTTPException: トークン・チケットが無効、ユーザーが見つからない、または台帳を参照する権限がない場合
+    """
+    with SessionLocal() as db:
+        if credentials is not None:
+            user_id = get_current_user(credentials, db).user_id
+        else:
+            payload = decode_access_token(ticket) if ticket else None
+            if payload is None or payload.get("scope") != _TICKET_SCOPE:
+                raise _unauthorized()
+            try:
+                user_id = UUID(payload.get("sub") or "")
+            except ValueError:
+                raise _unauthorized()
+            if db.get(User, user_id) is None:
+                raise _unauthorized()
+        if ledger_id is None:
+            return user_id
+        if not has_ledger_access(db, user_id, ledger_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="この台帳を参照する権限がありません",
+            )
+        return ledger_id
+
+
+def _replay(user_id: UUID, after_event_id: int) -> list[ChangeEvent]:
+    with SessionLocal() as db:
+        return replay_changes(db, user_id, after_event_id, _REPLAY_LIMIT)
+
+
+def _format(event: ChangeEvent) -> str:
+    return f"id: {event.event_id}\nevent: change\ndata: {json.dumps(event.to_dict())}\n\n"
+
+
+async def _stream(user_id: UUID, last_event_id: int | None) -> AsyncIterator[str]:
+    """
+    変更イベントを SSE の形式で順に生成
+
+    ブロードキャスターの購読を先に登録してから再接続時の取りこぼしを読み出し、
+    両方に含まれるイベントは1回だけ送る。
+    """
+    subscription = change_broadcaster.subscribe(user_id)
+    try:
+        yield f"retry: {_RETRY_MILLISECONDS}\n\n"
+
+        replayed: set[int] = set()
+        if last_event_id is not None:
+            events = await run_in_threadpool(_replay, user_id, last_event_id)
+            if len(events) >= _REPLAY_LIMIT:
+                yield _RESYNC
+                return
+            for event in events:
+                replayed.add(event.event_id)
+                yield _format(event)
+
+        while True:
+            events, overflowed, keepalive = await subscription.next()
+            if overflowed:
+                yield _RESYNC
+                return
+            chunk = "".join(_format(event) for event in events if event.event_id not in replayed)
+            if chunk:
+                yield chunk
+            elif keepalive:
+                yield ": keepalive\n\n"
+    finally:
+        change_broadcaster.unsubscribe(subscription)
+
+
+@router.post("/ticket", response_model=EventTicketResponse)
+def create_event_ticket(current_user: User = Depends(get_current_user)):
+    """
+    SSE の接続チケットを発行
+
+    ブラウザの EventSource は Authorization ヘッダーを付けられないため、このチケットを
+    `GET /api/events?ticket=...` に渡して接続する。チケットは SSE の接続にのみ使え、
+    有効期限（EVENTS_TICKET_EXPIRE_SECONDS）は接続時にのみ確認する。
+
+    Args:
+        current_user: 認証済みユーザー
+
+    Returns:
+        接続チケットと有効期限（秒）
+    """
+    expires_in = get_settings().EVENTS_TICKET_EXPIRE_SECONDS
+    ticket = create_access_token(
+        data={"sub": str(current_user.user_id), "scope": _TICKET_SCOPE},
+        expires_delta=timedelta(seconds=expires_in),
+    )
+    return EventTicketResponse(ticket=ticket, expires_in=expires_in)
+
+
+@router.get("")
+async def stream_events(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+    ticket: str | None = Query(None, description="接続チケット（POST /api/events/ticket で発行。Authorization ヘッダーがない場合）"),
+    last_event_id_header: int | None = Header(None, alias="Last-Event-ID"),
+    last_event_id: int | None = Query(None, description="受信済みの最後のイベントID（Last-Event-ID ヘッダーと同じ）"),
+    ledger_id: UUID | None = Query(None, description="共有台帳のID（省略時は自分の台帳）"),
+):
+    """
+    取引・カテゴリ・予算の変更イベントを Server-Sent Events で配信
+
+    書き込みと同じトランザクションで記録した変更イベント（アウトボックス）を、コミット後に
+    `change` イベント（data は event_id / entity / action / entity_id / occurred_at の JSON）として送る。
+    再接続時は Last-Event-ID 以降のイベントを保持期間（OUTBOX_RETENTION_HOURS）の範囲で補う。
+    補いきれない場合や送信が追いつかない場合は `resync` イベントを送って切断するため、
+    クライアントは一覧を読み直してから再接続する。
+    `ledger_id` を指定すると、メンバーとして共有された台帳の変更イベントを受け取る
+    （権限は接続時にのみ確認する）。
+
+    Args:
+        credentials: HTTPベアラートークン
+        ticket: 接続チケット
+        last_event_id_header: 受信済みの最後のイベントID（EventSource の自動再接続時に付く）
+        last_event_id: 受信済みの最後のイベントID
+        ledger_id: 共有台帳のID
+
+    Returns:
+        text/event-stream のストリーム
+
+    Raises:
+        HTTPException: 認証に失敗した、台帳を参照する権限がない、接続数が上限を超えた、
+            または変更イベントの配信が無効な場合
+    """
+    if not get_settings().OUTBOX_RELAY_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="変更イベントの配信は無効になっています",
+        )
+    # 変更イベントは台帳（所有者のユーザーID）単位で記録しているため、台帳IDで購読する
+    user_id = await run_in_threadpool(_authenticate, credentials, ticket, ledger_id)
+
+    stream = _stream(user_id, last_event_id_header if last_event_id_header is not None else last_event_id)
+    try:
+        # 購読の登録（接続数の確認）までをレスポンスの開始前に行う
+        first = await stream.__anext__()
+    except BroadcastLimitError as e:
+        if e.per_user:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="同時に開ける変更イベントの接続数を超えています",
+            ) from e
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="サーバーが混み合っています。しばらく待ってから再度お試しください",
+            headers={"Retry-After": "5"},
+        ) from e
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,49 @@
+"""ジョブ関連のエンドポイント"""
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.core.database import get_db
+from app.models.job import Job
+from app.models.user import User
+from app.schemas.job import JobResponse
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    ジョブの状態を取得
+
+    Args:
+        job_id: ジョブID
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        ジョブの状態
+
+    Raises:
+        HTTPException: ジョブが見つからない、または権限がない場合
+    """
+    job = db.query(Job).filter(Job.job_id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ジョブが見つかりません",
+        )
+
+    if job.user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="このジョブを参照する権限がありません",
+        )
+
+    return job
@@ -0,0 +1,245 @@
+"""共有台帳のエンドポイント"""
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.core.database import get_db
+from app.core.ledgers import has_ledger_access
+from app.core.sql import upsert_insert
+from app.models.ledger import LedgerMember
+from app.models.user import User
+from app.schemas.ledger import (
+    LedgerMemberAddResponse,
+    LedgerMemberCreate,
+    LedgerMemberResponse,
+    LedgerMemberUpdate,
+    LedgerResponse,
+)
+
+router = APIRouter()
+
+
+def _safe_commit(db: Session, error_message: str = "データベースエラーが発生しました") -> None:
+    """
+    安全にコミットを実行し、エラー時はロールバック
+
+    Args:
+        db: データベースセッション
+        error_message: エラー時のメッセージ
+
+    Raises:
+        HTTPException: コミット失敗時
+    """
+    try:
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_message,
+        ) from e
+
+
+def _get_member(db: Session, ledger_id: UUID, user_id: UUID) -> LedgerMember:
+    """
+    台帳のメンバーを取得
+
+    Args:
+        db: データベースセッション
+        ledger_id: 台帳ID
+        user_id: メンバーのユーザーID
+
+    Returns:
+        メンバー
+
+    Raises:
+        HTTPException: メンバーが見つからない場合
+    """
+    member = db.get(LedgerMember, (user_id, ledger_id))
+    if member is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="メンバーが見つかりません",
+        )
+    return member
+
+
+def _member_response(member: LedgerMember, user: User) -> LedgerMemberResponse:
+    return LedgerMemberResponse(
+        user_id=user.user_id,
+        name=user.name,
+        email=user.email,
+        role=member.role,
+        created_at=member.created_at,
+    )
+
+
+@router.get("", response_model=list[LedgerResponse])
+def get_ledgers(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    参照できる台帳の一覧を取得（自分の台帳と、メンバーとして共有された台帳）
+
+    取引・カテゴリ・予算のエンドポイントに `ledger_id` を指定すると、共有された台帳を操作できる。
+
+    Args:
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        台帳一覧（自分の台帳が先頭）
+    """
+    shared = db.execute(
+        select(LedgerMember.ledger_id, User.name, LedgerMember.role)
+        .join(User, User.user_id == LedgerMember.ledger_id)
+        .where(LedgerMember.user_id == current_user.user_id)
+        .order_by(LedgerMember.created_at)
+    ).all()
+    return [
+        LedgerResponse(ledger_id=current_user.user_id, owner_name=current_user.name, role="owner"),
+        *(
+            LedgerResponse(ledger_id=ledger_id, owner_name=owner_name, role=role.value)
+            for ledger_id, owner_name, role in shared
+        ),
+    ]
+
+
+@router.get("/{ledger_id}/members", response_model=list[LedgerMemberResponse])
+def get_ledger_members(
+    ledger_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    台帳のメンバー一覧を取得（所有者とメンバーが参照できる）
+
+    Args:
+        ledger_id: 台帳ID
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        メンバー一覧（所有者は含まない）
+
+    Raises:
+        HTTPException: 台帳を参照する権限がない場合
+    """
+    if not has_ledger_access(db, current_user.user_id, ledger_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="この台帳を参照する権限がありません",
+        )
+    rows = db.execute(
+        select(LedgerMember, User)
+        .join(User, User.user_id == LedgerMember.user_id)
+        .where(LedgerMember.ledger_id == ledger_id)
+        .order_by(LedgerMember.created_at)
+    ).all()
+    return [_member_response(member, user) for member, user in rows]
+
+
+@router.post("/members", response_model=LedgerMemberAddResponse, status_code=status.HTTP_202_ACCEPTED)
+def add_ledger_member(
+    member_data: LedgerMemberCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    自分の台帳にメンバーを追加
+
+    メールアドレスが登録済みかどうかを調べられないよう、ユーザーが見つからない場合も
+    追加済みの場合も同じレスポンスを返す（追加されたメンバーはメンバー一覧で確認する）。
+    追加済みのメンバーの権限は変更しない（PUT /members/{user_id} で変更する）。
+
+    Args:
+        member_data: 追加するユーザーのメールアドレスと権限
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        受け付けたメールアドレスと権限
+
+    Raises:
+        HTTPException: 自分自身を指定した場合
+    """
+    user = db.query(User).filter(User.email == member_data.email).first()
+    if user is not None and user.user_id == current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="自分自身をメンバーに追加することはできません",
+        )
+
+    if user is not None:
+        db.execute(
+            upsert_insert(db, LedgerMember)
+            .values(user_id=user.user_id, ledger_id=current_user.user_id, role=member_data.role)
+            .on_conflict_do_nothing(index_elements=[LedgerMember.user_id, LedgerMember.ledger_id])
+        )
+        _safe_commit(db, "メンバーの追加に失敗しました")
+
+    return LedgerMemberAddResponse(email=member_data.email, role=member_data.role)
+
+
+@router.put("/members/{user_id}", response_model=LedgerMemberResponse)
+def update_ledger_member(
+    user_id: UUID,
+    member_data: LedgerMemberUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    自分の台帳のメンバーの権限を変更
+
+    Args:
+        user_id: メンバーのユーザーID
+        member_data: 権限
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        更新されたメンバー
+
+    Raises:
+        HTTPException: メンバーが見つからない場合
+    """
+    member = _get_member(db, current_user.user_id, user_id)
+    member.role = member_data.role
+    _safe_commit(db, "メンバーの権限の変更に失敗しました")
+    db.refresh(member)
+
+    return _member_response(member, db.get(User, user_id))
+
+
+@router.delete("/{ledger_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_ledger_member(
+    ledger_id: UUID,
+    user_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    台帳からメンバーを外す（所有者、またはメンバー本人が台帳から抜ける場合）
+
+    Args:
+        ledger_id: 台帳ID
+        user_id: メンバーのユーザーID
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Raises:
+        HTTPException: 権限がない、またはメンバーが見つからない場合
+    """
+    if current_user.user_id not in (ledger_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="このメンバーを外す権限がありません",
+        )
+    member = _get_member(db, ledger_id, user_id)
+    db.delete(member)
+    _safe_commit(db, "メンバーの削除に失敗しました")
@@ -0,0 +1,429 @@
+"""レポート関連のエンドポイント"""
+from collections import defaultdict
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.core.archive import archived_before, split_archived_range
+from app.core.balance import balance_before, signed_base_amount
+from app.core.cache import MISSING, create_user_cache
+from app.core.currency import BASE_CURRENCY, FxRateNotFoundError, fx_rates, to_base_sql
+from app.core.database import get_db, read_from_replica
+from app.core.dates import iter_periods, truncate_date
+from app.core.sql import trunc_date
+from app.models.archive import ArchivedTransaction, ArchivedTransactionTag, TransactionRollup
+from app.models.category import TransactionType
+from app.models.tag import TransactionTag
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.report import (
+    BalanceBucket,
+    BalanceReportResponse,
+    CategoryTotal,
+    Granularity,
+    TagReportResponse,
+    TagTotal,
+    TimeseriesBucket,
+    TimeseriesResponse,
+)
+
+router = APIRouter()
+
+# 1回のリクエストで返す集計単位の上限（日単位で約2年8か月）
+MAX_PERIODS = 1000
+
+# (開始日, 終了日, 集計単位) ごとの集計結果。取引・カテゴリの書き込みで無効化される
+_timeseries_cache = create_user_cache(maxsize=4096)
+# (開始日, 終了日) ごとのタグ別集計結果。取引・タグの書き込みで無効化される
+_tag_report_cache = create_user_cache(maxsize=4096)
+# (開始日, 終了日, 集計単位) ごとの残高推移。取引・カテゴリの書き込みで無効化される
+_balance_cache = create_user_cache(maxsize=4096)
+
+
+def _resolve_periods(start_date: date, end_date: date, granularity: str) -> list[date]:
+    """
+    期間内の集計単位の先頭日を列挙
+
+    Raises:
+        HTTPException: 集計単位の数が上限を超える場合
+    """
+    try:
+        return iter_periods(start_date, end_date, granularity, max_periods=MAX_PERIODS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"集計単位の数が上限（{MAX_PERIODS}）を超えています。期間を短くするか集計単位を大きくしてください",
+        ) from e
+
+
+def _resolve_range(start_date: date | None, end_date: date | None) -> tuple[date, date]:
+    """
+    集計期間を決定（省略時は終了日が今日、開始日が終了日の年初）
+
+    Raises:
+        HTTPException: 開始日が終了日より後の場合
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or date(end_date.year, 1, 1)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="開始日は終了日以前の日付を指定してください",
+        )
+    return start_date, end_date
+
+
+def _rate_date(model=Transaction):
+    """
+    換算に使う日付の式（model は Transaction か ArchivedTransaction）
+
+    基準通貨の取引は NULL にして集計単位ごとにまとめ、外貨の取引のみ換算のため日付ごとに分ける
+    （基準通貨のみの履歴ではグループ数が増えない）。
+    """
+    return case((model.currency != BASE_CURRENCY, model.date)).label("rate_date")
+
+
+def _sum_in_base_currency(db: Session, rows) -> dict[tuple, list[int]]:
+    """
+    (キー..., 通貨, 換算日, 金額, 件数) の行をキーごとに基準通貨へ換算して合計
+
+    Args:
+        db: データベースセッション
+        rows: 集計クエリの結果
+
+    Returns:
+        キー -> [金額, 件数]
+
+    Raises:
+        HTTPException: 為替レートが登録されていない通貨の取引がある場合
+    """
+    sums: dict[tuple, list[int]] = {}
+    try:
+        for *key, currency, on, amount, count in rows:
+            total = sums.setdefault(tuple(key), [0, 0])
+            total[0] += fx_rates.to_base(db, amount, currency, on) if on is not None else amount
+            total[1] += count
+    except FxRateNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"為替レートが登録されていない通貨の取引があります: {e}",
+        ) from e
+    return sums
+
+
+def _query_timeseries_rows(db: Session, model, user_id, start_date: date, end_date: date, granularity: str):
+    """
+    期間内の取引を (集計単位, カテゴリ, 収支, 通貨, 換算日) ごとに集計
+
+    Args:
+        db: データベースセッション
+        model: Transaction か ArchivedTransaction
+        user_id: ユーザーID
+        start_date: 開始日
+        end_date: 終了日
+        granularity: 集計単位
+
+    Returns:
+        `_sum_in_base_currency()` に渡す集計結果
+    """
+    # 集計単位は Literal で検証済みのため、SELECT と GROUP BY が同じ式になるようリテラルで埋め込む
+    period = trunc_date(granularity, model.date).label("period")
+    rate_date = _rate_date(model)
+    return db.execute(
+        select(
+            period,
+            model.category_id,
+            model.type,
+            model.currency,
+            rate_date,
+            func.sum(model.amount),
+            func.count(),
+        )
+        .where(
+            model.user_id == user_id,
+            model.date >= start_date,
+            model.date <= end_date,
+        )
+        .group_by(period, model.category_id, model.type, model.currency, rate_date)
+    ).all()
+
+
+def _archived_totals(db: Session, user_id, start_date: date, end_date: date, granularity: str) -> dict[tuple, list[int]]:
+    """
+    アーカイブ済みの取引の (集計単位, カテゴリ, 収支) ごとの合計を取得
+
+    期間に月全体が含まれる月は transaction_rollups の月ごとの合計を集計単位にまとめ、
+    月の途中から・途中までの部分（と月の倍数でない集計単位）は transaction_archive から集計する。
+
+    Returns:
+        (集計単位, カテゴリ, 収支) -> [金額, 件数]（期間がアーカイブの境界にかからなければ空）
+    """
+    rollup_months, ranges = split_archived_range(
+        start_date, end_date, archived_before(db, user_id), granularity,
+    )
+    rows = []
+    for range_start, range_end in ranges:
+        rows.extend(_query_timeseries_rows(db, ArchivedTransaction, user_id, range_start, range_end, granularity))
+    sums = _sum_in_base_currency(db, rows)
+
+    if rollup_months is not None:
+        first_month, last_month = rollup_months
+        rollups = db.execute(
+            select(
+                TransactionRollup.month,
+                TransactionRollup.category_id,
+                TransactionRollup.type,
+                TransactionRollup.amount,
+                TransactionRollup.count,
+            ).where(
+                TransactionRollup.user_id == user_id,
+                TransactionRollup.month >= first_month,
+                TransactionRollup.month <= last_month,
+            )
+        )
+        for month, category_id, type_, amount, count in rollups:
+            total = sums.setdefault((truncate_date(month, granularity), category_id, type_), [0, 0])
+            total[0] += amount
+            total[1] += count
+    return sums
+
+
+@router.get("/timeseries", response_model=TimeseriesResponse)
+def get_timeseries(
+    granularity: Granularity = Query("month", description="集計単位（day / week / month / quarter / year）"),
+    start_date: date | None = Query(None, description="開始日（YYYY-MM-DD、省略時は終了日の年初）"),
+    end_date: date | None = Query(None, description="終了日（YYYY-MM-DD、省略時は今日）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    期間別・カテゴリ別・収支別の合計を取得
+
+    集計単位ごとの合計を SQL でまとめて集計し、取引のない集計単位も
+    0 として埋めて返す。外貨の取引は取引日の為替レートで基準通貨（JPY）に換算する。
+    アーカイブの境界より前の期間は、アーカイブ済みの取引の月ごとの合計を合わせて集計する。
+    結果はユーザー単位のキャッシュに保持し、同じ条件での再描画ではデータベースを参照しない。
+
+    Args:
+        granularity: 集計単位
+        start_date: 開始日
+        end_date: 終了日
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        集計単位ごとの合計（昇順）
+
+    Raises:
+        HTTPException: 期間が不正、または集計単位の数が上限を超える場合
+    """
+    start_date, end_date = _resolve_range(start_date, end_date)
+    periods = _resolve_periods(start_date, end_date, granularity)
+
+    cache_key = (start_date, end_date, granularity)
+    generation = _timeseries_cache.generation(current_user.user_id)
+    cached = _timeseries_cache.get(current_user.user_id, cache_key)
+    if cached is not MISSING:
+        return cached
+
+    rows = _query_timeseries_rows(db, Transaction, current_user.user_id, start_date, end_date, granularity)
+
+    # (集計単位, カテゴリ, 収支) ごとに基準通貨へ換算して合計する
+    sums = _sum_in_base_currency(db, rows)
+    for key, (amount, count) in _archived_totals(db, current_user.user_id, start_date, end_date, granularity).items():
+        total = sums.setdefault(key, [0, 0])
+        total[0] += amount
+        total[1] += count
+
+    totals: dict[date, list[CategoryTotal]] = defaultdict(list)
+    for (period_start, category_id, type_), (amount, count) in sums.items():
+        totals[period_start].append(
+            CategoryTotal(category_id=category_id, type=type_, amount=amount, count=count)
+        )
+
+    buckets = []
+    for period_start in periods:
+        categories = totals.get(period_start, [])
+        buckets.append(TimeseriesBucket(
+            period=period_start,
+            income=sum(c.amount for c in categories if c.type == TransactionType.INCOME),
+            expense=sum(c.amount for c in categories if c.type == TransactionType.EXPENSE),
+            categories=categories,
+        ))
+
+    result = TimeseriesResponse(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        buckets=buckets,
+    )
+    if not read_from_replica(db):
+        _timeseries_cache.set(current_user.user_id, cache_key, result, generation)
+    return result
+
+
+@router.get("/tags", response_model=TagReportResponse)
+def get_tag_report(
+    start_date: date | None = Query(None, description="開始日（YYYY-MM-DD、省略時は終了日の年初）"),
+    end_date: date | None = Query(None, description="終了日（YYYY-MM-DD、省略時は今日）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    タグ別・収支別の合計を取得
+
+    期間内の取引を (user_id, date) インデックスで絞り込み、関連テーブルの主キーで
+    タグと結合して集計する。外貨の取引は取引日の為替レートで基準通貨（JPY）に換算する。
+    アーカイブの境界より前の期間はアーカイブ済みの取引とタグの関連も集計する。
+
+    Args:
+        start_date: 開始日
+        end_date: 終了日
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        タグ別の合計（金額の降順）
+
+    Raises:
+        HTTPException: 期間が不正な場合
+    """
+    start_date, end_date = _resolve_range(start_date, end_date)
+
+    cache_key = (start_date, end_date)
+    generation = _tag_report_cache.generation(current_user.user_id)
+    cached = _tag_report_cache.get(current_user.user_id, cache_key)
+    if cached is not MISSING:
+        return cached
+
+    _, archived_ranges = split_archived_range(start_date, end_date, archived_before(db, current_user.user_id), None)
+    rows = []
+    for model, link, range_start, range_end in [
+        (Transaction, TransactionTag, start_date, end_date),
+        *((ArchivedTransaction, ArchivedTransactionTag, *archived_range) for archived_range in archived_ranges),
+    ]:
+        rate_date = _rate_date(model)
+        rows.extend(db.execute(
+            select(
+                link.tag_id,
+                model.type,
+                model.currency,
+                rate_date,
+                func.sum(model.amount),
+                func.count(),
+            )
+            .join(link, link.transaction_id == model.transaction_id)
+            .where(
+                model.user_id == current_user.user_id,
+                model.date >= range_start,
+                model.date <= range_end,
+            )
+            .group_by(link.tag_id, model.type, model.currency, rate_date)
+        ))
+
+    sums = _sum_in_base_currency(db, rows)
+    tags = [
+        TagTotal(tag_id=tag_id, type=type_, amount=amount, count=count)
+        for (tag_id, type_), (amount, count) in sums.items()
+    ]
+    tags.sort(key=lambda t: t.amount, reverse=True)
+
+    result = TagReportResponse(start_date=start_date, end_date=end_date, tags=tags)
+    if not read_from_replica(db):
+        _tag_report_cache.set(current_user.user_id, cache_key, result, generation)
+    return result
+
+
+@router.get("/balance", response_model=BalanceReportResponse)
+def get_balance_report(
+    granularity: Granularity = Query("month", description="集計単位（day / week / month / quarter / year）"),
+    start_date: date | None = Query(None, description="開始日（YYYY-MM-DD、省略時は終了日の年初）"),
+    end_date: date | None = Query(None, description="終了日（YYYY-MM-DD、省略時は今日）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    集計単位ごとの収支と残高の推移を取得
+
+    開始日の前日時点の残高を月初のチェックポイントから求め、期間内の集計単位ごとの増減を
+    SUM() OVER (ORDER BY 集計単位) で累計して足す（開始日より前の期間の取引は読まない）。
+    外貨の取引は取引日の為替レートで SQL 内で基準通貨（JPY）に換算する。
+    アーカイブの境界より前の期間の収支は、アーカイブ済みの取引の月ごとの合計から求めて累計に足す。
+
+    Args:
+        granularity: 集計単位
+        start_date: 開始日
+        end_date: 終了日
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        集計単位ごとの収支と終了時点の残高（昇順）
+
+    Raises:
+        HTTPException: 期間が不正、または集計単位の数が上限を超える場合
+    """
+    start_date, end_date = _resolve_range(start_date, end_date)
+    periods = _resolve_periods(start_date, end_date, granularity)
+
+    cache_key = (start_date, end_date, granularity)
+    generation = _balance_cache.generation(current_user.user_id)
+    cached = _balance_cache.get(current_user.user_id, cache_key)
+    if cached is not MISSING:
+        return cached
+
+    opening = balance_before(db, current_user.user_id, start_date)
+
+    period = trunc_date(granularity, Transaction.date).label("period")
+    amount = to_base_sql(Transaction.amount, Transaction.currency, Transaction.date)
+    is_income = Transaction.type == TransactionType.INCOME
+    rows = db.execute(
+        select(
+            period,
+            func.coalesce(func.sum(case((is_income, amount), else_=0)), 0),
+            func.coalesce(func.sum(case((is_income, 0), else_=amount)), 0),
+            func.sum(func.sum(signed_base_amount())).over(order_by=period),
+        )
+        .where(
+            Transaction.user_id == current_user.user_id,
+            Transaction.date >= start_date,
+            Transaction.date <= end_date,
+        )
+        .group_by(period)
+    ).all()
+
+    totals = {period_start: (int(income), int(expense), int(change)) for period_start, income, expense, change in rows}
+    archived: dict[date, list[int]] = defaultdict(lambda: [0, 0])
+    for (period_start, _, type_), (amount, _) in _archived_totals(
+        db, current_user.user_id, start_date, end_date, granularity,
+    ).items():
+        archived[period_start][0 if type_ == TransactionType.INCOME else 1] += amount
+
+    buckets = []
+    hot_change = archived_change = 0
+    for period_start in periods:
+        income, expense, change = totals.get(period_start, (0, 0, None))
+        archived_income, archived_expense = archived.get(period_start, (0, 0))
+        if change is not None:
+            hot_change = change
+        archived_change += archived_income - archived_expense
+        buckets.append(BalanceBucket(
+            period=period_start,
+            income=income + archived_income,
+            expense=expense + archived_expense,
+            balance=opening + hot_change + archived_change,
+        ))
+
+    result = BalanceReportResponse(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        opening_balance=opening,
+        buckets=buckets,
+    )
+    if not read_from_replica(db):
+        _balance_cache.set(current_user.user_id, cache_key, result, generation)
+    return result
@@ -0,0 +1,359 @@
+"""スナップショット（全データのバックアップ・復元）関連のエンドポイント"""
+import uuid
+from datetime import datetime
+from typing import Any, Iterator
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.core.archive import archived_external_ids
+from app.core.balance import invalidate_balance_checkpoints
+from app.core.budget_alerts import reset_spending
+from app.core.outbox import record_change
+from app.core.cache import invalidate_user_caches
+from app.core.database import SessionLocal, get_db
+from app.core.snapshot import (
+    SNAPSHOT_CHUNK_ROWS,
+    SNAPSHOT_MEDIA_TYPE,
+    SNAPSHOT_TABLES,
+    SnapshotFormatError,
+    SnapshotReader,
+    pack_snapshot,
+)
+from app.core.sql import upsert_insert
+from app.core.suggest import memo_suggester
+from app.models.archive import ArchivedTransaction, ArchivedTransactionTag, ArchiveWatermark
+from app.models.budget import Budget
+from app.models.category import Category, RecurringFrequency, TransactionType
+from app.models.tag import Tag, TransactionTag
+from app.models.transaction import Transaction, TransactionTombstone
+from app.models.user import User
+from app.schemas.snapshot import SnapshotImportResponse
+
+router = APIRouter()
+
+_MODELS = {
+    "categories": Category,
+    "tags": Tag,
+    "budgets": Budget,
+    "transactions": Transaction,
+    "transaction_tags": TransactionTag,
+}
+# アーカイブ済みの行も合わせて出力するテーブル（復元時はすべて transactions に登録する）
+_ARCHIVE_MODELS = {
+    "transactions": ArchivedTransaction,
+    "transaction_tags": ArchivedTransactionTag,
+}
+
+
+def _iter_table(db: Session, table: str, user_id: UUID) -> Iterator[list[tuple]]:
+    """
+    テーブルの行をサーバーサイドカーソルでチャンクごとに取得
+
+    Args:
+        db: データベースセッション
+        table: テーブル名
+        user_id: ユーザーID
+
+    Yields:
+        SNAPSHOT_TABLES の列順に並んだ行のリスト（取引とタグの関連はアーカイブ済みの行を含む）
+    """
+    models = [_MODELS[table]]
+    if table in _ARCHIVE_MODELS:
+        models.append(_ARCHIVE_MODELS[table])
+    for model in models:
+        columns = [getattr(model, column) for column, _ in SNAPSHOT_TABLES[table]]
+        stmt = select(*columns)
+        if model in (TransactionTag, ArchivedTransactionTag):
+            # 関連テーブルはユーザーIDを持たないため取引で絞り込む
+            parent = Transaction if model is TransactionTag else ArchivedTransaction
+            stmt = stmt.join(parent, parent.transaction_id == model.transaction_id)
+            stmt = stmt.where(parent.user_id == user_id)
+        else:
+            stmt = stmt.where(model.user_id == user_id)
+        result = db.execute(stmt.execution_options(yield_per=SNAPSHOT_CHUNK_ROWS))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+def _stream_snapshot(user_id: UUID, user_info: dict[str, Any], read_only: bool) -> Iterator[bytes]:
+    """
+    スナップショットを生成するジェネレータ
+
+    レスポンス送信中はリクエストのセッションが閉じられているため、専用のセッションを使う。
+    すべてのテーブルを同じ時点のデータで出力するため REPEATABLE READ（SQLite では1つの読み取りトランザクション）で読み取る。
+    """
+    db = SessionLocal()
+    db.info["read_only"] = read_only
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            # WAL では明示したトランザクション内の読み取りが同じスナップショットを参照する
+            db.connection().exec_driver_sql("BEGIN")
+        else:
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        yield from pack_snapshot(
+            user_info,
+            ((table, _iter_table(db, table, user_id)) for table in SNAPSHOT_TABLES),
+        )
+    finally:
+        db.close()
+
+
+@router.get("")
+def export_snapshot(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    ユーザーの全データ（カテゴリ・タグ・予算・取引）をスナップショットとして出力
+
+    msgpack 形式でチャンクごとにストリーミングするため、件数が多くても
+    メモリ使用量は一定に保たれる。
+
+    Args:
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        スナップショットのストリーミングレスポンス
+    """
+    user_info = {"name": current_user.name, "email": current_user.email}
+    filename = f"kakeibon-{datetime.utcnow():%Y%m%d%H%M%S}.snapshot"
+    return StreamingResponse(
+        _stream_snapshot(current_user.user_id, user_info, db.info.get("read_only", False)),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+class _SnapshotLoader:
+    """
+    スナップショットのチャンクを新しいIDに振り替えて一括登録する
+
+    カテゴリ・タグ・取引のIDは新しく採番し、参照しているIDは対応表で付け替える。
+    同じ名前のタグが既にある場合はそのタグに付け替え、同じ明細IDの取引が既にある場合は登録せずに読み飛ばす
+    （読み飛ばした取引のタグの関連も登録しない）。
+    すべて呼び出し側のトランザクション内で登録し、コミットは呼び出し側で行う。
+    """
+
+    def __init__(self, db: Session, user_id: UUID) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.category_ids: dict[UUID, UUID] = {}
+        self.tag_ids: dict[UUID, UUID] = {}
+        # 取引とタグの関連を付け替えるための対応表（取引数に比例したメモリを使う）
+        self.transaction_ids: dict[UUID, UUID] = {}
+        # 明細IDが重複して登録しなかった取引の元のID
+        self.skipped_transaction_ids: set[UUID] = set()
+        # 読み込んだ行数（フッターの記録との照合用）と実際に登録した行数
+        self.counts = {table: 0 for table in SNAPSHOT_TABLES}
+        self.created = {table: 0 for table in SNAPSHOT_TABLES}
+        self.now = datetime.utcnow()
+
+    def clear(self) -> None:
+        """既存のデータを削除（削除される取引は差分同期用に墓標を残す。アーカイブ済みの取引も削除する）"""
+        for model in (Transaction, ArchivedTransaction):
+            self.db.execute(
+                insert(TransactionTombstone).from_select(
+                    ["transaction_id", "user_id", "deleted_at"],
+                    select(
+                        model.transaction_id,
+                        model.user_id,
+                        literal(self.now),
+                    ).where(model.user_id == self.user_id),
+                )
+            )
+        # 取引・アーカイブ済みの取引・月ごとの合計・予算・取引とタグの関連は ON DELETE CASCADE で削除される
+        self.db.execute(delete(Category).where(Category.user_id == self.user_id))
+        self.db.execute(delete(Tag).where(Tag.user_id == self.user_id))
+        self.db.execute(delete(ArchiveWatermark).where(ArchiveWatermark.user_id == self.user_id))
+
+    @staticmethod
+    def _remap(ids: dict[UUID, UUID], old_id: UUID, label: str) -> UUID:
+        try:
+            return ids[old_id]
+        except KeyError:
+            raise SnapshotFormatError(f"存在しない{label}を参照しています") from None
+
+    def load(self, table: str, rows: list[dict[str, Any]]) -> None:
+        """
+        チャンクを一括登録
+
+        Args:
+            table: テーブル名
+            rows: チャンクの行
+
+        Raises:
+            SnapshotFormatError: 値が正しくない場合
+        """
+        if not rows:
+            return
+
+        created = len(rows)
+        try:
+            if table == "categories":
+                values = []
+                for row in rows:
+                    new_id = uuid.uuid4()
+                    self.category_ids[row["category_id"]] = new_id
+                    values.append({
+                        **row,
+                        "category_id": new_id,
+                        "user_id": self.user_id,
+                        "type": TransactionType(row["type"]),
+                        "frequency": RecurringFrequency(row["frequency"]) if row["frequency"] else None,
+                    })
+                self.db.execute(insert(Category), values)
+            elif table == "tags":
+                # 同じ名前のタグが既にある場合（merge）は登録せず、既存のタグに付け替える
+                stmt = upsert_insert(self.db, Tag).on_conflict_do_nothing(
+                    index_elements=[Tag.user_id, Tag.name],
+                ).returning(Tag.tag_id)
+                created = len(self.db.scalars(stmt, [
+                    {**row, "tag_id": uuid.uuid4(), "user_id": self.user_id} for row in rows
+                ]).all())
+                tag_ids_by_name = dict(self.db.execute(
+                    select(Tag.name, Tag.tag_id).where(
+                        Tag.user_id == self.user_id,
+                        Tag.name.in_({row["name"] for row in rows}),
+                    )
+                ).all())
+                for row in rows:
+                    self.tag_ids[row["tag_id"]] = tag_ids_by_name[row["name"]]
+            elif table == "budgets":
+                self.db.execute(insert(Budget), [
+                    {
+                        **row,
+                        "budget_id": uuid.uuid4(),
+                        "category_id": self._remap(self.category_ids, row["category_id"], "カテゴリ"),
+                        "user_id": self.user_id,
+                    }
+                    for row in rows
+                ])
+            elif table == "transactions":
+                # 同じ明細IDの取引が既にある場合（merge）は /transactions/import と同じく登録しない
+                archived_ids = archived_external_ids(
+                    self.db, self.user_id, {row["external_id"] for row in rows if row["external_id"]}
+                )
+                new_ids: dict[UUID, UUID] = {}
+                values = []
+                for row in rows:
+                    if row["external_id"] in archived_ids:
+                        self.skipped_transaction_ids.add(row["transaction_id"])
+                        continue
+                    new_id = uuid.uuid4()
+                    new_ids[row["transaction_id"]] = new_id
+                    values.append({
+                        **row,
+                        "transaction_id": new_id,
+                        "category_id": self._remap(self.category_ids, row["category_id"], "カテゴリ"),
+                        "user_id": self.user_id,
+                        "type": TransactionType(row["type"]),
+                        # 差分同期で他の端末に届くよう、更新日時は復元時刻にする
+                        "updated_at": self.now,
+                    })
+                stmt = upsert_insert(self.db, Transaction).on_conflict_do_nothing(
+                    index_elements=[Transaction.user_id, Transaction.external_id],
+                    index_where=Transaction.external_id.is_not(None),
+                ).returning(Transaction.transaction_id)
+                created_ids = set(self.db.scalars(stmt, values)) if values else set()
+                for old_id, new_id in new_ids.items():
+                    if new_id in created_ids:
+                        self.transaction_ids[old_id] = new_id
+                    else:
+                        self.skipped_transaction_ids.add(old_id)
+                created = len(created_ids)
+            else:
+                values = [
+                    {
+                        "transaction_id": self._remap(self.transaction_ids, row["transaction_id"], "取引"),
+                        "tag_id": self._remap(self.tag_ids, row["tag_id"], "タグ"),
+                    }
+                    for row in rows
+                    if row["transaction_id"] not in self.skipped_transaction_ids
+                ]
+                if values:
+                    self.db.execute(insert(TransactionTag), values)
+                created = len(values)
+        except ValueError as e:
+            raise SnapshotFormatError(f"{table} の値が正しくありません") from e
+
+        self.counts[table] += len(rows)
+        self.created[table] += created
+
+
+@router.post("/import", response_model=SnapshotImportResponse)
+async def import_snapshot(
+    request: Request,
+    mode: str = Query("merge", pattern="^(merge|replace)$", description="merge: 既存データに追加 / replace: 既存データを置き換え"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    スナップショットを復元
+
+    リクエストボディを受信しながらチャンク単位で一括登録し、最後にまとめてコミットする。
+    途中でエラーになった場合は何も登録しない。IDはすべて新しく採番される。
+    merge では同じ名前のタグは既存のタグにまとめ、同じ明細IDの取引は登録しない。
+
+    Args:
+        request: リクエスト（ボディがスナップショット）
+        mode: merge（既存データに追加）または replace（既存データを削除してから復元）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        テーブルごとの登録件数（読み飛ばした行は含まない）
+
+    Raises:
+        HTTPException: スナップショットの形式が正しくない、または登録に失敗した場合
+    """
+    reader = SnapshotReader()
+    loader = _SnapshotLoader(db, current_user.user_id)
+
+    def load_available() -> None:
+        for table, rows in reader.read():
+            loader.load(table, rows)
+
+    try:
+        if mode == "replace":
+            await run_in_threadpool(loader.clear)
+        async for data in request.stream():
+            reader.feed(data)
+            await run_in_threadpool(load_available)
+        expected_counts = reader.finish()
+        if any(expected_counts.get(table, 0) != count for table, count in loader.counts.items()):
+            raise SnapshotFormatError("件数がフッターの記録と一致しません")
+        await run_in_threadpool(invalidate_balance_checkpoints, db, current_user.user_id)
+        await run_in_threadpool(reset_spending, db, current_user.user_id)
+        for entity in ("category", "budget", "transaction"):
+            await run_in_threadpool(record_change, db, current_user.user_id, entity, "updated")
+        await run_in_threadpool(db.commit)
+    except SnapshotFormatError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except (DataError, IntegrityError) as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="スナップショットの値が正しくありません",
+        ) from e
+    except SQLAlchemyError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="スナップショットの復元に失敗しました",
+        ) from e
+
+    invalidate_user_caches(current_user.user_id)
+    memo_suggester.invalidate(current_user.user_id)
+    return SnapshotImportResponse(**loader.created)
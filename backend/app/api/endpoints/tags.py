@@ -0,0 +1,247 @@
+"""タグ関連のエンドポイント"""
+import uuid
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user, get_ledger_id
+from app.core.cache import invalidate_user_caches
+from app.core.database import get_db
+from app.core.ledgers import has_ledger_access, ledger_scope
+from app.core.outbox import record_change
+from app.models.tag import Tag, TransactionTag
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.tag import TagCreate, TagResponse, TagUpdate
+
+router = APIRouter()
+
+
+def _get_verified_tag(
+    db: Session,
+    tag_id: UUID,
+    user_id: UUID,
+    ledger_id: UUID,
+    action: str = "アクセス",
+    write: bool = False,
+) -> Tag:
+    """
+    タグの存在確認と権限確認を行う（台帳と権限はクエリの条件で確認する）
+
+    Args:
+        db: データベースセッション
+        tag_id: タグID
+        user_id: ユーザーID
+        ledger_id: 台帳ID
+        action: エラーメッセージ用のアクション名
+        write: 書き込み権限を要求するか
+
+    Returns:
+        検証済みのタグ
+
+    Raises:
+        HTTPException: タグが見つからない、または権限がない場合
+    """
+    tag = db.scalars(
+        select(Tag).where(
+            Tag.tag_id == tag_id,
+            ledger_scope(Tag.user_id, user_id, ledger_id, write=write),
+        )
+    ).first()
+    if tag is None:
+        # 見つからない場合のみ、存在しないのか権限がないのかを区別する
+        exists = db.execute(select(Tag.tag_id).where(Tag.tag_id == tag_id)).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="タグが見つかりません",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"このタグを{action}する権限がありません",
+        )
+    return tag
+
+
+def _commit_tag(db: Session, error_message: str) -> None:
+    """
+    タグの変更をコミット（同じ名前のタグがある場合は 400）
+
+    Args:
+        db: データベースセッション
+        error_message: エラー時のメッセージ
+
+    Raises:
+        HTTPException: タグ名が重複している、またはコミットに失敗した場合
+    """
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="同じ名前のタグが既に存在します",
+        ) from e
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_message,
+        ) from e
+
+
+@router.post("", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
+def create_tag(
+    tag_data: TagCreate,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    タグを作成
+
+    共有された台帳には編集者（editor）のみ作成できる。
+
+    Args:
+        tag_data: タグ作成情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        作成されたタグ
+
+    Raises:
+        HTTPException: 台帳への書き込み権限がない、または同じ名前のタグが既に存在する場合
+    """
+    if not has_ledger_access(db, current_user.user_id, ledger_id, write=True):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="この台帳にタグを作成する権限がありません",
+        )
+
+    new_tag = Tag(
+        # 変更イベントに ID を記録するため、フラッシュ（一意制約の検出）の前に採番する
+        tag_id=uuid.uuid4(),
+        user_id=ledger_id,
+        name=tag_data.name,
+        color=tag_data.color,
+    )
+
+    db.add(new_tag)
+    record_change(db, ledger_id, "tag", "created", new_tag.tag_id)
+    _commit_tag(db, "タグの作成に失敗しました")
+    db.refresh(new_tag)
+
+    return new_tag
+
+
+@router.get("", response_model=list[TagResponse])
+def get_tags(
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    台帳のタグ一覧を取得（参照権限のない台帳を指定した場合は空の一覧）
+
+    Args:
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        タグ一覧（名前順）
+    """
+    tags = (
+        db.query(Tag)
+        .filter(ledger_scope(Tag.user_id, current_user.user_id, ledger_id))
+        .order_by(Tag.name)
+        .all()
+    )
+
+    return tags
+
+
+@router.put("/{tag_id}", response_model=TagResponse)
+def update_tag(
+    tag_id: UUID,
+    tag_data: TagUpdate,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    タグを更新
+
+    Args:
+        tag_id: タグID
+        tag_data: タグ更新情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        更新されたタグ
+
+    Raises:
+        HTTPException: タグが見つからない、権限がない、または同じ名前のタグが既に存在する場合
+    """
+    tag = _get_verified_tag(db, tag_id, current_user.user_id, ledger_id, action="更新", write=True)
+
+    # 更新処理
+    update_data = tag_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(tag, field, value)
+    record_change(db, ledger_id, "tag", "updated", tag_id)
+
+    _commit_tag(db, "タグの更新に失敗しました")
+    invalidate_user_caches(ledger_id)
+    db.refresh(tag)
+
+    return tag
+
+
+@router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_tag(
+    tag_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    タグを削除（取引からも外れる）
+
+    Args:
+        tag_id: タグID
+        ledger_id: 台帳ID（省略時は自分の台帳）
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Raises:
+        HTTPException: タグが見つからない、または権限がない場合
+    """
+    tag = _get_verified_tag(db, tag_id, current_user.user_id, ledger_id, action="削除", write=True)
+
+    # タグが外れる取引を差分同期で他の端末に届けるため、更新日時を進める
+    result = db.execute(
+        update(Transaction)
+        .where(
+            Transaction.transaction_id.in_(
+                select(TransactionTag.transaction_id).where(TransactionTag.tag_id == tag_id)
+            )
+        )
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        record_change(db, ledger_id, "transaction", "updated")
+    # 関連は DB 側の ON DELETE CASCADE で削除される
+    db.delete(tag)
+    record_change(db, ledger_id, "tag", "deleted", tag_id)
+    _commit_tag(db, "タグの削除に失敗しました")
+    invalidate_user_caches(ledger_id)
@@ -1,29 +1,63 @@
 """取引関連のエンドポイント"""
-from datetime import date
+import hashlib
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_ledger_id
+from app.core.archive import archived_before, archived_external_ids, reaches_archive, restore_transaction
+from app.core.balance import balance_before, invalidate_balance_checkpoints, signed_base_amount
+from app.core.budget_alerts import SpendingChanges
+from app.core.cache import invalidate_user_caches
+from app.core.config import get_settings
+from app.core.currency import fx_rates
 from app.core.database import get_db
+from app.core.http_cache import etag_matches, make_etag
+from app.core.ledgers import ledger_scope
+from app.core.outbox import record_change
+from app.core.sql import days_between, upsert_insert
+from app.core.suggest import memo_suggester, normalize_memo
+from app.models.archive import ArchivedTransaction, ArchivedTransactionTag
 from app.models.category import Category
-from app.models.transaction import Transaction
+from app.models.tag import Tag, TransactionTag
+from app.models.transaction import Transaction, TransactionTombstone
 from app.models.user import User
-from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionUpdate
+from app.schemas.transaction import (
+    CategorySuggestion,
+    DuplicateGroup,
+    TransactionChangesResponse,
+    TransactionCreate,
+    TransactionImport,
+    TransactionImportItem,
+    TransactionImportResponse,
+    TransactionResponse,
+    TransactionUpdate,
+)
 
 router = APIRouter()
 
+# 同期トークンの基準時刻（トークンはこの時刻からの経過マイクロ秒）
+_SYNC_EPOCH = datetime(1970, 1, 1)
+# 一括登録でカテゴリを推定する際に型の一致を確認する候補数
+_IMPORT_SUGGESTIONS = 5
 
-def _get_verified_category(db: Session, category_id: UUID, user_id: UUID) -> Category:
+
+def _get_verified_category(db: Session, category_id: UUID, user_id: UUID, ledger_id: UUID) -> Category:
     """
-    カテゴリの存在確認と所有者検証を行う
+    カテゴリの存在確認と権限確認を行う（台帳と書き込み権限はクエリの条件で確認する）
 
     Args:
         db: データベースセッション
         category_id: カテゴリID
         user_id: ユーザーID
+        ledger_id: 台帳ID
 
     Returns:
         検証済みのカテゴリ
@@ -31,13 +65,20 @@ def _get_verified_category(db: Session, category_id: UUID, user_id: UUID) -> Cat
     Raises:
         HTTPException: カテゴリが見つからない、または権限がない場合
     """
-    category = db.query(Category).filter(Category.category_id == category_id).first()
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="カテゴリが見つかりません",
+    category = db.scalars(
+        select(Category).where(
+            Category.category_id == category_id,
+            ledger_scope(Category.user_id, user_id, ledger_id, write=True),
         )
-    if category.user_id != user_id:
+    ).first()
+    if category is None:
+        # 見つからない場合のみ、存在しないのか権限がないのかを区別する
+        exists = db.execute(select(Category.category_id).where(Category.category_id == category_id)).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="カテゴリが見つかりません",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="このカテゴリを使用する権限がありません",
@@ -45,15 +86,151 @@ def _get_verified_category(db: Session, category_id: UUID, user_id: UUID) -> Cat
     return category
 
 
-def _get_verified_transaction(db: Session, transaction_id: UUID, user_id: UUID, action: str = "アクセス") -> Transaction:
+def _get_verified_tags(db: Session, tag_ids: list[UUID], ledger_id: UUID) -> list[Tag]:
+    """
+    タグの存在確認と所有者検証を行う（所有者はクエリの条件で絞り込む）
+
+    Args:
+        db: データベースセッション
+        tag_ids: タグIDのリスト
+        ledger_id: 台帳ID
+
+    Returns:
+        検証済みのタグ
+
+    Raises:
+        HTTPException: 見つからない、または他のユーザーのタグが含まれる場合
+    """
+    unique_ids = set(tag_ids)
+    if not unique_ids:
+        return []
+    tags = db.query(Tag).filter(Tag.tag_id.in_(unique_ids), Tag.user_id == ledger_id).all()
+    if len(tags) != len(unique_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="タグが見つかりません",
+        )
+    return tags
+
+
+def _tagged_transaction_ids(tag_ids: list[UUID], tag_match: str, link=TransactionTag) -> Select:
+    """
+    タグで絞り込んだ取引IDのサブクエリを生成
+
+    any は IN で1回、all はタグごとに関連テーブルを自己結合する。どちらも
+    (tag_id, transaction_id) インデックスのみで処理でき、all は取引ID順のマージ結合になる
+    （GROUP BY ... HAVING count(*) よりも集約のコストがかからない）。
+
+    Args:
+        tag_ids: タグIDのリスト
+        tag_match: any（いずれかのタグ）または all（すべてのタグ）
+        link: 関連テーブル（アーカイブ済みの取引は ArchivedTransactionTag）
+
+    Returns:
+        取引IDを返すサブクエリ
+    """
+    unique_ids = list(dict.fromkeys(tag_ids))
+    if tag_match == "any" or len(unique_ids) == 1:
+        return select(link.transaction_id).where(link.tag_id.in_(unique_ids))
+
+    first, *rest = unique_ids
+    tagged = select(link.transaction_id).where(link.tag_id == first)
+    for tag_id in rest:
+        other = aliased(link)
+        tagged = tagged.join(
+            other,
+            (other.transaction_id == link.transaction_id) & (other.tag_id == tag_id),
+        )
+    return tagged
+
+
+def _check_fx_rate(db: Session, currency: str) -> None:
+    """
+    集計時に換算できるよう、通貨の為替レートが登録されているか確認する
+
+    Args:
+        db: データベースセッション
+        currency: 通貨コード
+
+    Raises:
+        HTTPException: 為替レートが登録されていない場合
+    """
+    if not fx_rates.has_rates(db, currency):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"為替レートが登録されていない通貨です: {currency}",
+        )
+
+
+def _check_external_id(db: Session, external_id: str | None, user_id: UUID) -> None:
+    """
+    明細IDが登録済みでないか確認する
+
+    Args:
+        db: データベースセッション
+        external_id: 明細ID
+        user_id: ユーザーID
+
+    Raises:
+        HTTPException: 同じ明細IDの取引が既に登録されている場合
+    """
+    if external_id is None:
+        return
+    exists = db.execute(
+        select(Transaction.transaction_id)
+        .where(Transaction.user_id == user_id, Transaction.external_id == external_id)
+    ).first()
+    if exists or archived_external_ids(db, user_id, {external_id}):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="同じ明細IDの取引が既に登録されています",
+        )
+
+
+def _content_hash(item: TransactionImportItem, occurrence: int) -> str:
+    """
+    明細の内容から明細IDにするハッシュを計算
+
+    同じ内容の明細（同じ日の同じ店での同額の支払いなど）は、取り込むデータ内での出現順で区別する。
+
+    Args:
+        item: 取り込む取引
+        occurrence: 同じ内容の明細のうち何番目か（0始まり）
+
+    Returns:
+        "sha256:" で始まる明細ID
+    """
+    content = "\x1f".join([
+        item.date.isoformat(),
+        item.type.value,
+        item.currency,
+        str(item.amount),
+        normalize_memo(item.memo or ""),
+        str(occurrence),
+    ])
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _get_verified_transaction(
+    db: Session,
+    transaction_id: UUID,
+    user_id: UUID,
+    ledger_id: UUID,
+    action: str = "アクセス",
+    write: bool = False,
+) -> Transaction:
     """
-    取引の存在確認と所有者検証を行う
+    取引の存在確認と権限確認を行う（台帳と権限はクエリの条件で確認する）
+
+    アーカイブ済みの取引は、参照の場合はそのまま返し、書き込みの場合は transactions に戻してから返す。
 
     Args:
         db: データベースセッション
         transaction_id: 取引ID
         user_id: ユーザーID
+        ledger_id: 台帳ID
         action: エラーメッセージ用のアクション名（例: "更新", "削除"）
+        write: 書き込み権限を要求するか
 
     Returns:
         検証済みの取引
@@ -61,13 +238,37 @@ def _get_verified_transaction(db: Session, transaction_id: UUID, user_id: UUID,
     Raises:
         HTTPException: 取引が見つからない、または権限がない場合
     """
-    transaction = db.query(Transaction).filter(Transaction.transaction_id == transaction_id).first()
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="取引が見つかりません",
-        )
-    if transaction.user_id != user_id:
+    def find(model):
+        return db.scalars(
+            select(model).where(
+                model.transaction_id == transaction_id,
+                ledger_scope(model.user_id, user_id, ledger_id, write=write),
+            )
+        ).first()
+
+    transaction = find(Transaction)
+    if transaction is None:
+        archived = find(ArchivedTransaction)
+        if archived is not None:
+            if not write:
+                return archived
+            restore_transaction(db, transaction_id)
+            db.expunge(archived)
+            return find(Transaction)
+
+        # 見つからない場合のみ、存在しないのか権限がないのかを区別する
+        exists = db.execute(
+            select(Transaction.transaction_id).where(Transaction.transaction_id == transaction_id)
+            .union_all(
+                select(ArchivedTransaction.transaction_id)
+                .where(ArchivedTransaction.transaction_id == transaction_id)
+            )
+        ).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="取引が見つかりません",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"この取引を{action}する権限がありません",
@@ -75,6 +276,106 @@ def _get_verified_transaction(db: Session, transaction_id: UUID, user_id: UUID,
     return transaction
 
 
+def _running_balances(db: Session, user_id: UUID, transactions: list[Transaction]) -> dict[UUID, int]:
+    """
+    取引ごとの、その取引までの残高を計算
+
+    ページ内で最も古い取引の月初時点の残高（チェックポイント）に、月初からページ内で最も新しい
+    取引の日付までの取引を SUM() OVER (ORDER BY date, created_at) で累計して足す。
+    絞り込み条件に関係なく、残高はすべての取引（アーカイブの境界より前の月はアーカイブ済みの取引を含む）で計算する。
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        transactions: 残高を求める取引
+
+    Returns:
+        取引ID -> 残高（基準通貨）
+    """
+    first_month = min(t.date for t in transactions).replace(day=1)
+    last_date = max(t.date for t in transactions)
+    opening = balance_before(db, user_id, first_month)
+
+    models = [Transaction]
+    if reaches_archive(archived_before(db, user_id), first_month):
+        models.append(ArchivedTransaction)
+    selects = [
+        select(model.transaction_id, model.date, model.created_at, signed_base_amount(model).label("amount"))
+        .where(model.user_id == user_id, model.date >= first_month, model.date <= last_date)
+        for model in models
+    ]
+    ledger = (selects[0] if len(selects) == 1 else union_all(*selects)).subquery()
+
+    running = func.sum(ledger.c.amount).over(
+        order_by=(ledger.c.date, ledger.c.created_at, ledger.c.transaction_id)
+    )
+    window = select(ledger.c.transaction_id, running.label("balance")).subquery()
+    rows = db.execute(
+        select(window.c.transaction_id, window.c.balance)
+        .where(window.c.transaction_id.in_([t.transaction_id for t in transactions]))
+    )
+    return {transaction_id: opening + int(balance) for transaction_id, balance in rows}
+
+
+def _encode_sync_token(timestamp: datetime) -> str:
+    """同期トークンを生成（クライアントにとっては不透明な文字列）"""
+    return str((timestamp - _SYNC_EPOCH) // timedelta(microseconds=1))
+
+
+def _decode_sync_token(token: str) -> datetime:
+    """
+    同期トークンを時刻に変換
+
+    Raises:
+        HTTPException: トークンの形式が不正な場合
+    """
+    try:
+        microseconds = int(token)
+        # 発行するトークンは基準時刻以降のみ（遡って読み直す範囲の計算があふれないようにする）
+        if microseconds < 0:
+            raise ValueError(token)
+        return _SYNC_EPOCH + timedelta(microseconds=microseconds)
+    except (ValueError, OverflowError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="同期トークンが不正です",
+        )
+
+
+def _get_ledger_version(db: Session, user_id: UUID, ledger_id: UUID | None = None) -> tuple:
+    """
+    台帳の取引データのバージョンを取得（ETag生成用）
+
+    作成・更新は updated_at の最大値、削除は墓標の deleted_at の最大値に反映されるため、
+    件数と合わせて比較すればデータの変化を検出できる。1回のクエリで取得する。
+    参照権限のない台帳は取引がない台帳と同じバージョンになる。
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        ledger_id: 台帳ID（省略時は自分の台帳）
+
+    Returns:
+        (件数, 最終更新日時, 最終削除日時)
+    """
+    ledger_id = ledger_id or user_id
+    version = db.execute(
+        select(
+            select(func.count())
+            .select_from(Transaction)
+            .where(ledger_scope(Transaction.user_id, user_id, ledger_id))
+            .scalar_subquery(),
+            select(func.max(Transaction.updated_at))
+            .where(ledger_scope(Transaction.user_id, user_id, ledger_id))
+            .scalar_subquery(),
+            select(func.max(TransactionTombstone.deleted_at))
+            .where(ledger_scope(TransactionTombstone.user_id, user_id, ledger_id))
+            .scalar_subquery(),
+        )
+    ).one()
+    return tuple(version)
+
+
 def _safe_commit(db: Session, error_message: str = "データベースエラーが発生しました") -> None:
     """
     安全にコミットを実行し、エラー時はロールバック
@@ -99,14 +400,18 @@ def _safe_commit(db: Session, error_message: str = "データベースエラー
 @router.post("", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     transaction_data: TransactionCreate,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     取引を作成
 
+    共有された台帳には編集者（editor）のみ作成できる。
+
     Args:
         transaction_data: 取引作成情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -114,22 +419,36 @@ def create_transaction(
         作成された取引
 
     Raises:
-        HTTPException: カテゴリが見つからない、または権限がない場合
+        HTTPException: カテゴリ・タグが見つからない、権限がない、通貨の為替レートが登録されていない、
+            または同じ明細IDの取引が登録済みの場合
     """
-    # カテゴリの存在チェックと所有者確認
-    _get_verified_category(db, transaction_data.category_id, current_user.user_id)
+    # カテゴリの存在チェックと台帳への書き込み権限の確認
+    _get_verified_category(db, transaction_data.category_id, current_user.user_id, ledger_id)
+    tags = _get_verified_tags(db, transaction_data.tag_ids, ledger_id)
+    _check_fx_rate(db, transaction_data.currency)
+    _check_external_id(db, transaction_data.external_id, ledger_id)
 
     new_transaction = Transaction(
-        user_id=current_user.user_id,
+        user_id=ledger_id,
         category_id=transaction_data.category_id,
         amount=transaction_data.amount,
+        currency=transaction_data.currency,
         type=transaction_data.type,
         date=transaction_data.date,
         memo=transaction_data.memo,
+        external_id=transaction_data.external_id,
+        tags=tags,
     )
 
     db.add(new_transaction)
+    invalidate_balance_checkpoints(db, ledger_id, new_transaction.date)
+    spending = SpendingChanges(db)
+    spending.add_transaction(new_transaction)
+    spending.apply(ledger_id)
+    record_change(db, ledger_id, "transaction", "created", new_transaction.transaction_id)
     _safe_commit(db, "取引の作成に失敗しました")
+    invalidate_user_caches(ledger_id)
+    memo_suggester.observe(ledger_id, new_transaction.memo, new_transaction.category_id)
     db.refresh(new_transaction)
 
     return new_transaction
@@ -137,52 +456,417 @@ def create_transaction(
 
 @router.get("", response_model=list[TransactionResponse])
 def get_transactions(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="スキップする件数"),
     limit: int = Query(100, ge=1, le=1000, description="取得する件数"),
     start_date: date | None = Query(None, description="開始日（YYYY-MM-DD）"),
     end_date: date | None = Query(None, description="終了日（YYYY-MM-DD）"),
     category_id: UUID | None = Query(None, description="カテゴリID"),
+    tag_ids: list[UUID] | None = Query(None, max_length=20, description="タグID（複数指定可）"),
+    tag_match: Literal["any", "all"] = Query("any", description="any: いずれかのタグ / all: すべてのタグ"),
+    running_balance: bool = Query(False, description="各取引の時点の残高（balance）を含めるか"),
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     取引一覧を取得（フィルタリング・ページネーション対応）
 
+    参照権限のない台帳を指定した場合は空の一覧を返す。期間がアーカイブの境界より前にかかる場合
+    （開始日を省略した場合を含む）は、アーカイブ済みの取引（archived=true）も合わせて返す。
+
     Args:
         skip: スキップする件数
         limit: 取得する件数
         start_date: 開始日
         end_date: 終了日
         category_id: カテゴリID
+        tag_ids: タグIDのリスト
+        tag_match: タグの一致条件
+        running_balance: 各取引の時点の残高を含めるか
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Returns:
-        取引一覧
+        取引一覧（If-None-Match が一致する場合は 304 Not Modified）
+    """
+    # データに変化がなければ本文を返さない
+    etag = make_etag(
+        *_get_ledger_version(db, current_user.user_id, ledger_id),
+        sorted(request.query_params.multi_items()),
+    )
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    def filters(model, link) -> list:
+        # 台帳の参照権限はクエリの条件で確認する（共有された台帳はメンバーの行の EXISTS）
+        conditions = [ledger_scope(model.user_id, current_user.user_id, ledger_id)]
+        if start_date:
+            conditions.append(model.date >= start_date)
+        if end_date:
+            conditions.append(model.date <= end_date)
+        if category_id:
+            conditions.append(model.category_id == category_id)
+        if tag_ids:
+            conditions.append(model.transaction_id.in_(_tagged_transaction_ids(tag_ids, tag_match, link)))
+        return conditions
+
+    if not reaches_archive(archived_before(db, ledger_id), start_date):
+        # 残高の累計と同じ順序になるよう、同じ日時の取引は取引IDで並べる
+        transactions = (
+            db.query(Transaction)
+            .filter(*filters(Transaction, TransactionTag))
+            .order_by(Transaction.date.desc(), Transaction.created_at.desc(), Transaction.transaction_id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+    else:
+        # 両方のテーブルの並べ替えの列だけを UNION ALL してページを決め、ページ内の取引だけを読み込む
+        keys = union_all(
+            *(
+                select(
+                    literal(model is ArchivedTransaction).label("archived"),
+                    model.transaction_id,
+                    model.date,
+                    model.created_at,
+                ).where(*filters(model, link))
+                for model, link in ((Transaction, TransactionTag), (ArchivedTransaction, ArchivedTransactionTag))
+            )
+        ).subquery()
+        page = db.execute(
+            select(keys.c.archived, keys.c.transaction_id)
+            .order_by(keys.c.date.desc(), keys.c.created_at.desc(), keys.c.transaction_id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        loaded = {}
+        for model in (Transaction, ArchivedTransaction):
+            ids = [transaction_id for archived, transaction_id in page if archived == (model is ArchivedTransaction)]
+            if ids:
+                rows = db.scalars(select(model).where(model.transaction_id.in_(ids)))
+                loaded.update((t.transaction_id, t) for t in rows)
+        transactions = [loaded[transaction_id] for _, transaction_id in page]
+
+    if running_balance and transactions:
+        balances = _running_balances(db, ledger_id, transactions)
+        return [
+            TransactionResponse.model_validate(t).model_copy(update={"balance": balances[t.transaction_id]})
+            for t in transactions
+        ]
+
+    return transactions
+
+
+@router.get("/suggest", response_model=list[CategorySuggestion])
+def suggest_category(
+    memo: str = Query(..., min_length=1, max_length=200, description="入力中のメモ"),
+    limit: int = Query(3, ge=1, le=10, description="取得する件数"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.user_id)
+    メモからカテゴリを推定
+
+    過去の取引のメモとカテゴリから作ったプロセス内の索引を引く（索引がない場合のみ履歴を読み込む）。
+    同じメモ（全角・半角、大文字・小文字の違いは無視）があればそのカテゴリを、なければ
+    文字の3-gram が似ているメモのカテゴリを返す。
+
+    Args:
+        memo: 入力中のメモ
+        limit: 取得する件数
+        current_user: 認証済みユーザー
+        db: データベースセッション
 
-    # フィルタリング
+    Returns:
+        スコアの高い順のカテゴリ候補（該当がなければ空）
+    """
+    return memo_suggester.suggest(db, current_user.user_id, memo, limit)
+
+
+@router.post("/import", response_model=TransactionImportResponse, status_code=status.HTTP_201_CREATED)
+def import_transactions(
+    import_data: TransactionImport,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    取引を一括登録
+
+    カテゴリを省略した取引は、メモから推定したカテゴリのうち収支の種類が一致し、
+    スコアが min_score 以上のものを使う。推定できなければ default_category_id を使う。
+    INSERT ... ON CONFLICT DO NOTHING でまとめて登録し、明細IDが登録済みの取引は
+    重複として登録しない（content_hash を指定すると明細IDのない取引にも内容のハッシュを付ける）。
+
+    Args:
+        import_data: 登録する取引と推定の条件
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        登録件数、カテゴリを推定・既定値で補った件数、重複として登録しなかった件数
+
+    Raises:
+        HTTPException: カテゴリが見つからない、通貨の為替レートが登録されていない、
+            またはカテゴリを決められない取引がある場合
+    """
+    user_id = current_user.user_id
+    items = import_data.transactions
+
+    # ユーザーのカテゴリの種類（指定されたカテゴリの所有確認と、推定結果の種類の確認に使う）
+    category_types = dict(
+        db.execute(select(Category.category_id, Category.type).where(Category.user_id == user_id)).all()
+    )
+    requested = {item.category_id for item in items if item.category_id is not None}
+    if import_data.default_category_id is not None:
+        requested.add(import_data.default_category_id)
+    if not requested <= category_types.keys():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="カテゴリが見つかりません",
+        )
+    for currency in {item.currency for item in items}:
+        _check_fx_rate(db, currency)
+
+    rows = []
+    suggested = defaulted = 0
+    unresolved = []
+    occurrences: Counter[tuple] = Counter()
+    now = datetime.utcnow()
+    for number, item in enumerate(items, start=1):
+        category_id = item.category_id
+        if category_id is None and item.memo:
+            for suggestion in memo_suggester.suggest(db, user_id, item.memo, _IMPORT_SUGGESTIONS):
+                if suggestion.score < import_data.min_score:
+                    break
+                if category_types.get(suggestion.category_id) == item.type:
+                    category_id = suggestion.category_id
+                    suggested += 1
+                    break
+        if category_id is None:
+            category_id = import_data.default_category_id
+            if category_id is None:
+                unresolved.append(number)
+                continue
+            defaulted += 1
+
+        external_id = item.external_id
+        if external_id is None and import_data.content_hash:
+            content = (item.date, item.type, item.currency, item.amount, normalize_memo(item.memo or ""))
+            external_id = _content_hash(item, occurrences[content])
+            occurrences[content] += 1
+
+        rows.append({
+            "transaction_id": uuid.uuid4(),
+            "user_id": user_id,
+            "category_id": category_id,
+            "amount": item.amount,
+            "currency": item.currency,
+            "type": item.type,
+            "date": item.date,
+            "memo": item.memo,
+            "external_id": external_id,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    if unresolved:
+        numbers = "、".join(str(n) for n in unresolved[:10]) + ("など" if len(unresolved) > 10 else "")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"カテゴリを推定できない取引が{len(unresolved)}件あります（{numbers}件目）。"
+                   "category_id または default_category_id を指定してください",
+        )
+
+    # 明細IDが登録済み（同じデータ内での重複を含む）の取引は一意インデックスの衝突として読み飛ばす。
+    # アーカイブ済みの取引の明細IDは一意インデックスの対象外のため、先に取り除く。
+    # パラメータのリストで実行すると、コンパイル済みの文で複数行の VALUES にまとめて送られる
+    archived_ids = archived_external_ids(db, user_id, {row["external_id"] for row in rows if row["external_id"]})
+    new_rows = [row for row in rows if row["external_id"] not in archived_ids]
+    stmt = upsert_insert(db, Transaction).on_conflict_do_nothing(
+        index_elements=[Transaction.user_id, Transaction.external_id],
+        index_where=Transaction.external_id.is_not(None),
+    ).returning(Transaction.transaction_id)
+    created_ids = set(db.scalars(stmt, new_rows)) if new_rows else set()
+    if created_ids:
+        invalidate_balance_checkpoints(db, user_id, min(row["date"] for row in rows))
+        spending = SpendingChanges(db)
+        for row in rows:
+            if row["transaction_id"] in created_ids:
+                spending.add(row["category_id"], row["type"], row["amount"], row["currency"], row["date"])
+        spending.apply(user_id)
+        record_change(db, user_id, "transaction", "created")
+    _safe_commit(db, "取引の一括登録に失敗しました")
+    invalidate_user_caches(user_id)
+    for row in rows:
+        if row["transaction_id"] in created_ids:
+            memo_suggester.observe(user_id, row["memo"], row["category_id"])
+
+    return TransactionImportResponse(
+        created=len(created_ids),
+        suggested=suggested,
+        defaulted=defaulted,
+        duplicates=len(rows) - len(created_ids),
+    )
+
+
+@router.get("/duplicates", response_model=list[DuplicateGroup])
+def find_duplicate_transactions(
+    start_date: date | None = Query(None, description="開始日（YYYY-MM-DD）"),
+    end_date: date | None = Query(None, description="終了日（YYYY-MM-DD）"),
+    window_days: int = Query(3, ge=0, le=31, description="重複とみなす日付の差の上限（日）"),
+    limit: int = Query(100, ge=1, le=1000, description="取得するまとまりの件数"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    重複の可能性がある取引を検出
+
+    金額・通貨・収支・メモ（正規化後）が同じで、日付の差が window_days 以内に連なる取引を
+    1つのまとまりとして返す。SQL のウィンドウ関数で同じ金額の前後の取引が期間内にあるものに絞り込んだうえで、
+    (通貨, 収支, 金額, メモ, 日付) の順に並べ替えて隣り合う取引だけを比較する（総当たりで比較しない）。
+
+    Args:
+        start_date: 開始日
+        end_date: 終了日
+        window_days: 重複とみなす日付の差の上限
+        limit: 取得するまとまりの件数
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        重複の可能性がある取引のまとまり（新しい順）
+    """
+    # 金額・通貨・収支ごとに日付順で前後の取引の日付を取り、どちらかが期間内の取引だけを候補として読み込む
+    # （同じメモどうしで期間内に連なる取引は、金額ごとの並びでも必ず期間内に隣の取引がある）。
+    # 並べ替えるのは幅の小さい列だけにし、メモなどは候補についてのみ取引IDで引く
+    # 整数の金額を先頭にして並べ替えの比較を安くする
+    partition = (Transaction.amount, Transaction.type, Transaction.currency)
+    neighbors = select(
+        Transaction.transaction_id,
+        Transaction.date,
+        func.lag(Transaction.date).over(partition_by=partition, order_by=Transaction.date).label("previous_date"),
+        func.lead(Transaction.date).over(partition_by=partition, order_by=Transaction.date).label("next_date"),
+    ).where(Transaction.user_id == current_user.user_id)
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        neighbors = neighbors.where(Transaction.date >= start_date)
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-
-    transactions = (
-        query.order_by(Transaction.date.desc(), Transaction.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+        neighbors = neighbors.where(Transaction.date <= end_date)
+    neighbors = neighbors.subquery()
+    candidates = db.execute(
+        select(
+            Transaction.currency,
+            Transaction.type,
+            Transaction.amount,
+            Transaction.memo,
+            Transaction.date,
+            Transaction.transaction_id,
+            Transaction.external_id,
+            Transaction.created_at,
+        )
+        .join(neighbors, neighbors.c.transaction_id == Transaction.transaction_id)
+        .where(
+            (days_between(neighbors.c.date, neighbors.c.previous_date) <= window_days)
+            | (days_between(neighbors.c.next_date, neighbors.c.date) <= window_days)
+        )
+    ).all()
+
+    # (通貨, 収支, 金額, 正規化したメモ, 日付) の順に並べる
+    keyed = sorted(
+        (currency, type_.value, amount, normalize_memo(memo or ""), on, index)
+        for index, (currency, type_, amount, memo, on, *_) in enumerate(candidates)
     )
 
-    return transactions
+    groups: list[list] = []
+    current: list = []
+    window = timedelta(days=window_days)
+    for *key, on, index in keyed:
+        if current and key == current_key and on - previous_on <= window:
+            current.append(candidates[index])
+        else:
+            if len(current) > 1:
+                groups.append(current)
+            current, current_key = [candidates[index]], key
+        previous_on = on
+    if len(current) > 1:
+        groups.append(current)
+
+    groups.sort(key=lambda group: group[-1].date, reverse=True)
+    return [
+        DuplicateGroup(amount=group[0].amount, currency=group[0].currency, type=group[0].type, transactions=group)
+        for group in groups[:limit]
+    ]
+
+
+@router.get("/changes", response_model=TransactionChangesResponse)
+def get_transaction_changes(
+    since: str | None = Query(None, description="前回の同期トークン（省略時は全件）"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    前回の同期以降に作成・更新・削除された取引を取得（差分同期）
+
+    updated_at・deleted_at はコミット時ではなく書き込み時の時刻のため、前回のトークンより前に
+    書き込まれ、後からコミットされた変更を取りこぼさないよう、トークンより SYNC_RESCAN_SECONDS
+    前から読み直す。この範囲の変更は前回と重複して返るため、クライアントは取引IDで上書きする。
+
+    Args:
+        since: 前回のレスポンスで受け取った同期トークン
+        current_user: 認証済みユーザー
+        db: データベースセッション
+
+    Returns:
+        変更された取引、削除された取引ID、次回用の同期トークン
+
+    Raises:
+        HTTPException: 同期トークンが不正な場合
+    """
+    since_at = _decode_sync_token(since) if since else None
+
+    changed_query = db.query(Transaction).filter(Transaction.user_id == current_user.user_id)
+    deleted_query = db.query(
+        TransactionTombstone.transaction_id,
+        TransactionTombstone.deleted_at,
+    ).filter(TransactionTombstone.user_id == current_user.user_id)
+
+    if since_at is not None:
+        rescan_from = since_at - timedelta(seconds=get_settings().SYNC_RESCAN_SECONDS)
+        changed_query = changed_query.filter(Transaction.updated_at > rescan_from)
+        deleted_query = deleted_query.filter(TransactionTombstone.deleted_at > rescan_from)
+
+    changed = changed_query.order_by(Transaction.updated_at).all()
+    # 初回同期では削除済みの取引をクライアントが持っていないため墓標は不要
+    deleted = deleted_query.all() if since_at is not None else []
+
+    # 今回返した変更のうち最も新しい時刻を次回のトークンにする
+    timestamps = [t.updated_at for t in changed] + [d.deleted_at for d in deleted]
+    if since_at is not None:
+        timestamps.append(since_at)
+    else:
+        last_deleted = (
+            db.query(func.max(TransactionTombstone.deleted_at))
+            .filter(TransactionTombstone.user_id == current_user.user_id)
+            .scalar()
+        )
+        if last_deleted is not None:
+            timestamps.append(last_deleted)
+    next_token = _encode_sync_token(max(timestamps, default=_SYNC_EPOCH))
+
+    return {
+        "changed": changed,
+        "deleted": [d.transaction_id for d in deleted],
+        "sync_token": next_token,
+    }
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -191,6 +875,7 @@ def get_transaction(
 
     Args:
         transaction_id: 取引ID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -200,7 +885,7 @@ def get_transaction(
     Raises:
         HTTPException: 取引が見つからない、または権限がない場合
     """
-    transaction = _get_verified_transaction(db, transaction_id, current_user.user_id)
+    transaction = _get_verified_transaction(db, transaction_id, current_user.user_id, ledger_id)
     return transaction
 
 
@@ -208,6 +893,7 @@ def get_transaction(
 def update_transaction(
     transaction_id: UUID,
     transaction_data: TransactionUpdate,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -217,6 +903,7 @@ def update_transaction(
     Args:
         transaction_id: 取引ID
         transaction_data: 取引更新情報
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
@@ -224,21 +911,42 @@ def update_transaction(
         更新された取引
 
     Raises:
-        HTTPException: 取引が見つからない、または権限がない場合
+        HTTPException: 取引・カテゴリ・タグが見つからない、権限がない、または通貨の為替レートが登録されていない場合
     """
-    transaction = _get_verified_transaction(db, transaction_id, current_user.user_id, action="更新")
+    transaction = _get_verified_transaction(
+        db, transaction_id, current_user.user_id, ledger_id, action="更新", write=True,
+    )
+    previous = (transaction.memo, transaction.category_id)
+    previous_date = transaction.date
+    spending = SpendingChanges(db)
+    spending.add_transaction(transaction, sign=-1)
 
     # カテゴリIDが更新される場合は、カテゴリの存在チェック
     if transaction_data.category_id:
-        _get_verified_category(db, transaction_data.category_id, current_user.user_id)
+        _get_verified_category(db, transaction_data.category_id, current_user.user_id, ledger_id)
+    if transaction_data.currency:
+        _check_fx_rate(db, transaction_data.currency)
 
     # 更新処理
     update_data = transaction_data.model_dump(exclude_unset=True)
+    tag_ids = update_data.pop("tag_ids", None)
+    if tag_ids is not None:
+        transaction.tags = _get_verified_tags(db, tag_ids, ledger_id)
+        # 関連テーブルのみの変更では updated_at が更新されないため、差分同期用に明示的に進める
+        transaction.updated_at = datetime.utcnow()
     for field, value in update_data.items():
         setattr(transaction, field, value)
+    invalidate_balance_checkpoints(db, ledger_id, min(previous_date, transaction.date))
+    spending.add_transaction(transaction)
+    spending.apply(ledger_id)
+    record_change(db, ledger_id, "transaction", "updated", transaction.transaction_id)
 
     _safe_commit(db, "取引の更新に失敗しました")
+    invalidate_user_caches(ledger_id)
     db.refresh(transaction)
+    if (transaction.memo, transaction.category_id) != previous:
+        memo_suggester.observe(ledger_id, *previous, count=-1)
+        memo_suggester.observe(ledger_id, transaction.memo, transaction.category_id)
 
     return transaction
 
@@ -246,6 +954,7 @@ def update_transaction(
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_transaction(
     transaction_id: UUID,
+    ledger_id: UUID = Depends(get_ledger_id),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -254,13 +963,26 @@ def delete_transaction(
 
     Args:
         transaction_id: 取引ID
+        ledger_id: 台帳ID（省略時は自分の台帳）
         current_user: 認証済みユーザー
         db: データベースセッション
 
     Raises:
         HTTPException: 取引が見つからない、または権限がない場合
     """
-    transaction = _get_verified_transaction(db, transaction_id, current_user.user_id, action="削除")
+    transaction = _get_verified_transaction(
+        db, transaction_id, current_user.user_id, ledger_id, action="削除", write=True,
+    )
 
+    # 差分同期のために墓標を残す
+    db.add(TransactionTombstone(transaction_id=transaction.transaction_id, user_id=transaction.user_id))
+    previous = (transaction.memo, transaction.category_id)
     db.delete(transaction)
+    invalidate_balance_checkpoints(db, ledger_id, transaction.date)
+    spending = SpendingChanges(db)
+    spending.add_transaction(transaction, sign=-1)
+    spending.apply(ledger_id)
+    record_change(db, ledger_id, "transaction", "deleted", transaction.transaction_id)
     _safe_commit(db, "取引の削除に失敗しました")
+    invalidate_user_caches(ledger_id)
+    memo_suggester.observe(ledger_id, *previous, count=-1)
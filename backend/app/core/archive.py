@@ -0,0 +1,286 @@
+"""取引のアーカイブ
+
+保存期間（TRANSACTION_ARCHIVE_AFTER_MONTHS）を過ぎた月の取引を transactions から transaction_archive に
+移し、移した月の月・カテゴリ・収支ごとの合計（transaction_rollups）を作り直す。取引の内容は変わらないため、
+墓標や変更イベントは残さず、残高のチェックポイント・予算アラート用の支出の合計も作り直さない。
+
+参照する側は、期間がアーカイブの境界（transaction_archive_watermarks.archived_before）より前に
+かかる場合だけ transaction_archive も合わせて読む（境界のないユーザーは transactions のみを読む）。
+レポートは境界より前の月全体を含む集計単位に transaction_rollups を使う。
+
+アーカイブ済みの取引を更新・削除する場合は `restore_transaction()` で transactions に戻してから
+通常どおり書き込む（次回のアーカイブで再び移される）。
+"""
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.currency import to_base_sql
+from app.core.dates import month_range, next_period
+from app.core.sql import trunc_date, upsert_insert
+from app.models.archive import ArchivedTransaction, ArchivedTransactionTag, ArchiveWatermark, TransactionRollup
+from app.models.tag import TransactionTag
+from app.models.transaction import Transaction
+
+# transactions と transaction_archive で共通の列
+_COLUMNS = [
+    "transaction_id",
+    "user_id",
+    "category_id",
+    "amount",
+    "currency",
+    "type",
+    "date",
+    "memo",
+    "external_id",
+    "created_at",
+    "updated_at",
+]
+# 1回の文で移す取引の件数（IN に渡すパラメータ数の上限）
+_BATCH_SIZE = 500
+# 集計値を使える集計単位（月の倍数）
+_MONTHLY_GRANULARITIES = ("month", "quarter", "year")
+
+
+def archive_horizon(today: date | None = None, months: int | None = None) -> date | None:
+    """
+    アーカイブの境界（この日付より前の取引をアーカイブする）を取得
+
+    Args:
+        today: 基準日（省略時は今日）
+        months: 当月を含めて transactions に残す月数（省略時は TRANSACTION_ARCHIVE_AFTER_MONTHS）
+
+    Returns:
+        残す最初の月の初日（アーカイブしない設定の場合は None）
+    """
+    months = get_settings().TRANSACTION_ARCHIVE_AFTER_MONTHS if months is None else months
+    if months <= 0:
+        return None
+    today = today or date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+    return date(year, month + 1, 1)
+
+
+def archived_before(db: Session, user_id: UUID) -> date | None:
+    """
+    ユーザーのアーカイブの境界を取得
+
+    Returns:
+        この日付より前の取引はアーカイブされている可能性がある（アーカイブしたことがなければ None）
+    """
+    return db.execute(
+        select(ArchiveWatermark.archived_before).where(ArchiveWatermark.user_id == user_id)
+    ).scalar()
+
+
+def reaches_archive(boundary: date | None, start_date: date | None) -> bool:
+    """期間（開始日。省略時は最初から）がアーカイブの境界より前にかかるか"""
+    return boundary is not None and (start_date is None or start_date < boundary)
+
+
+def refresh_rollups(db: Session, user_id: UUID | None = None, month: date | None = None) -> None:
+    """
+    アーカイブ済みの取引から月・カテゴリ・収支ごとの合計を作り直す（コミットは呼び出し側で行う）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID（省略時は全ユーザー。為替レートの更新時など）
+        month: 対象の月（省略時はすべての月）
+    """
+    period = trunc_date("month", ArchivedTransaction.date)
+    stmt = delete(TransactionRollup)
+    source = select(
+        ArchivedTransaction.user_id,
+        period,
+        ArchivedTransaction.category_id,
+        ArchivedTransaction.type,
+        func.sum(to_base_sql(ArchivedTransaction.amount, ArchivedTransaction.currency, ArchivedTransaction.date)),
+        func.count(),
+    ).group_by(ArchivedTransaction.user_id, period, ArchivedTransaction.category_id, ArchivedTransaction.type)
+    if user_id is not None:
+        stmt = stmt.where(TransactionRollup.user_id == user_id)
+        source = source.where(ArchivedTransaction.user_id == user_id)
+    if month is not None:
+        start_date, end_date = month_range(month)
+        stmt = stmt.where(TransactionRollup.month == start_date)
+        source = source.where(ArchivedTransaction.date >= start_date, ArchivedTransaction.date <= end_date)
+    db.execute(stmt)
+    db.execute(
+        insert(TransactionRollup).from_select(
+            ["user_id", "month", "category_id", "type", "amount", "count"], source,
+        )
+    )
+
+
+def archive_transactions(db: Session, user_id: UUID, before: date) -> int:
+    """
+    指定日より前の取引を transaction_archive に移す（コミットは呼び出し側で行う）
+
+    対象の取引IDを先に行ロック（FOR UPDATE）付きで確定し、取引とタグの関連のコピー・削除はすべて
+    そのIDで行う。途中で別のトランザクションがコミットした取引（過去の日付での登録や取り込みなど）は
+    コピーもせず削除もしないため、次回のアーカイブまで transactions に残る。
+    移した取引のタグの関連は ON DELETE CASCADE で削除される。
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        before: この日付より前の取引を移す（月の初日）
+
+    Returns:
+        移した取引の件数
+    """
+    transaction_ids = db.scalars(
+        select(Transaction.transaction_id)
+        .where(Transaction.user_id == user_id, Transaction.date < before)
+        .order_by(Transaction.transaction_id)
+        .with_for_update()
+    ).all()
+    if not transaction_ids:
+        return 0
+
+    archived_at = datetime.utcnow()
+    for offset in range(0, len(transaction_ids), _BATCH_SIZE):
+        batch = transaction_ids[offset:offset + _BATCH_SIZE]
+        db.execute(
+            insert(ArchivedTransaction).from_select(
+                [*_COLUMNS, "archived_at"],
+                select(*(getattr(Transaction, column) for column in _COLUMNS), literal(archived_at))
+                .where(Transaction.transaction_id.in_(batch)),
+            )
+        )
+        db.execute(
+            insert(ArchivedTransactionTag).from_select(
+                ["transaction_id", "tag_id"],
+                select(TransactionTag.transaction_id, TransactionTag.tag_id)
+                .where(TransactionTag.transaction_id.in_(batch)),
+            )
+        )
+        db.execute(
+            delete(Transaction)
+            .where(Transaction.transaction_id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+
+    refresh_rollups(db, user_id)
+
+    # 境界は後ろにだけ進める（保存期間を延ばしても、移した取引は境界より前に残っている）
+    boundary = archived_before(db, user_id)
+    if boundary is None or before > boundary:
+        db.execute(
+            upsert_insert(db, ArchiveWatermark)
+            .values(user_id=user_id, archived_before=before, updated_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[ArchiveWatermark.user_id],
+                set_={"archived_before": before, "updated_at": datetime.utcnow()},
+            )
+        )
+    return len(transaction_ids)
+
+
+def restore_transaction(db: Session, transaction_id: UUID) -> bool:
+    """
+    アーカイブ済みの取引を transactions に戻す（更新・削除の前に呼ぶ。コミットは呼び出し側で行う）
+
+    Args:
+        db: データベースセッション
+        transaction_id: 取引ID
+
+    Returns:
+        戻した場合は True（アーカイブ済みでなければ False）
+    """
+    archived = db.execute(
+        select(ArchivedTransaction.user_id, ArchivedTransaction.date)
+        .where(ArchivedTransaction.transaction_id == transaction_id)
+    ).first()
+    if archived is None:
+        return False
+
+    db.execute(
+        insert(Transaction).from_select(
+            _COLUMNS,
+            select(*(getattr(ArchivedTransaction, column) for column in _COLUMNS))
+            .where(ArchivedTransaction.transaction_id == transaction_id),
+        )
+    )
+    db.execute(
+        insert(TransactionTag).from_select(
+            ["transaction_id", "tag_id"],
+            select(ArchivedTransactionTag.transaction_id, ArchivedTransactionTag.tag_id)
+            .where(ArchivedTransactionTag.transaction_id == transaction_id),
+        )
+    )
+    db.execute(
+        delete(ArchivedTransaction)
+        .where(ArchivedTransaction.transaction_id == transaction_id)
+        .execution_options(synchronize_session=False)
+    )
+    refresh_rollups(db, archived.user_id, archived.date)
+    return True
+
+
+def archived_external_ids(db: Session, user_id: UUID, external_ids: set[str]) -> set[str]:
+    """
+    指定した明細IDのうち、アーカイブ済みの取引にあるものを取得（取り込み時の重複確認用）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        external_ids: 明細ID
+
+    Returns:
+        アーカイブ済みの取引にある明細ID
+    """
+    if not external_ids or archived_before(db, user_id) is None:
+        return set()
+    return set(db.scalars(
+        select(ArchivedTransaction.external_id).where(
+            ArchivedTransaction.user_id == user_id,
+            ArchivedTransaction.external_id.in_(external_ids),
+        )
+    ))
+
+
+def split_archived_range(
+    start_date: date,
+    end_date: date,
+    boundary: date | None,
+    granularity: str | None,
+) -> tuple[tuple[date, date] | None, list[tuple[date, date]]]:
+    """
+    集計期間のうちアーカイブの境界より前の部分を、集計値を使う月と取引から集計する期間に分ける
+
+    集計単位が月の倍数の場合、期間に月全体が含まれる月は transaction_rollups を使い、
+    期間の端で月の途中から・途中までの部分は transaction_archive から集計する。
+
+    Args:
+        start_date: 集計期間の開始日
+        end_date: 集計期間の終了日
+        boundary: アーカイブの境界
+        granularity: 集計単位（day / week / month / quarter / year、タグ別の集計は None を渡す）
+
+    Returns:
+        (集計値を使う (最初の月, 最後の月)、なければ None, transaction_archive から集計する期間のリスト)
+    """
+    if not reaches_archive(boundary, start_date):
+        return None, []
+    last_date = min(end_date, boundary - timedelta(days=1))
+    if granularity not in _MONTHLY_GRANULARITIES:
+        return None, [(start_date, last_date)]
+
+    first_month = start_date if start_date.day == 1 else next_period(start_date.replace(day=1), "month")
+    last_month, month_end = month_range(last_date)
+    if last_date != month_end:
+        last_month = month_range(last_month - timedelta(days=1))[0]
+    if first_month > last_month:
+        return None, [(start_date, last_date)]
+
+    ranges = []
+    if start_date < first_month:
+        ranges.append((start_date, first_month - timedelta(days=1)))
+    full_end = month_range(last_month)[1]
+    if full_end < last_date:
+        ranges.append((full_end + timedelta(days=1), last_date))
+    return (first_month, last_month), ranges
@@ -0,0 +1,176 @@
+"""残高（収入 − 支出の累計）の計算
+
+残高は基準通貨（JPY）で計算し、外貨の取引は取引日の為替レートで SQL 内で換算する。
+月初時点の残高を balance_checkpoints に保存しておき、任意の日付の残高はその月の
+チェックポイントと月初からの取引だけで求める（それより前の期間の取引を読まない）。
+アーカイブ済みの取引（transaction_archive）も合わせて集計するため、アーカイブの前後で値は変わらない。
+
+チェックポイントは参照時に作成し、取引を書き込むトランザクション内で書き込んだ日付より
+後の月の分を削除する。参照のリクエストのセッション（レプリカの場合がある）には書き込まず、
+作成はプライマリの別のセッションで行ってコミットする。書き込み中の取引を含まない値を保存しないよう、
+PostgreSQL ではユーザー単位のアドバイザリロック（書き込みは共有、作成は排他で取れたときのみ）を
+作成と同じ接続で取り、SQLite では作成を1つの INSERT ... SELECT にして書き込みロックの中で計算することで防ぐ。
+削除のコミットは呼び出し側で行う。
+"""
+import logging
+import zlib
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import Date, Uuid, case, delete, func, literal, select, true
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.currency import to_base_sql
+from app.core.database import SessionLocal
+from app.core.sql import upsert_insert
+from app.models.archive import ArchivedTransaction
+from app.models.balance import BalanceCheckpoint
+from app.models.category import TransactionType
+from app.models.transaction import Transaction
+
+# アドバイザリロックのキーの上位32ビット（他の用途のロックと区別する）
+_LOCK_CLASS = zlib.crc32(b"balance_checkpoints") & 0x7FFFFFFF
+
+logger = logging.getLogger("app.balance")
+
+
+def signed_base_amount(model=Transaction):
+    """取引の残高への増減（収入は正、支出は負、基準通貨）の SQL 式（model は Transaction か ArchivedTransaction）"""
+    amount = to_base_sql(model.amount, model.currency, model.date)
+    return case((model.type == TransactionType.INCOME, amount), else_=-amount)
+
+
+def _sum_between(user_id: UUID, start, end: date):
+    """start 以上 end 未満の取引（アーカイブ済みを含む）の増減の合計を返す式"""
+    sums = [
+        select(func.coalesce(func.sum(signed_base_amount(model)), 0))
+        .where(model.user_id == user_id, model.date >= start, model.date < end)
+        .scalar_subquery()
+        for model in (Transaction, ArchivedTransaction)
+    ]
+    return sums[0] + sums[1]
+
+
+def _lock_key(user_id: UUID) -> int:
+    """ユーザー単位のアドバイザリロックのキー（下位32ビット）"""
+    return zlib.crc32(user_id.bytes) & 0x7FFFFFFF
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _checkpoint_balance(user_id: UUID, month: date):
+    """直前のチェックポイント（なければ最初の取引から）に、その月までの取引を足した残高の式"""
+    previous = (
+        select(BalanceCheckpoint.month, BalanceCheckpoint.opening_balance)
+        .where(BalanceCheckpoint.user_id == user_id, BalanceCheckpoint.month < month)
+        .order_by(BalanceCheckpoint.month.desc())
+        .limit(1)
+        .subquery()
+    )
+    since = func.coalesce(select(previous.c.month).scalar_subquery(), date.min)
+    return (
+        func.coalesce(select(previous.c.opening_balance).scalar_subquery(), 0)
+        + _sum_between(user_id, since, month)
+    )
+
+
+def _save_checkpoint(user_id: UUID, month: date) -> None:
+    """
+    チェックポイントをプライマリの別のセッションで作成してコミット
+
+    ロックと INSERT ... SELECT を同じプライマリの接続で実行し、保存する値はロックを取った後に計算する。
+    書き込み中のトランザクションがあれば保存しない。保存に失敗しても参照には影響させない。
+    """
+    db = SessionLocal()
+    try:
+        if _is_postgresql(db):
+            locked = db.execute(select(func.pg_try_advisory_xact_lock(_LOCK_CLASS, _lock_key(user_id)))).scalar_one()
+            if not locked:
+                return
+        db.execute(
+            upsert_insert(db, BalanceCheckpoint)
+            .from_select(
+                ["user_id", "month", "opening_balance", "created_at"],
+                select(
+                    literal(user_id, Uuid),
+                    literal(month, Date),
+                    _checkpoint_balance(user_id, month),
+                    literal(datetime.utcnow()),
+                ).where(true()),
+            )
+            .on_conflict_do_nothing(index_elements=[BalanceCheckpoint.user_id, BalanceCheckpoint.month])
+        )
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("残高のチェックポイントの保存に失敗しました")
+    finally:
+        db.close()
+
+
+def opening_balance(db: Session, user_id: UUID, month: date) -> int:
+    """
+    月初時点の残高を取得（チェックポイントがなければ直前のチェックポイントから計算し、別のセッションで保存）
+
+    db には書き込まないため、参照のリクエストのセッションで呼び出せる。
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        month: 月の初日
+
+    Returns:
+        その月より前の取引の 収入 − 支出 の累計
+    """
+    stored = db.execute(
+        select(BalanceCheckpoint.opening_balance)
+        .where(BalanceCheckpoint.user_id == user_id, BalanceCheckpoint.month == month)
+    ).scalar()
+    if stored is not None:
+        return stored
+
+    balance = int(db.execute(select(_checkpoint_balance(user_id, month))).scalar_one())
+    _save_checkpoint(user_id, month)
+    return balance
+
+
+def balance_before(db: Session, user_id: UUID, day: date) -> int:
+    """
+    指定日の前日終了時点の残高を取得
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        day: 対象日
+
+    Returns:
+        指定日より前の取引の 収入 − 支出 の累計
+    """
+    month = day.replace(day=1)
+    balance = opening_balance(db, user_id, month)
+    if day > month:
+        balance += int(db.execute(select(_sum_between(user_id, month, day))).scalar_one())
+    return balance
+
+
+def invalidate_balance_checkpoints(db: Session, user_id: UUID | None = None, since: date | None = None) -> None:
+    """
+    取引の変更で値が変わるチェックポイントを削除（取引を書き込むトランザクション内で呼ぶ）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID（省略時は全ユーザー。為替レートの更新時など）
+        since: 変更した取引の最も古い日付（省略時はすべての月）
+    """
+    stmt = delete(BalanceCheckpoint)
+    if user_id is not None:
+        if _is_postgresql(db):
+            # コミットまで、このユーザーのチェックポイントを作成させない
+            db.execute(select(func.pg_advisory_xact_lock_shared(_LOCK_CLASS, _lock_key(user_id))))
+        stmt = stmt.where(BalanceCheckpoint.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(BalanceCheckpoint.month > since)
+    db.execute(stmt)
@@ -0,0 +1,155 @@
+"""変更イベントの接続へのファンアウト
+
+リレー（app.core.outbox）からのイベントを、ワーカー内で開いている SSE 接続にユーザー単位で配る。
+リレーの購読はワーカーで1つだけ登録し、イベントのまとまりごとに1回だけイベントループへ渡して
+ユーザーIDで振り分けるため、配信の手間はイベントの宛先の接続数にしか比例しない。
+接続維持のコメントも共有のタイマー1つで全接続に送るため、待機中の接続はタイマーを持たない。
+
+接続ごとの未送信イベントは EVENTS_BUFFER_SIZE 件までで、送信が追いつかない接続（ネットワークが遅い
+クライアントなど）はそれ以上ためずに再同期（resync）させる。遅い接続が他の接続やリレーを待たせない。
+"""
+import asyncio
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.core.outbox import ChangeEvent, OutboxRelay, outbox_relay
+
+
+class BroadcastLimitError(Exception):
+    """接続数の上限を超えた場合の例外"""
+
+    def __init__(self, per_user: bool) -> None:
+        super().__init__("per_user" if per_user else "total")
+        self.per_user = per_user
+
+
+class ChangeSubscription:
+    """1接続分の購読（イベントループのスレッドからのみ操作する）"""
+
+    __slots__ = ("user_id", "pending", "overflowed", "keepalive", "wake")
+
+    def __init__(self, user_id: UUID) -> None:
+        self.user_id = user_id
+        self.pending: list[ChangeEvent] = []
+        self.overflowed = False
+        self.keepalive = False
+        self.wake = asyncio.Event()
+
+    def push(self, events: list[ChangeEvent], limit: int) -> None:
+        if self.overflowed:
+            return
+        if len(self.pending) + len(events) > limit:
+            # 未送信分を捨てて再同期させる（以降のイベントもためない）
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending.extend(events)
+        self.wake.set()
+
+    async def next(self) -> tuple[list[ChangeEvent], bool, bool]:
+        """
+        次に送る内容を待つ
+
+        Returns:
+            (イベント, 再同期が必要か, 接続維持のコメントを送るか)
+        """
+        await self.wake.wait()
+        self.wake.clear()
+        events, self.pending = self.pending, []
+        keepalive, self.keepalive = self.keepalive, False
+        return events, self.overflowed, keepalive
+
+
+class ChangeBroadcaster:
+    """ワーカー内の SSE 接続に変更イベントを配る"""
+
+    def __init__(
+        self,
+        relay: OutboxRelay,
+        buffer_size: int | None = None,
+        max_connections: int | None = None,
+        max_connections_per_user: int | None = None,
+        keepalive_seconds: float | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.relay = relay
+        self.buffer_size = buffer_size or settings.EVENTS_BUFFER_SIZE
+        self.max_connections = max_connections or settings.EVENTS_MAX_CONNECTIONS
+        self.max_connections_per_user = max_connections_per_user or settings.EVENTS_MAX_CONNECTIONS_PER_USER
+        self.keepalive_seconds = keepalive_seconds or settings.EVENTS_KEEPALIVE_SECONDS
+        self._users: dict[UUID, set[ChangeSubscription]] = {}
+        self._count = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._unsubscribe_relay = None
+
+    @property
+    def connection_count(self) -> int:
+        return self._count
+
+    def subscribe(self, user_id: UUID) -> ChangeSubscription:
+        """
+        接続の購読を登録（イベントループ上で呼ぶ）
+
+        Raises:
+            BroadcastLimitError: ワーカー全体、またはユーザーごとの接続数の上限を超える場合
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._heartbeat = None
+        if self._count >= self.max_connections:
+            raise BroadcastLimitError(per_user=False)
+        subscriptions = self._users.setdefault(user_id, set())
+        if len(subscriptions) >= self.max_connections_per_user:
+            raise BroadcastLimitError(per_user=True)
+
+        subscription = ChangeSubscription(user_id)
+        subscriptions.add(subscription)
+        self._count += 1
+        if self._unsubscribe_relay is None:
+            self._unsubscribe_relay = self.relay.subscribe(self._on_relay)
+        if self._heartbeat is None:
+            self._heartbeat = loop.create_task(self._run_heartbeat())
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        """接続の購読を解除（イベントループ上で呼ぶ）"""
+        subscriptions = self._users.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.remove(subscription)
+        if not subscriptions:
+            del self._users[subscription.user_id]
+        self._count -= 1
+        if self._count == 0 and self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    def _on_relay(self, events: list[ChangeEvent]) -> None:
+        # リレーのスレッドから呼ばれるため、まとまりごとに1回だけイベントループへ渡す
+        loop = self._loop
+        if loop is not None and self._count and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, events)
+
+    def dispatch(self, events: list[ChangeEvent]) -> None:
+        """イベントを宛先のユーザーの接続に配る（イベントループ上で呼ぶ）"""
+        by_user: dict[UUID, list[ChangeEvent]] = {}
+        for change in events:
+            if change.user_id in self._users:
+                by_user.setdefault(change.user_id, []).append(change)
+        for user_id, changes in by_user.items():
+            for subscription in self._users[user_id]:
+                subscription.push(changes, self.buffer_size)
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_seconds)
+            for subscriptions in self._users.values():
+                for subscription in subscriptions:
+                    subscription.keepalive = True
+                    subscription.wake.set()
+
+
+# API プロセス内で共有するブロードキャスター
+change_broadcaster = ChangeBroadcaster(outbox_relay)
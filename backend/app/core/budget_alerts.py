@@ -0,0 +1,293 @@
+"""予算アラート
+
+取引の書き込み時に、カテゴリ・月ごとの支出の合計（category_spending、基準通貨）を増減させ、
+合計が予算の BUDGET_ALERT_THRESHOLDS（%）を下から超えたときにアラートを通知する。
+1件の書き込みあたりの処理は、変更のあった (カテゴリ, 月) ごとの UPDATE 1回と
+予算の一意インデックスでの参照1回で、月内の取引を集計し直さない。
+
+合計の行がない (カテゴリ, 月) は、最初の書き込み時に取引から集計して作成する
+（フラッシュ済みの変更を含めて集計するため、その書き込みの増減は足さない）。
+取引を経由しない変更（スナップショットの復元、為替レートの更新）では行を削除して作り直させる。
+
+アラートはセッションのコミット後に通知先（AlertSink）へ送り、ロールバックした場合は破棄する。
+予算の設定・変更だけでは通知しない（次に支出を書き込んだときに判定する）。
+"""
+import json
+import logging
+import threading
+import urllib.request
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Protocol
+from uuid import UUID
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.archive import archived_before, reaches_archive
+from app.core.config import get_settings
+from app.core.currency import fx_rates
+from app.core.dates import month_range
+from app.core.sql import upsert_insert
+from app.models.archive import ArchivedTransaction
+from app.models.budget import Budget
+from app.models.category import TransactionType
+from app.models.spending import CategorySpending
+from app.models.transaction import Transaction
+
+logger = logging.getLogger("app.budget_alerts")
+
+# コミット後に通知するアラートを保持する Session.info のキー
+_PENDING_KEY = "pending_budget_alerts"
+
+
+@dataclass(frozen=True)
+class BudgetAlert:
+    """予算の消化率がしきい値を超えたことを表すアラート"""
+
+    user_id: UUID
+    category_id: UUID
+    month: date
+    # しきい値（%）
+    threshold: int
+    # 月の支出の合計と予算額（基準通貨）
+    spent: int
+    budget: int
+
+    def to_dict(self) -> dict:
+        """JSON に変換できる辞書"""
+        data = asdict(self)
+        data["user_id"] = str(self.user_id)
+        data["category_id"] = str(self.category_id)
+        data["month"] = self.month.isoformat()
+        return data
+
+
+class AlertSink(Protocol):
+    """アラートの通知先"""
+
+    def send(self, alerts: list[BudgetAlert]) -> None:
+        """アラートを通知する（コミット後に呼ばれるため、データベースは使わない）"""
+
+
+class LogAlertSink:
+    """アラートをログに出力する通知先"""
+
+    def send(self, alerts: list[BudgetAlert]) -> None:
+        for alert in alerts:
+            logger.warning(
+                "予算の%d%%を超えました: user=%s category=%s month=%s spent=%d budget=%d",
+                alert.threshold, alert.user_id, alert.category_id, alert.month, alert.spent, alert.budget,
+            )
+
+
+class WebhookAlertSink:
+    """
+    アラートを JSON で Webhook に POST する通知先
+
+    リクエストの処理を待たせないよう、別スレッドで送信する（失敗はログに出力するのみで再送しない）。
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception:
+            logger.exception("予算アラートの Webhook への送信に失敗しました: %s", self.url)
+
+    def send(self, alerts: list[BudgetAlert]) -> None:
+        body = json.dumps({"alerts": [alert.to_dict() for alert in alerts]}, ensure_ascii=False).encode()
+        threading.Thread(target=self._post, args=(body,), daemon=True).start()
+
+
+class NullAlertSink:
+    """アラートを通知しない通知先"""
+
+    def send(self, alerts: list[BudgetAlert]) -> None:
+        pass
+
+
+@lru_cache
+def get_alert_sink() -> AlertSink:
+    """
+    設定（BUDGET_ALERT_SINK）に応じた通知先を取得
+
+    Raises:
+        ValueError: 通知先の指定が正しくない、または Webhook の URL が設定されていない場合
+    """
+    settings = get_settings()
+    if settings.BUDGET_ALERT_SINK == "log":
+        return LogAlertSink()
+    if settings.BUDGET_ALERT_SINK == "none":
+        return NullAlertSink()
+    if settings.BUDGET_ALERT_SINK == "webhook":
+        if not settings.BUDGET_ALERT_WEBHOOK_URL:
+            raise ValueError("BUDGET_ALERT_WEBHOOK_URL が設定されていません")
+        return WebhookAlertSink(settings.BUDGET_ALERT_WEBHOOK_URL, settings.BUDGET_ALERT_WEBHOOK_TIMEOUT_SECONDS)
+    raise ValueError(f"BUDGET_ALERT_SINK の値が正しくありません: {settings.BUDGET_ALERT_SINK}")
+
+
+@event.listens_for(Session, "after_commit")
+def _send_pending_alerts(session: Session) -> None:
+    alerts = session.info.pop(_PENDING_KEY, None)
+    if not alerts:
+        return
+    try:
+        get_alert_sink().send(alerts)
+    except Exception:
+        # 通知の失敗で書き込み済みのリクエストを失敗させない
+        logger.exception("予算アラートの通知に失敗しました")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_alerts(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _month_total(db: Session, user_id: UUID, category_id: UUID, month: date) -> int:
+    """
+    カテゴリ・月の支出の合計を取引から集計（(category_id, date) インデックスで絞り込む）
+
+    アーカイブの境界より前の月はアーカイブ済みの取引も集計する。
+    """
+    start_date, end_date = month_range(month)
+    models = [Transaction]
+    if reaches_archive(archived_before(db, user_id), start_date):
+        models.append(ArchivedTransaction)
+    total = 0
+    for model in models:
+        rows = db.execute(
+            select(model.amount, model.currency, model.date).where(
+                model.user_id == user_id,
+                model.category_id == category_id,
+                model.date >= start_date,
+                model.date <= end_date,
+                model.type == TransactionType.EXPENSE,
+            )
+        )
+        total += sum(fx_rates.to_base(db, amount, currency, on) for amount, currency, on in rows)
+    return total
+
+
+def _add_spent(db: Session, user_id: UUID, category_id: UUID, month: date, delta: int) -> int:
+    """
+    カテゴリ・月の支出の合計に増減を加算（行がなければ取引から集計して作成）
+
+    Returns:
+        加算後の合計
+    """
+    increment = (
+        update(CategorySpending)
+        .where(CategorySpending.category_id == category_id, CategorySpending.month == month)
+        .values(spent=CategorySpending.spent + delta)
+        .returning(CategorySpending.spent)
+        .execution_options(synchronize_session=False)
+    )
+    spent = db.execute(increment).scalar()
+    if spent is not None:
+        return spent
+
+    total = _month_total(db, user_id, category_id, month)
+    created = db.execute(
+        upsert_insert(db, CategorySpending)
+        .values(user_id=user_id, category_id=category_id, month=month, spent=total)
+        .on_conflict_do_nothing(index_elements=[CategorySpending.category_id, CategorySpending.month])
+        .returning(CategorySpending.spent)
+    ).scalar()
+    if created is not None:
+        return created
+    # 並行する書き込みが先に作成した場合は、その行に加算する
+    return db.execute(increment).scalar_one()
+
+
+class SpendingChanges:
+    """
+    1回の書き込みによる (カテゴリ, 月) ごとの支出の増減をまとめる
+
+    取引の変更前の内容を sign=-1、変更後の内容を sign=1 で追加し、書き込みをフラッシュした後に
+    `apply()` で合計に反映する（同じ (カテゴリ, 月) の増減は相殺してから1回だけ反映する）。
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.deltas: dict[tuple[UUID, date], int] = defaultdict(int)
+
+    def add(
+        self,
+        category_id: UUID,
+        type_: TransactionType,
+        amount: int,
+        currency: str,
+        on: date,
+        sign: int = 1,
+    ) -> None:
+        """取引の支出を増減に追加（収入は対象外）"""
+        if type_ != TransactionType.EXPENSE:
+            return
+        self.deltas[(category_id, on.replace(day=1))] += sign * fx_rates.to_base(self.db, amount, currency, on)
+
+    def add_transaction(self, transaction: Transaction, sign: int = 1) -> None:
+        """取引モデルの支出を増減に追加"""
+        self.add(
+            transaction.category_id, transaction.type, transaction.amount,
+            transaction.currency, transaction.date, sign,
+        )
+
+    def apply(self, user_id: UUID) -> list[BudgetAlert]:
+        """
+        増減を合計に反映し、しきい値を超えたアラートをコミット後の通知に登録
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            登録したアラート
+        """
+        self.db.flush()
+        thresholds = sorted(get_settings().BUDGET_ALERT_THRESHOLDS)
+        alerts = []
+        for (category_id, month), delta in self.deltas.items():
+            if delta == 0:
+                continue
+            spent = _add_spent(self.db, user_id, category_id, month, delta)
+            if delta < 0:
+                continue
+            budget = self.db.execute(
+                select(Budget.amount).where(
+                    Budget.user_id == user_id, Budget.category_id == category_id, Budget.month == month,
+                )
+            ).scalar()
+            if not budget:
+                continue
+            previous = spent - delta
+            for threshold in thresholds:
+                # previous / budget < threshold% <= spent / budget を整数で判定する
+                if previous * 100 < budget * threshold <= spent * 100:
+                    alerts.append(BudgetAlert(user_id, category_id, month, threshold, spent, budget))
+        self.deltas.clear()
+        if alerts:
+            self.db.info.setdefault(_PENDING_KEY, []).extend(alerts)
+        return alerts
+
+
+def reset_spending(db: Session, user_id: UUID | None = None) -> None:
+    """
+    支出の合計を削除して次の書き込み時に取引から作り直させる（取引を経由しない変更の後に呼ぶ）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID（省略時は全ユーザー。為替レートの更新時など）
+    """
+    stmt = delete(CategorySpending)
+    if user_id is not None:
+        stmt = stmt.where(CategorySpending.user_id == user_id)
+    db.execute(stmt)
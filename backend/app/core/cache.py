@@ -0,0 +1,122 @@
+"""ユーザー単位で無効化できるインプロセスキャッシュ"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+from uuid import UUID
+
+from app.core.config import get_settings
+
+# キャッシュに存在しないことを表す値（None をキャッシュできるようにするため）
+MISSING = object()
+
+
+class UserScopedCache:
+    """
+    ユーザー単位で無効化できるLRUキャッシュ（TTL付き）
+
+    無効化はユーザーごとの世代番号を進めるだけで行い（O(1)）、
+    古い世代のエントリは参照時またはLRUの追い出しで消える。
+    保存する値は、計算を始める前に generation() で取得した世代とともに set() に渡す。
+    計算中に無効化された場合（無効化前のデータを読んだ可能性がある場合）は保存しない。
+    レプリカから読み取った値は反映が遅れている可能性があるため、呼び出し側で保存しない
+    （app.core.database.read_from_replica）。
+    キャッシュはプロセス内のみのため、他ワーカーでの書き込みは変更イベントのリレー
+    （app.core.outbox）経由で無効化される。リレーが無効の場合は TTL が切れるまで反映されない。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (user_id, key) -> (有効期限, 世代, 値)
+        self._entries: OrderedDict[tuple[UUID, Hashable], tuple[float, int, Any]] = OrderedDict()
+        self._generations: dict[UUID, int] = {}
+
+    def get(self, user_id: UUID, key: Hashable) -> Any:
+        """
+        キャッシュから値を取得
+
+        Returns:
+            キャッシュされた値（存在しない、期限切れ、無効化済みの場合は MISSING）
+        """
+        entry_key = (user_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return MISSING
+            expires_at, generation, value = entry
+            if expires_at < time.monotonic() or generation != self._generations.get(user_id, 0):
+                del self._entries[entry_key]
+                return MISSING
+            self._entries.move_to_end(entry_key)
+            return value
+
+    def generation(self, user_id: UUID) -> int:
+        """
+        ユーザーの現在の世代を取得（値の計算を始める前に呼び、set() に渡す）
+
+        Returns:
+            世代番号
+        """
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def set(self, user_id: UUID, key: Hashable, value: Any, generation: int) -> None:
+        """
+        値をキャッシュに保存
+
+        Args:
+            user_id: ユーザーID
+            key: キー
+            value: 値
+            generation: 値の計算を始める前に generation() で取得した世代
+                （その後に無効化されていれば保存しない）
+        """
+        entry_key = (user_id, key)
+        # TTL未指定の場合は設定値（CACHE_TTL_SECONDS）を使う
+        ttl_seconds = self.ttl_seconds if self.ttl_seconds is not None else get_settings().CACHE_TTL_SECONDS
+        with self._lock:
+            if generation != self._generations.get(user_id, 0):
+                return
+            self._entries[entry_key] = (time.monotonic() + ttl_seconds, generation, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """ユーザーのエントリをすべて無効化"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        """すべてのエントリを削除"""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+_registry: list[UserScopedCache] = []
+
+
+def create_user_cache(maxsize: int = 1024, ttl_seconds: float | None = None) -> UserScopedCache:
+    """
+    キャッシュを作成し、書き込み時の一括無効化の対象に登録する
+
+    Returns:
+        作成したキャッシュ
+    """
+    cache = UserScopedCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+    _registry.append(cache)
+    return cache
+
+
+def invalidate_user_caches(user_id: UUID) -> None:
+    """
+    ユーザーのデータが変更されたときに、登録済みのすべてのキャッシュを無効化する
+
+    Args:
+        user_id: 変更されたデータの所有者のユーザーID
+    """
+    for cache in _registry:
+        cache.invalidate_user(user_id)
@@ -0,0 +1,241 @@
+"""レスポンス圧縮ミドルウェア（gzip / brotli / zstd）"""
+import gzip
+import threading
+import time
+from dataclasses import dataclass, field
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli / zstandard はオプション依存（未インストールの場合はその形式を使わない）
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# この大きさ以上の本文はイベントループを塞がないようスレッドで圧縮する
+_THREAD_OFFLOAD_SIZE = 64 * 1024
+
+
+def available_encodings() -> set[str]:
+    """利用可能な圧縮形式を取得"""
+    encodings = {"gzip"}
+    if brotli is not None:
+        encodings.add("br")
+    if zstandard is not None:
+        encodings.add("zstd")
+    return encodings
+
+
+@dataclass
+class RouteCompressionStats:
+    """ルート単位の圧縮統計"""
+    responses: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    cpu_seconds: float = 0.0
+    encodings: dict[str, int] = field(default_factory=dict)
+
+
+class CompressionStats:
+    """圧縮による削減バイト数とCPUコストをルート単位で集計する"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, RouteCompressionStats] = {}
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        """圧縮1回分の結果を記録"""
+        with self._lock:
+            stats = self._routes.setdefault(route, RouteCompressionStats())
+            stats.responses += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.cpu_seconds += cpu_seconds
+            stats.encodings[encoding] = stats.encodings.get(encoding, 0) + 1
+
+    def snapshot(self) -> dict[str, dict]:
+        """集計結果を辞書で取得"""
+        with self._lock:
+            return {
+                route: {
+                    "responses": stats.responses,
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "bytes_saved": stats.bytes_in - stats.bytes_out,
+                    "ratio": round(stats.bytes_out / stats.bytes_in, 4) if stats.bytes_in else None,
+                    "cpu_ms": round(stats.cpu_seconds * 1000, 3),
+                    "encodings": dict(stats.encodings),
+                }
+                for route, stats in self._routes.items()
+            }
+
+
+# アプリケーション全体で共有する統計インスタンス
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding に応じてレスポンスを圧縮するASGIミドルウェア
+
+    - 最小サイズ未満、または許可リストにないContent-Typeのレスポンスは圧縮しない
+    - 本文が複数チャンクで送られるストリーミングレスポンス（エクスポートなど）は
+      逐次圧縮による遅延を避けるためそのまま流す
+    - 除外パスに前方一致するリクエストは圧縮しない
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: list[str] | None = None,
+        content_types: list[str] | None = None,
+        exclude_paths: list[str] | None = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        stats: CompressionStats | None = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        # サーバー側の優先順を保ったまま、利用可能な形式だけに絞る
+        supported = available_encodings()
+        self.encodings = [e for e in (encodings or ["zstd", "br", "gzip"]) if e in supported]
+        self.content_types = tuple(content_types or ["application/json", "text/"])
+        self.exclude_paths = tuple(exclude_paths or [])
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.stats = stats if stats is not None else compression_stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    def _negotiate(self, accept_encoding: str) -> str | None:
+        """
+        Accept-Encoding ヘッダーから使用する圧縮形式を決定
+
+        Returns:
+            圧縮形式（対応形式がない場合はNone）
+        """
+        accepted: dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name] = quality
+
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if quality > 0:
+                return encoding
+        return None
+
+    def compress(self, encoding: str, body: bytes) -> tuple[bytes, float]:
+        """
+        本文を圧縮
+
+        Returns:
+            (圧縮後の本文, 消費したCPU時間（秒）)
+        """
+        started = time.thread_time()
+        if encoding == "zstd":
+            compressed = zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        elif encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        return compressed, time.thread_time() - started
+
+    def is_compressible(self, headers: Headers) -> bool:
+        """Content-Type とヘッダーから圧縮対象か判定"""
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.content_types)
+
+
+class _CompressionResponder:
+    """1レスポンス分の送信を仲介し、必要に応じて本文を圧縮する"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send, encoding: str) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self.send_next = send
+        self.encoding = encoding
+        self.start_message: Message | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send_next(message)
+            return
+
+        if message["type"] == "http.response.start":
+            # 本文を見るまでヘッダーの送信を保留する
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send_next(message)
+            return
+
+        start_message, self.start_message = self.start_message, None
+        body = message.get("body", b"")
+        headers = Headers(raw=start_message["headers"])
+
+        if (
+            message.get("more_body", False)
+            or len(body) < self.middleware.minimum_size
+            or start_message["status"] in (204, 304)
+            or not self.middleware.is_compressible(headers)
+        ):
+            # ストリーミング・小さい・対象外のレスポンスはそのまま流す
+            self.passthrough = True
+            await self.send_next(start_message)
+            await self.send_next(message)
+            return
+
+        if len(body) >= _THREAD_OFFLOAD_SIZE:
+            compressed, cpu_seconds = await anyio.to_thread.run_sync(
+                self.middleware.compress, self.encoding, body
+            )
+        else:
+            compressed, cpu_seconds = self.middleware.compress(self.encoding, body)
+
+        route = getattr(self.scope.get("route"), "path", self.scope["path"])
+        self.middleware.stats.record(route, self.encoding, len(body), len(compressed), cpu_seconds)
+
+        mutable_headers = MutableHeaders(raw=start_message["headers"])
+        mutable_headers["Content-Encoding"] = self.encoding
+        mutable_headers["Content-Length"] = str(len(compressed))
+        mutable_headers.add_vary_header("Accept-Encoding")
+
+        self.passthrough = True
+        await self.send_next(start_message)
+        await self.send_next({"type": "http.response.body", "body": compressed})
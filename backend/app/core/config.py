@@ -1,12 +1,26 @@
 """アプリケーション設定管理"""
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """アプリケーション設定"""
 
-    # データベース設定
+    # データベース設定（sqlite:///path/to/kakeibon.db で組み込みモード）
     DATABASE_URL: str
+    # 接続プール設定（ワーカープロセスごと。最大接続数は ワーカー数 ×（POOL_SIZE + MAX_OVERFLOW））
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    # 読み取りレプリカ（JSON配列で指定。未設定ならすべてプライマリで処理）
+    DATABASE_REPLICA_URLS: list[str] = []
+    # 接続エラーが起きたレプリカを選択から外す秒数
+    DATABASE_REPLICA_RETRY_SECONDS: int = 30
+    # 書き込み後、同じクライアントの読み取りをプライマリに送る秒数
+    DATABASE_REPLICA_STICKY_SECONDS: int = 5
+    # 組み込みモード（SQLite）で書き込みを待つ秒数の上限
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = 5.0
 
     # JWT設定
     SECRET_KEY: str
@@ -16,11 +30,104 @@ class Settings(BaseSettings):
     # CORS設定
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173"]
 
+    # インプロセスキャッシュの有効期限（秒）。複数ワーカー構成では他ワーカーの書き込みが反映されるまでの上限になる
+    CACHE_TTL_SECONDS: int = 60
+
+    # レート制限・同時実行数の制御
+    RATE_LIMIT_ENABLED: bool = True
+    # クライアント（JWT の sub、なければ接続元IP）ごとの1秒あたりの補充数と最大バースト
+    RATE_LIMIT_PER_SECOND: float = 10.0
+    RATE_LIMIT_BURST: int = 50
+    RATE_LIMIT_MAX_CONCURRENT_PER_CLIENT: int = 8
+    # 設定すると Redis で全ワーカー共通に数える（未設定ならワーカーごとのメモリ）
+    RATE_LIMIT_REDIS_URL: str | None = None
+    # 変更イベントの SSE は接続を保持し続けるため同時実行数に含めない
+    RATE_LIMIT_EXCLUDE_PATHS: list[str] = ["/health", "/docs", "/redoc", "/openapi.json", "/api/events"]
+    # ワーカーごとの同時実行数の上限（0 の場合は DB_POOL_SIZE + DB_MAX_OVERFLOW）
+    ADMISSION_MAX_CONCURRENT: int = 0
+    # 同時実行数が上限のとき、空きを待つ秒数（超えたら 503）
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 0.5
+
+    # 差分同期（GET /api/transactions/changes）で、前回のトークンより前に遡って再確認する秒数。
+    # updated_at はコミット時ではなく書き込み時の時刻のため、書き込みからコミットまでの時間と
+    # サーバー間の時計のずれより長くする（範囲内の取引は重複して返る）
+    SYNC_RESCAN_SECONDS: int = 60
+
+    # 予算アラート設定
+    # 通知する予算の消化率（%）
+    BUDGET_ALERT_THRESHOLDS: list[int] = [80, 100]
+    # 通知先（log: ログに出力 / webhook: BUDGET_ALERT_WEBHOOK_URL に POST / none: 通知しない）
+    BUDGET_ALERT_SINK: str = "log"
+    BUDGET_ALERT_WEBHOOK_URL: str | None = None
+    BUDGET_ALERT_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+
+    # 取引のアーカイブ設定
+    # 当月を含めてこの月数より前の月の取引を transaction_archive に移す（0 の場合はアーカイブしない）
+    TRANSACTION_ARCHIVE_AFTER_MONTHS: int = 24
+
+    # 変更イベント（アウトボックス）の配信設定
+    # API プロセス内でリレーを動かすか（無効の場合、プロセス内の購読者と SSE にはイベントが届かない）
+    OUTBOX_RELAY_ENABLED: bool = True
+    # 新しいイベントを確認する間隔（秒）。PostgreSQL では NOTIFY で即時に起こされる
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 500
+    # 欠番（コミット前のトランザクションが採番した ID）の到着を待つ秒数
+    OUTBOX_GAP_TIMEOUT_SECONDS: float = 10.0
+    # イベントの保持期間（時間）。SSE の再接続時はこの範囲で取りこぼしを補う
+    OUTBOX_RETENTION_HOURS: int = 24
+    # SSE（GET /api/events）の接続数の上限（ワーカーごと・台帳ごと）
+    EVENTS_MAX_CONNECTIONS: int = 10000
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 10
+    # 接続ごとにためる未送信イベントの上限（超えた接続は resync を送って切断する）
+    EVENTS_BUFFER_SIZE: int = 256
+    # 接続維持のコメントを送る間隔（秒）
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    # EventSource 用の接続チケットの有効期限（秒）
+    EVENTS_TICKET_EXPIRE_SECONDS: int = 60
+
+    # バックグラウンドジョブ設定
+    # キューが空のときのポーリング間隔（秒）
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    # リトライ間隔の基準（秒）。n 回目の失敗後は 基準 × 2^(n-1) 秒待つ
+    JOB_RETRY_BASE_SECONDS: int = 10
+    # 実行中のまま更新されないジョブを、ワーカー停止とみなして再取得するまでの秒数
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600
+
+    # レスポンス圧縮設定（br / zstd はオプション依存がインストールされている場合のみ有効）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_CONTENT_TYPES: list[str] = ["application/json", "text/"]
+    COMPRESSION_EXCLUDE_PATHS: list[str] = []
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # 圧縮統計（GET /metrics/compression）を公開するか。認証なしで全体の統計を返すため、
+    # 内部ネットワークからのみ到達できる環境でだけ有効にする
+    COMPRESSION_METRICS_ENABLED: bool = False
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
     )
 
 
-# グローバル設定インスタンス
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    アプリケーション設定を取得
+
+    .env の読み込みはインポート時ではなく初回呼び出し時に行い、以降は同じインスタンスを返す。
+
+    Returns:
+        設定インスタンス
+    """
+    return Settings()
+
+
+def __getattr__(name: str):
+    # 後方互換: `from app.core.config import settings` は参照時に設定を読み込む
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
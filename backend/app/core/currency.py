@@ -0,0 +1,221 @@
+"""通貨と為替レート
+
+金額は各通貨の最小単位の整数で保持する（JPY は円、USD はセント）。
+集計時は為替レートで基準通貨（JPY）に換算する。為替レートは fx_rates テーブルを
+プロセス内にまとめて読み込み、通貨ごとの日付配列を二分探索して参照する。
+"""
+import csv
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from sqlalchemy import BigInteger, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.sql import upsert_insert
+from app.models.fx_rate import FxRate
+
+# 集計の基準通貨
+BASE_CURRENCY = "JPY"
+
+# 対応通貨と最小単位の桁数（ISO 4217）
+CURRENCY_EXPONENTS: dict[str, int] = {
+    "JPY": 0,
+    "USD": 2,
+    "EUR": 2,
+    "GBP": 2,
+    "AUD": 2,
+    "CAD": 2,
+    "CHF": 2,
+    "CNY": 2,
+    "HKD": 2,
+    "KRW": 0,
+    "SGD": 2,
+    "THB": 2,
+    "TWD": 2,
+}
+
+
+class FxRateNotFoundError(LookupError):
+    """為替レートが登録されていない通貨を換算しようとした場合の例外"""
+
+
+class FxRateCache:
+    """
+    為替レートのプロセス内キャッシュ
+
+    通貨ごとに日付（序数）の昇順配列とレートの配列を持ち、指定日以前で最も新しい
+    レートを二分探索で引く。指定日が最初のレートより前の場合は最初のレートを使う。
+    全件を一度に読み込み、TTL（CACHE_TTL_SECONDS）が切れたら次の参照時に読み直す。
+    """
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._dates: dict[str, list[int]] = {}
+        self._rates: dict[str, list[float]] = {}
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            dates: dict[str, list[int]] = {}
+            rates: dict[str, list[float]] = {}
+            rows = db.execute(
+                select(FxRate.currency, FxRate.date, FxRate.rate).order_by(FxRate.currency, FxRate.date)
+            )
+            for currency, rate_date, rate in rows:
+                dates.setdefault(currency, []).append(rate_date.toordinal())
+                rates.setdefault(currency, []).append(float(rate))
+            self._dates, self._rates = dates, rates
+            ttl = self.ttl_seconds if self.ttl_seconds is not None else get_settings().CACHE_TTL_SECONDS
+            self._expires_at = time.monotonic() + ttl
+
+    def invalidate(self) -> None:
+        """次の参照時に読み直す"""
+        self._expires_at = 0.0
+
+    def has_rates(self, db: Session, currency: str) -> bool:
+        """通貨の為替レートが登録されているか"""
+        if currency == BASE_CURRENCY:
+            return True
+        self._ensure_loaded(db)
+        return currency in self._dates
+
+    def rate(self, db: Session, currency: str, on: date) -> float:
+        """
+        指定日の為替レート（1通貨単位あたりの基準通貨額）を取得
+
+        Raises:
+            FxRateNotFoundError: 通貨の為替レートが登録されていない場合
+        """
+        if currency == BASE_CURRENCY:
+            return 1.0
+        self._ensure_loaded(db)
+        dates = self._dates.get(currency)
+        if not dates:
+            raise FxRateNotFoundError(currency)
+        index = max(bisect_right(dates, on.toordinal()) - 1, 0)
+        return self._rates[currency][index]
+
+    def to_base(self, db: Session, amount: int, currency: str, on: date) -> int:
+        """
+        最小単位の金額を基準通貨の最小単位に換算（端数は四捨五入）
+
+        Raises:
+            FxRateNotFoundError: 通貨の為替レートが登録されていない場合
+        """
+        if currency == BASE_CURRENCY:
+            return amount
+        scale = 10 ** (CURRENCY_EXPONENTS[BASE_CURRENCY] - CURRENCY_EXPONENTS[currency])
+        return round(amount * self.rate(db, currency, on) * scale)
+
+
+# アプリケーション全体で共有するキャッシュ
+fx_rates = FxRateCache()
+
+
+def to_base_sql(amount, currency, on):
+    """
+    最小単位の金額を基準通貨の最小単位に換算する SQL 式（FxRateCache.to_base と同じレートを使う）
+
+    ウィンドウ関数など、集計を SQL 内で完結させたい場合に使う。外貨の行のみ (currency, date) の
+    主キーで指定日以前の最新レート（なければ最初のレート）を引く。
+
+    Args:
+        amount: 金額の列
+        currency: 通貨の列
+        on: 換算日の列
+
+    Returns:
+        基準通貨の最小単位の金額（整数）の式
+    """
+    rate_on = (
+        select(FxRate.rate)
+        .where(FxRate.currency == currency, FxRate.date <= on)
+        .order_by(FxRate.date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    first_rate = (
+        select(FxRate.rate)
+        .where(FxRate.currency == currency)
+        .order_by(FxRate.date)
+        .limit(1)
+        .scalar_subquery()
+    )
+    scale = case(
+        {
+            code: 10.0 ** (CURRENCY_EXPONENTS[BASE_CURRENCY] - exponent)
+            for code, exponent in CURRENCY_EXPONENTS.items()
+            if code != BASE_CURRENCY
+        },
+        value=currency,
+    )
+    return case(
+        (currency == BASE_CURRENCY, amount),
+        else_=cast(func.round(amount * func.coalesce(rate_on, first_rate) * scale), BigInteger),
+    )
+
+
+def load_fx_rates_csv(db: Session, lines: Iterable[str], batch_size: int = 5000) -> int:
+    """
+    CSV（date,currency,rate のヘッダー付き）から為替レートを一括登録
+
+    同じ通貨・日付のレートは上書きする。コミットは呼び出し側で行う。
+
+    Args:
+        db: データベースセッション
+        lines: CSV の行
+        batch_size: 1回の INSERT にまとめる行数
+
+    Returns:
+        登録した行数
+
+    Raises:
+        ValueError: 列が足りない、未対応の通貨、日付やレートが不正な場合
+    """
+    reader = csv.DictReader(lines)
+    missing = {"date", "currency", "rate"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV に列がありません: {', '.join(sorted(missing))}")
+
+    def flush(rows: list[dict]) -> None:
+        stmt = upsert_insert(db, FxRate).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[FxRate.currency, FxRate.date],
+            set_={"rate": stmt.excluded.rate},
+        ))
+
+    count = 0
+    batch: dict[tuple[str, date], dict] = {}
+    for line_number, record in enumerate(reader, start=2):
+        currency = record["currency"].strip().upper()
+        if currency not in CURRENCY_EXPONENTS or currency == BASE_CURRENCY:
+            raise ValueError(f"{line_number}行目: 未対応の通貨です: {currency}")
+        try:
+            rate_date = date.fromisoformat(record["date"].strip())
+            rate = Decimal(record["rate"].strip())
+        except (ValueError, InvalidOperation) as e:
+            raise ValueError(f"{line_number}行目: 日付またはレートが正しくありません") from e
+        if rate <= 0:
+            raise ValueError(f"{line_number}行目: レートは正の数を指定してください")
+        # 同じバッチ内の重複は後の行を優先する（ON CONFLICT は同じ行を2回更新できない）
+        batch[(currency, rate_date)] = {"currency": currency, "date": rate_date, "rate": rate}
+        if len(batch) >= batch_size:
+            flush(list(batch.values()))
+            count += len(batch)
+            batch.clear()
+    if batch:
+        flush(list(batch.values()))
+        count += len(batch)
+
+    fx_rates.invalidate()
+    return count
@@ -1,28 +1,243 @@
 """データベース接続設定"""
-from sqlalchemy import create_engine
+import os
+from functools import lru_cache
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import get_settings
+from app.core.replicas import RecentWriters, ReplicaSet
+from app.core.sqlite import configure_sqlite_engine, is_sqlite_url
+
+# 副作用のないHTTPメソッド（レプリカへ振り分けてよいリクエスト）
+_READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+def _create_engine(url: str) -> Engine:
+    """設定に従ってエンジンを作成"""
+    settings = get_settings()
+    if is_sqlite_url(url):
+        # 接続はリクエストごとに別のスレッドで使われるため、スレッドの検査を外す
+        engine = create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            connect_args={"check_same_thread": False},
+            echo=False,
+        )
+        configure_sqlite_engine(engine, settings.SQLITE_BUSY_TIMEOUT_SECONDS)
+        return engine
+    return create_engine(
+        url,
+        pool_pre_ping=True,  # 接続の有効性を確認
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        echo=False,  # SQLログを出力しない（開発時はTrueに変更可）
+    )
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    データベースエンジン（プライマリ）を取得
+
+    DBドライバの読み込みと接続プールの作成はインポート時ではなく、
+    最初にデータベースが必要になった時点で行う。
+
+    Returns:
+        データベースエンジン
+    """
+    return _create_engine(get_settings().DATABASE_URL)
+
+
+@lru_cache
+def get_replica_set() -> ReplicaSet | None:
+    """
+    読み取りレプリカの集合を取得
+
+    Returns:
+        レプリカの集合（DATABASE_REPLICA_URLS が未設定の場合はNone）
+    """
+    settings = get_settings()
+    if not settings.DATABASE_REPLICA_URLS:
+        return None
+    return ReplicaSet(
+        [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+        retry_seconds=settings.DATABASE_REPLICA_RETRY_SECONDS,
+    )
+
+
+@lru_cache
+def get_recent_writers() -> RecentWriters:
+    """read-after-write 用の書き込み記録を取得"""
+    return RecentWriters(window_seconds=get_settings().DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def dispose_engine() -> None:
+    """
+    フォーク後の子プロセスで、親プロセスから引き継いだ接続プールを破棄する
+
+    親の接続（ソケット）を子プロセスで使い回すと通信が混線するため、
+    close=False で親側の接続には触れずにプールだけを作り直す。
+    エンジンが未作成の場合は何もしない。
+    """
+    if get_engine.cache_info().currsize:
+        get_engine().dispose(close=False)
+    if get_replica_set.cache_info().currsize and get_replica_set() is not None:
+        get_replica_set().dispose(close=False)
+
+
+# gunicorn の preload などでフォークされた子プロセスが接続プールを共有しないようにする
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose_engine)
+
+
+class AppSession(Session):
+    """
+    接続先を振り分けるセッション
+
+    info["read_only"] が True のセッションは読み取りをレプリカに送る。
+    書き込み（flush や INSERT/UPDATE/DELETE の実行）が発生した時点でプライマリに切り替え、
+    以降の読み取りもプライマリで行う（同一セッション内の read-after-write）。
+    接続先が明示されている場合はそれを使う。
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.bind is not None:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
 
-from app.core.config import settings
+        if self.info.get("read_only"):
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info["read_only"] = False
+            else:
+                replica = self.info.get("replica")
+                if replica is None:
+                    replica = self._connect_replica()
+                    if replica is None:
+                        # 使えるレプリカがなければプライマリで読む
+                        self.info["read_only"] = False
+                        return get_engine()
+                    # 1セッション内では同じレプリカを使い続ける
+                    self.info["replica"] = replica
+                return replica
+
+        return get_engine()
+
+    def _connect_replica(self) -> Engine | None:
+        """
+        レプリカを選んで接続を確立する
+
+        接続に失敗したレプリカは選択から外して次のレプリカを試すため、
+        レプリカの障害がリクエストのエラーにならない。
+        """
+        replica_set = get_replica_set()
+        if replica_set is None:
+            return None
+        for _ in range(len(replica_set.engines)):
+            replica = replica_set.choose()
+            if replica is None:
+                return None
+            try:
+                self.connection(bind_arguments={"bind": replica})
+            except OperationalError:
+                replica_set.mark_unhealthy(replica_set.engines.index(replica))
+                continue
+            return replica
+        return None
+
+
+@event.listens_for(AppSession, "before_flush")
+def _switch_to_primary_on_flush(session, flush_context, instances) -> None:
+    session.info["read_only"] = False
+
+
+def use_primary(db: Session) -> bool:
+    """
+    レプリカで読み取り中のセッションをプライマリに切り替える
+
+    Returns:
+        切り替えた場合True（既にプライマリを使っていた場合False）
+    """
+    if not db.info.get("read_only"):
+        return False
+    db.info["read_only"] = False
+    return True
+
+
+def read_from_replica(db: Session) -> bool:
+    """
+    セッションがレプリカから読み取ったか
+
+    レプリカは書き込みの反映が遅れることがあるため、読み取った値はキャッシュしない
+    （書き込み直後の無効化より後に、書き込み前の値が保存されるのを防ぐ）。
+
+    Returns:
+        レプリカに接続した場合True
+    """
+    return db.info.get("replica") is not None
 
-# データベースエンジンの作成
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # 接続の有効性を確認
-    echo=False,  # SQLログを出力しない（開発時はTrueに変更可）
-)
 
 # セッションファクトリの作成
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=AppSession, autocommit=False, autoflush=False)
 
 # ベースクラスの作成
 Base = declarative_base()
 
 
-def get_db():
-    """データベースセッションの依存性注入用ジェネレータ"""
+def init_embedded_database() -> None:
+    """
+    組み込みモード（SQLite）の場合、テーブルがなければモデル定義から作成する
+
+    マイグレーション（alembic）は PostgreSQL 用のため、SQLite ではモデル定義から直接作成する。
+    PostgreSQL の場合は何もしない。
+    """
+    if not is_sqlite_url(get_settings().DATABASE_URL):
+        return
+    import app.models  # noqa: F401  全モデルをメタデータに登録する
+
+    # 複数のワーカープロセスが同時に起動しても1つずつ作成するよう、書き込みロックを取ってから確認する
+    with get_engine().connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        Base.metadata.create_all(connection)
+        connection.commit()
+
+
+def get_db(request: Request):
+    """
+    データベースセッションの依存性注入用ジェネレータ
+
+    レプリカが設定されている場合、GET/HEAD リクエストはレプリカから読み取る。
+    ただし直近に書き込みを行ったクライアント（Authorization ヘッダー単位）は
+    一定時間プライマリから読み取る。
+    """
     db = SessionLocal()
+    client_key = request.headers.get("authorization")
+    replicas_enabled = get_replica_set() is not None
+
+    is_write = request.method not in _READ_METHODS
+
+    if replicas_enabled and not is_write:
+        db.info["read_only"] = not (client_key and get_recent_writers().is_recent(client_key))
+    if replicas_enabled and is_write and client_key:
+        # 書き込み完了とレスポンス送信の前後関係によらず、後続の読み取りをプライマリに送る
+        get_recent_writers().mark(client_key)
+
     try:
         yield db
     finally:
         db.close()
+        if replicas_enabled and is_write and client_key:
+            get_recent_writers().mark(client_key)
+
+
+def __getattr__(name: str):
+    # 後方互換: `from app.core.database import engine` は参照時にエンジンを作成する
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,94 @@
+"""日付計算の共通関数"""
+from datetime import date, timedelta
+
+
+def month_range(target: date) -> tuple[date, date]:
+    """
+    指定日を含む月の初日と末日を取得
+
+    Args:
+        target: 対象日
+
+    Returns:
+        (月初日, 月末日)
+    """
+    start_date = date(target.year, target.month, 1)
+    if target.month == 12:
+        end_date = date(target.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_date = date(target.year, target.month + 1, 1) - timedelta(days=1)
+    return start_date, end_date
+
+
+# 集計単位（PostgreSQL の date_trunc に渡す値と同じ）
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+
+def truncate_date(target: date, granularity: str) -> date:
+    """
+    指定日を集計単位の先頭日に切り捨てる（date_trunc と同じ規則。週は月曜始まり）
+
+    Args:
+        target: 対象日
+        granularity: 集計単位（day / week / month / quarter / year）
+
+    Returns:
+        集計単位の先頭日
+    """
+    if granularity == "day":
+        return target
+    if granularity == "week":
+        return target - timedelta(days=target.weekday())
+    if granularity == "month":
+        return date(target.year, target.month, 1)
+    if granularity == "quarter":
+        return date(target.year, (target.month - 1) // 3 * 3 + 1, 1)
+    if granularity == "year":
+        return date(target.year, 1, 1)
+    raise ValueError(f"不明な集計単位です: {granularity}")
+
+
+def next_period(start: date, granularity: str) -> date:
+    """
+    次の集計単位の先頭日を取得
+
+    Args:
+        start: 集計単位の先頭日
+        granularity: 集計単位
+
+    Returns:
+        次の集計単位の先頭日
+    """
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    year, month = divmod(start.year * 12 + start.month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+def iter_periods(start_date: date, end_date: date, granularity: str, max_periods: int | None = None) -> list[date]:
+    """
+    期間に含まれる集計単位の先頭日を列挙
+
+    Args:
+        start_date: 期間の開始日
+        end_date: 期間の終了日
+        granularity: 集計単位
+        max_periods: 列挙する最大数（省略時は無制限）
+
+    Returns:
+        集計単位の先頭日のリスト（昇順）
+
+    Raises:
+        ValueError: 集計単位の数が max_periods を超える場合
+    """
+    periods = []
+    period = truncate_date(start_date, granularity)
+    while period <= end_date:
+        if max_periods is not None and len(periods) >= max_periods:
+            raise ValueError(f"集計単位の数が上限（{max_periods}）を超えています")
+        periods.append(period)
+        period = next_period(period, granularity)
+    return periods
@@ -0,0 +1,48 @@
+"""HTTPキャッシュ関連の機能（ETagによる条件付きGET）"""
+import hashlib
+
+from fastapi import Request
+
+
+def make_etag(*parts: object) -> str:
+    """
+    任意の値の並びから弱いETagを生成
+
+    Args:
+        parts: ETagの元になる値（データのバージョン、クエリパラメータなど）
+
+    Returns:
+        弱いETag（例: W/"3f2a..."）
+
+    Note:
+        レスポンスの圧縮などでバイト列が変わっても意味的に同一であれば
+        一致とみなせるよう、弱いETagを使用します。
+    """
+    source = "|".join(str(part) for part in parts)
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    リクエストの If-None-Match ヘッダーがETagに一致するか判定
+
+    Args:
+        request: リクエスト
+        etag: 現在のリソースのETag
+
+    Returns:
+        一致する場合True（304を返してよい）
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    def _opaque(tag: str) -> str:
+        # 弱い比較のため W/ プレフィックスを無視する
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
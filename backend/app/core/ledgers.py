@@ -0,0 +1,56 @@
+"""共有台帳の権限
+
+台帳IDは所有者のユーザーIDで、取引・カテゴリ・予算などの user_id 列がそのまま台帳IDになる。
+権限は行を取得してから比較するのではなく、クエリの条件（`ledger_scope()`）に含めて確認する。
+共有台帳の条件は「user_id = 台帳ID かつ ledger_members にメンバーの行がある」で、メンバーの確認は
+行に依存しない EXISTS（主キー (user_id, ledger_id) の参照）のため PostgreSQL では1回だけ評価され、
+一覧も自分の台帳と同じ (user_id, ...) インデックスを使った1回の走査で取得できる。
+"""
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.ledger import LedgerMember, LedgerRole
+
+# 書き込みができる権限
+WRITE_ROLES = (LedgerRole.EDITOR,)
+
+
+def _membership(user_id: UUID, ledger_id: UUID, write: bool):
+    stmt = select(LedgerMember.ledger_id).where(
+        LedgerMember.user_id == user_id,
+        LedgerMember.ledger_id == ledger_id,
+    )
+    if write:
+        stmt = stmt.where(LedgerMember.role.in_(WRITE_ROLES))
+    return stmt.exists()
+
+
+def ledger_scope(owner_column, user_id: UUID, ledger_id: UUID, write: bool = False):
+    """
+    台帳の行に絞り込み、ユーザーに権限がない場合は何も返さない条件
+
+    Args:
+        owner_column: 台帳ID（所有者のユーザーID）の列（Transaction.user_id など）
+        user_id: 操作するユーザーのID
+        ledger_id: 対象の台帳ID
+        write: 書き込み権限を要求するか
+
+    Returns:
+        WHERE 句に渡す条件
+    """
+    if ledger_id == user_id:
+        return owner_column == user_id
+    return (owner_column == ledger_id) & _membership(user_id, ledger_id, write)
+
+
+def has_ledger_access(db: Session, user_id: UUID, ledger_id: UUID, write: bool = False) -> bool:
+    """
+    台帳を参照（write=True の場合は書き込み）できるか
+
+    既存の行を経由しない操作（カテゴリの作成、SSE の接続など）の確認に使う。
+    """
+    if ledger_id == user_id:
+        return True
+    return bool(db.execute(select(_membership(user_id, ledger_id, write))).scalar())
@@ -0,0 +1,290 @@
+"""変更イベントのアウトボックスとリレー
+
+取引・カテゴリ・予算・タグを書き込むトランザクション内で `record_change()` により outbox_events に
+イベントを追加し、コミットされたイベントだけをリレー（OutboxRelay）が event_id の順に読み出して、
+プロセス内の購読者にまとめて配信する。書き込みとイベントは同じトランザクションでコミットされるため、
+ロールバックした変更のイベントは配信されず、コミットした変更のイベントは失われない。
+
+event_id は採番順とコミット順が一致しないため、リレーは読み出し済みの ID の集合と欠番を記録し、
+欠番は OUTBOX_GAP_TIMEOUT_SECONDS の間だけ後からコミットされるのを待つ（ロールバックされた
+ID は欠番のまま残る）。PostgreSQL ではコミット時の NOTIFY でリレーを起こし、待ち時間をなくす。
+"""
+import logging
+import select as select_module
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal, get_engine
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger("app.outbox")
+
+# PostgreSQL の NOTIFY チャンネル
+NOTIFY_CHANNEL = "outbox_events"
+# トランザクション内で NOTIFY 済みかを記録する Session.info のキー
+_NOTIFIED_KEY = "outbox_notified"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """配信する変更イベント"""
+
+    event_id: int
+    user_id: UUID
+    entity: str
+    action: str
+    entity_id: UUID | None
+    occurred_at: datetime
+
+    @classmethod
+    def from_row(cls, row: OutboxEvent) -> "ChangeEvent":
+        return cls(row.event_id, row.user_id, row.entity, row.action, row.entity_id, row.created_at)
+
+    def to_dict(self) -> dict:
+        """JSON に変換できる辞書"""
+        return {
+            "event_id": self.event_id,
+            "entity": self.entity,
+            "action": self.action,
+            "entity_id": str(self.entity_id) if self.entity_id is not None else None,
+            "occurred_at": self.occurred_at.isoformat(),
+        }
+
+
+def record_change(db: Session, user_id: UUID, entity: str, action: str, entity_id: UUID | None = None) -> None:
+    """
+    変更イベントを追加（書き込みと同じトランザクション内で呼び、コミットは呼び出し側で行う）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        entity: 対象の種類（transaction / category / budget / tag）
+        action: 操作（created / updated / deleted）
+        entity_id: 対象のID（複数件の変更は省略）
+    """
+    db.add(OutboxEvent(user_id=user_id, entity=entity, action=action, entity_id=entity_id))
+    if not db.info.get(_NOTIFIED_KEY) and db.get_bind().dialect.name == "postgresql":
+        # NOTIFY はコミット時に届く（同じトランザクション内の重複はまとめられる）
+        db.execute(select(func.pg_notify(NOTIFY_CHANNEL, "")))
+        db.info[_NOTIFIED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_notified(session: Session) -> None:
+    session.info.pop(_NOTIFIED_KEY, None)
+
+
+def replay_changes(db: Session, user_id: UUID, after_event_id: int, limit: int) -> list[ChangeEvent]:
+    """
+    保持しているイベントのうち、指定したIDより後のユーザーのイベントを取得（SSE の再接続用）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        after_event_id: 受信済みの最後のイベントID
+        limit: 取得件数の上限
+
+    Returns:
+        イベント（event_id の昇順）
+    """
+    rows = db.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.user_id == user_id, OutboxEvent.event_id > after_event_id)
+        .order_by(OutboxEvent.event_id)
+        .limit(limit)
+    )
+    return [ChangeEvent.from_row(row) for row in rows]
+
+
+class OutboxRelay:
+    """
+    コミットされた変更イベントを読み出してプロセス内の購読者に配信する
+
+    `subscribe()` で登録したコールバックは、リレーのスレッドからイベントのリストを
+    受け取る（長い処理はコールバック内で別スレッド・イベントループに渡すこと）。
+    リレーは起動時点の最新のイベントより後から配信する。
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+        gap_timeout: float | None = None,
+        retention: timedelta | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval if poll_interval is not None else settings.OUTBOX_POLL_INTERVAL_SECONDS
+        self.gap_timeout = gap_timeout if gap_timeout is not None else settings.OUTBOX_GAP_TIMEOUT_SECONDS
+        self.retention = retention or timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        self._subscribers: list[Callable[[list[ChangeEvent]], None]] = []
+        self._lock = threading.Lock()
+        # この ID 以下はすべて配信済み（または欠番として諦めた）
+        self._floor: int | None = None
+        # _floor より後で配信済みの ID と、未到着の欠番（ID -> 最初に見つけた時刻）
+        self._seen: set[int] = set()
+        self._gaps: dict[int, float] = {}
+        self._next_prune = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, callback: Callable[[list[ChangeEvent]], None]) -> Callable[[], None]:
+        """
+        イベントの購読を登録
+
+        Args:
+            callback: イベントのリストを受け取る関数
+
+        Returns:
+            購読を解除する関数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _publish(self, events: list[ChangeEvent]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(events)
+            except Exception:
+                logger.exception("変更イベントの購読者でエラーが発生しました")
+
+    def poll(self) -> int:
+        """
+        コミット済みの未配信イベントを読み出して配信
+
+        Returns:
+            配信したイベントの件数
+        """
+        with self.session_factory() as db:
+            if self._floor is None:
+                self._floor = db.execute(select(func.coalesce(func.max(OutboxEvent.event_id), 0))).scalar_one()
+            rows = db.scalars(
+                select(OutboxEvent)
+                .where(OutboxEvent.event_id > self._floor)
+                .order_by(OutboxEvent.event_id)
+                .limit(self.batch_size)
+            ).all()
+            events = [ChangeEvent.from_row(row) for row in rows if row.event_id not in self._seen]
+
+        now = time.monotonic()
+        previous_top = max(self._seen, default=self._floor)
+        for change in events:
+            self._seen.add(change.event_id)
+            self._gaps.pop(change.event_id, None)
+        top = max(self._seen, default=self._floor)
+        for missing in range(previous_top + 1, top):
+            if missing not in self._seen:
+                self._gaps[missing] = now
+
+        # 連続して配信済み・期限切れの欠番になった範囲を _floor にまとめる
+        while True:
+            following = self._floor + 1
+            if following in self._seen:
+                self._seen.remove(following)
+            elif following in self._gaps and now - self._gaps[following] >= self.gap_timeout:
+                del self._gaps[following]
+            else:
+                break
+            self._floor = following
+
+        if events:
+            self._publish(events)
+        return len(events)
+
+    def prune(self) -> int:
+        """
+        保持期間を過ぎたイベントを削除
+
+        Returns:
+            削除した件数
+        """
+        with self.session_factory() as db:
+            result = db.execute(delete(OutboxEvent).where(OutboxEvent.created_at < datetime.utcnow() - self.retention))
+            db.commit()
+            return result.rowcount
+
+    def _wait(self, listener) -> None:
+        """新しいイベントの通知（PostgreSQL）または確認間隔の経過を待つ"""
+        if listener is None:
+            self._stop.wait(self.poll_interval)
+            return
+        readable, _, _ = select_module.select([listener], [], [], self.poll_interval)
+        if readable:
+            listener.poll()
+            listener.notifies.clear()
+
+    def _listen(self):
+        """PostgreSQL（psycopg2）の場合、NOTIFY を受け取る接続を開く"""
+        engine = get_engine()
+        if engine.dialect.name != "postgresql" or engine.dialect.driver != "psycopg2":
+            return None
+        # プールに戻さない専用の接続にする（LISTEN と autocommit を他の処理に持ち込まない）
+        raw = engine.raw_connection()
+        raw.detach()
+        connection = raw.dbapi_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return connection
+
+    def _run(self) -> None:
+        listener = None
+        while not self._stop.is_set():
+            try:
+                if listener is None:
+                    listener = self._listen()
+                # 1回で読み切れなかった場合は待たずに続ける
+                while self.poll() >= self.batch_size:
+                    pass
+                if time.monotonic() >= self._next_prune:
+                    self.prune()
+                    self._next_prune = time.monotonic() + 3600
+                self._wait(listener)
+            except Exception:
+                logger.exception("変更イベントのリレーでエラーが発生しました")
+                if listener is not None:
+                    listener.close()
+                    listener = None
+                self._stop.wait(self.poll_interval)
+        if listener is not None:
+            listener.close()
+
+    def start(self) -> None:
+        """リレーのスレッドを開始"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """リレーのスレッドを停止"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.poll_interval + 5)
+        self._thread = None
+
+
+# API プロセス内で共有するリレー（main の lifespan で開始・停止する）
+outbox_relay = OutboxRelay()
@@ -0,0 +1,247 @@
+"""レート制限と同時実行数の制御（アドミッションコントロール）
+
+リクエストを処理する前に次の順で判定し、超過したリクエストはアプリケーションに渡さずに返す。
+
+1. クライアント単位のトークンバケット（JWT の sub、トークンがなければ接続元IP）→ 429
+2. クライアント単位の同時実行数 → 429
+3. プロセス全体の同時実行数（DB接続プールが枯渇する前に打ち切る）→ 一定時間待って空かなければ 503
+
+トークンバケットはプロセス内メモリで管理するほか、RATE_LIMIT_REDIS_URL を設定すると
+Redis（redis パッケージが必要）で全ワーカー共通に管理する。同時実行数はプロセス単位。
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.security import decode_access_token
+
+
+class RateLimitBackend(Protocol):
+    """トークンバケットの保存先"""
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        """
+        トークンを1つ消費
+
+        Returns:
+            0（許可）または次のトークンが補充されるまでの秒数（拒否）
+        """
+        ...
+
+
+class MemoryRateLimitBackend:
+    """プロセス内メモリのトークンバケット（ワーカーごとに独立して数える）"""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (残りトークン数, 最終更新時刻)。最近使われたものが末尾
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            # 長く使われていないバケットから捨てる（満タンに戻っているものと同じ扱いになる）
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# トークンバケットを1回の往復で原子的に更新するスクリプト（時刻は Redis サーバーの時計を使う）
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Redis（RESP 互換サーバー）のトークンバケット（全ワーカー・全ホストで共通に数える）
+
+    Redis に接続できない場合はリクエストを許可する（レート制限の障害でAPIを止めない）。
+    """
+
+    def __init__(self, url: str, prefix: str = "kakeibon:ratelimit:") -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS_URL を使うには redis パッケージが必要です（ratelimit extra）"
+            ) from e
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        try:
+            result = await self._script(keys=[self.prefix + key], args=[rate, burst])
+        except Exception:
+            return 0.0
+        return float(result)
+
+
+class AdmissionControlMiddleware:
+    """
+    レート制限と同時実行数の上限を適用するASGIミドルウェア
+
+    除外パスに前方一致するリクエスト（ヘルスチェックなど）は制限しない。
+    プロセス全体の枠はレスポンスの開始（http.response.start）で返す。本文の送信（スナップショットの
+    エクスポートなどのストリーミングを含む）はクライアントの受信速度に依存するため、遅いクライアントが
+    他のリクエストの枠を占有しないようにする。クライアント単位の同時実行数は本文の送信が終わるまで数える。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate_per_second: float = 10.0,
+        burst: int = 50,
+        max_concurrent_per_client: int = 8,
+        max_concurrent: int = 15,
+        queue_timeout_seconds: float = 0.5,
+        exclude_paths: list[str] | None = None,
+        backend: RateLimitBackend | None = None,
+    ) -> None:
+        self.app = app
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrent_per_client = max_concurrent_per_client
+        self.max_concurrent = max_concurrent
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.exclude_paths = tuple(exclude_paths or [])
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self._in_flight: dict[str, int] = {}
+        # セマフォはイベントループに紐づくため、最初のリクエストで作成する
+        self._semaphore: asyncio.Semaphore | None = None
+        # 検証済みトークン -> (sub, 有効期限)。リクエストごとの署名検証を省く
+        self._token_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._token_cache_size = 10_000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        client_key = self._client_key(scope)
+
+        retry_after = await self.backend.acquire(client_key, self.rate_per_second, self.burst)
+        if retry_after > 0:
+            await self._reject(send, 429, "リクエストが多すぎます。しばらく待ってから再度お試しください", retry_after)
+            return
+
+        in_flight = self._in_flight.get(client_key, 0)
+        if in_flight >= self.max_concurrent_per_client:
+            await self._reject(send, 429, "同時に実行できるリクエスト数を超えています", 1)
+            return
+
+        # 待機中のリクエストもクライアントの同時実行数に含める
+        self._in_flight[client_key] = in_flight + 1
+        try:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout_seconds)
+            except asyncio.TimeoutError:
+                await self._reject(send, 503, "サーバーが混み合っています。しばらく待ってから再度お試しください", 1)
+                return
+            semaphore = self._semaphore
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    semaphore.release()
+
+            async def send_and_release(message) -> None:
+                if message["type"] == "http.response.start":
+                    release()
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_and_release)
+            finally:
+                release()
+        finally:
+            remaining = self._in_flight[client_key] - 1
+            if remaining:
+                self._in_flight[client_key] = remaining
+            else:
+                del self._in_flight[client_key]
+
+    def _client_key(self, scope: Scope) -> str:
+        """
+        レート制限の単位となるクライアントのキーを決定
+
+        署名を検証できた JWT の sub を使い、トークンがない・無効な場合は接続元IPを使う
+        （偽造したトークンで他人の枠を消費できないようにするため）。
+        """
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            subject = self._verified_subject(token)
+            if subject is not None:
+                return f"user:{subject}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _verified_subject(self, token: str) -> str | None:
+        """トークンを検証して sub を取得（検証結果は有効期限までキャッシュする）"""
+        now = time.time()
+        cached = self._token_cache.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        payload = decode_access_token(token)
+        if payload is None or payload.get("sub") is None:
+            return None
+        subject = str(payload["sub"])
+        self._token_cache[token] = (subject, float(payload.get("exp", now)))
+        while len(self._token_cache) > self._token_cache_size:
+            self._token_cache.popitem(last=False)
+        return subject
+
+    @staticmethod
+    async def _reject(send: Send, status_code: int, detail: str, retry_after: float) -> None:
+        """リクエストをアプリケーションに渡さずにエラーを返す"""
+        body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,117 @@
+"""読み取りレプリカの選択とヘルスチェック"""
+import hashlib
+import itertools
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+
+class ReplicaSet:
+    """
+    読み取りレプリカの集合
+
+    ラウンドロビンでレプリカを選び、接続エラーが起きたレプリカは一定時間選択から外す。
+    外したレプリカは待機時間の経過後に最初に選ばれたときに SELECT 1 で確認し、
+    応答すれば復帰させる。すべてのレプリカが使えない場合は None を返す（呼び出し側でプライマリを使う）。
+    """
+
+    def __init__(self, engines: list[Engine], retry_seconds: float = 30.0) -> None:
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        # レプリカのインデックス -> 再確認してよい時刻（time.monotonic）
+        self._unhealthy_until: dict[int, float] = {}
+        for index, engine in enumerate(engines):
+            event.listen(engine, "handle_error", self._make_error_handler(index))
+
+    def choose(self) -> Engine | None:
+        """
+        次に使うレプリカを選択
+
+        Returns:
+            健全なレプリカのエンジン（なければNone）
+        """
+        count = len(self.engines)
+        start = next(self._counter)
+        for offset in range(count):
+            index = (start + offset) % count
+            with self._lock:
+                retry_at = self._unhealthy_until.get(index)
+            if retry_at is None:
+                return self.engines[index]
+            if time.monotonic() >= retry_at and self._probe(index):
+                return self.engines[index]
+        return None
+
+    def mark_unhealthy(self, index: int) -> None:
+        """レプリカを一定時間選択から外す"""
+        with self._lock:
+            self._unhealthy_until[index] = time.monotonic() + self.retry_seconds
+
+    def healthy_count(self) -> int:
+        """現在選択対象になっているレプリカの数"""
+        with self._lock:
+            return len(self.engines) - len(self._unhealthy_until)
+
+    def dispose(self, close: bool = True) -> None:
+        """すべてのレプリカの接続プールを破棄"""
+        for engine in self.engines:
+            engine.dispose(close=close)
+
+    def _probe(self, index: int) -> bool:
+        """SELECT 1 でレプリカの復帰を確認"""
+        try:
+            with self.engines[index].connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except SQLAlchemyError:
+            self.mark_unhealthy(index)
+            return False
+        with self._lock:
+            self._unhealthy_until.pop(index, None)
+        return True
+
+    def _make_error_handler(self, index: int):
+        def _on_error(context) -> None:
+            # 接続断や接続失敗が起きたレプリカは選択から外す
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                self.mark_unhealthy(index)
+
+        return _on_error
+
+
+class RecentWriters:
+    """
+    直近に書き込みを行ったクライアントを記録する（read-after-write 用）
+
+    書き込み直後の読み取りがレプリカの遅延で古いデータを返さないよう、
+    一定時間はそのクライアントの読み取りをプライマリに送るために使う。
+    記録はプロセス内のみで、トークンそのものではなくハッシュを保持する。
+    """
+
+    def __init__(self, window_seconds: float = 5.0, max_entries: int = 10000) -> None:
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._expires_at: dict[str, float] = {}
+
+    @staticmethod
+    def _key(client_key: str) -> str:
+        return hashlib.sha1(client_key.encode("utf-8")).hexdigest()
+
+    def mark(self, client_key: str) -> None:
+        """クライアントが書き込みを行ったことを記録"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._expires_at) >= self.max_entries:
+                self._expires_at = {k: v for k, v in self._expires_at.items() if v > now}
+            self._expires_at[self._key(client_key)] = now + self.window_seconds
+
+    def is_recent(self, client_key: str) -> bool:
+        """クライアントが直近に書き込みを行ったか判定"""
+        with self._lock:
+            expires_at = self._expires_at.get(self._key(client_key))
+        return expires_at is not None and expires_at > time.monotonic()
@@ -1,11 +1,23 @@
-"""セキュリティ関連の機能（パスワードハッシュ化、JWTトークン生成・検証）"""
+"""セキュリティ関連の機能（パスワードハッシュ化、JWTトークン生成・検証）
+
+bcrypt と python-jose（cryptography）は読み込みが重いため、
+起動時間を短くするよう各関数の初回呼び出し時にインポートする。
+"""
 from datetime import datetime, timedelta
 from typing import Optional
 
-import bcrypt
-from jose import JWTError, jwt
+from app.core.config import get_settings
+
 
-from app.core.config import settings
+def preload_crypto_modules() -> None:
+    """
+    bcrypt と python-jose を事前に読み込む
+
+    preload するサーバー（gunicorn）のマスタープロセスで呼び出すと、
+    読み込み済みのモジュールをフォークしたワーカー間で共有できる。
+    """
+    import bcrypt  # noqa: F401
+    from jose import jwt  # noqa: F401
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -23,6 +35,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         bcryptは72バイトまでのパスワードしか処理できないため、
         自動的に切り詰めます。
     """
+    import bcrypt
+
     # bcryptの72バイト制限に対応
     password_bytes = plain_password.encode('utf-8')
     if len(password_bytes) > 72:
@@ -48,6 +62,8 @@ def get_password_hash(password: str) -> str:
         bcryptは72バイトまでのパスワードしか処理できないため、
         自動的に切り詰めます。
     """
+    import bcrypt
+
     # bcryptの72バイト制限に対応
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
@@ -72,6 +88,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         生成されたJWTトークン
     """
+    from jose import jwt
+
+    settings = get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -94,6 +113,9 @@ def decode_access_token(token: str) -> Optional[dict]:
     Returns:
         デコードされたペイロード、無効な場合はNone
     """
+    from jose import JWTError, jwt
+
+    settings = get_settings()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
@@ -0,0 +1,255 @@
+"""アカウント単位のスナップショット形式（msgpack）
+
+スナップショットは msgpack オブジェクトの連続で、次の順に並ぶ。
+
+    1. ヘッダー  {"format": "kakeibon-snapshot", "version": 4, "exported_at": ..., "user": {...}}
+    2. チャンク  {"table": テーブル名, "columns": [列名, ...], "rows": [[値, ...], ...]}
+    3. フッター  {"end": True, "counts": {テーブル名: 件数}}
+
+チャンクは categories → tags → budgets → transactions → transaction_tags の順に並ぶため、
+読み込み側はIDの対応表を作りながら先頭から順に処理できる。列名はチャンクごとに1回だけ書き、
+UUID は16バイトのバイナリ、日付は序数、日時はUNIXエポックからのマイクロ秒で表す。
+"""
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Iterable, Iterator
+from uuid import UUID
+
+SNAPSHOT_FORMAT = "kakeibon-snapshot"
+SNAPSHOT_VERSION = 4
+# 読み込みに対応するバージョン（古いバージョンにない列は SNAPSHOT_DEFAULTS で補い、ないテーブルは0件として扱う）
+SNAPSHOT_READABLE_VERSIONS = (1, 2, 3, 4)
+SNAPSHOT_MEDIA_TYPE = "application/vnd.kakeibon.snapshot+msgpack"
+# 1チャンクあたりの行数
+SNAPSHOT_CHUNK_ROWS = 5000
+
+# テーブルごとの列と値の種類（出力順）
+SNAPSHOT_TABLES: dict[str, list[tuple[str, str]]] = {
+    "categories": [
+        ("category_id", "uuid"),
+        ("name", "str"),
+        ("type", "enum"),
+        ("color", "str"),
+        ("is_recurring", "bool"),
+        ("frequency", "enum"),
+        ("default_amount", "int"),
+        ("created_at", "datetime"),
+    ],
+    "tags": [
+        ("tag_id", "uuid"),
+        ("name", "str"),
+        ("color", "str"),
+        ("created_at", "datetime"),
+    ],
+    "budgets": [
+        ("budget_id", "uuid"),
+        ("category_id", "uuid"),
+        ("amount", "int"),
+        ("month", "date"),
+        ("created_at", "datetime"),
+    ],
+    "transactions": [
+        ("transaction_id", "uuid"),
+        ("category_id", "uuid"),
+        ("amount", "int"),
+        ("currency", "str"),
+        ("type", "enum"),
+        ("date", "date"),
+        ("memo", "str"),
+        ("external_id", "str"),
+        ("created_at", "datetime"),
+    ],
+    "transaction_tags": [
+        ("transaction_id", "uuid"),
+        ("tag_id", "uuid"),
+    ],
+}
+
+# 古いバージョンのスナップショットにない列の既定値
+SNAPSHOT_DEFAULTS: dict[str, dict[str, Any]] = {
+    "transactions": {"currency": "JPY", "external_id": None},
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SnapshotFormatError(ValueError):
+    """スナップショットの形式が正しくない場合の例外"""
+
+
+def _encode_value(value: Any) -> Any:
+    """Python の値を msgpack で表現できる値に変換"""
+    if isinstance(value, UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        return (value - _EPOCH) // timedelta(microseconds=1)
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+_DECODERS = {
+    "uuid": lambda value: UUID(bytes=value),
+    "date": date.fromordinal,
+    "datetime": lambda value: _EPOCH + timedelta(microseconds=value),
+}
+
+
+def encode_rows(rows: Iterable[tuple]) -> list[list[Any]]:
+    """
+    行を msgpack で表現できる値の配列に変換
+
+    Args:
+        rows: SNAPSHOT_TABLES の列順に並んだ行
+
+    Returns:
+        変換後の行
+    """
+    return [[_encode_value(value) for value in row] for row in rows]
+
+
+def decode_rows(table: str, columns: list[str], rows: list[list[Any]]) -> list[dict[str, Any]]:
+    """
+    チャンクの行を列名をキーとする辞書に変換
+
+    Args:
+        table: テーブル名
+        columns: チャンクの列名
+        rows: チャンクの行
+
+    Returns:
+        列名をキーとする辞書のリスト（enum 列は値の文字列のまま）
+
+    Raises:
+        SnapshotFormatError: 列が一致しない、または値を変換できない場合
+    """
+    kinds = dict(SNAPSHOT_TABLES[table])
+    defaults = {
+        column: value
+        for column, value in SNAPSHOT_DEFAULTS.get(table, {}).items()
+        if column not in columns
+    }
+    if sorted([*columns, *defaults]) != sorted(kinds):
+        raise SnapshotFormatError(f"{table} の列が一致しません")
+
+    decoders = [_DECODERS.get(kinds[column]) for column in columns]
+    try:
+        return [
+            {
+                **defaults,
+                **{
+                    column: decoder(value) if decoder is not None and value is not None else value
+                    for column, decoder, value in zip(columns, decoders, row, strict=True)
+                },
+            }
+            for row in rows
+        ]
+    except (TypeError, ValueError, OverflowError) as e:
+        raise SnapshotFormatError(f"{table} の値を読み込めません") from e
+
+
+def pack_snapshot(user: dict[str, Any], tables: Iterable[tuple[str, Iterable[list[tuple]]]]) -> Iterator[bytes]:
+    """
+    スナップショットを msgpack のバイト列として順に生成
+
+    Args:
+        user: ヘッダーに含めるユーザー情報
+        tables: (テーブル名, 行のまとまりのイテラブル) の並び
+
+    Yields:
+        ヘッダー・チャンク・フッターそれぞれのバイト列
+    """
+    import msgpack
+
+    packer = msgpack.Packer()
+    yield packer.pack({
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "exported_at": _encode_value(datetime.utcnow()),
+        "user": user,
+    })
+
+    counts: dict[str, int] = {}
+    for table, partitions in tables:
+        columns = [column for column, _ in SNAPSHOT_TABLES[table]]
+        counts[table] = 0
+        for rows in partitions:
+            counts[table] += len(rows)
+            yield packer.pack({"table": table, "columns": columns, "rows": encode_rows(rows)})
+
+    yield packer.pack({"end": True, "counts": counts})
+
+
+class SnapshotReader:
+    """
+    スナップショットを受信したバイト列から順に読み出す
+
+    `feed()` で受け取ったバイト列を渡し、`read()` で読み出せるようになった
+    チャンクを取り出す。ヘッダーとフッターの検証も行う。
+    """
+
+    def __init__(self, max_buffer_size: int = 64 * 1024 * 1024) -> None:
+        import msgpack
+
+        self._unpacker = msgpack.Unpacker(max_buffer_size=max_buffer_size)
+        self.header: dict[str, Any] | None = None
+        self.footer: dict[str, Any] | None = None
+
+    def feed(self, data: bytes) -> None:
+        """受信したバイト列を追加"""
+        if self.footer is not None and data:
+            raise SnapshotFormatError("フッターの後にデータがあります")
+        try:
+            self._unpacker.feed(data)
+        except Exception as e:
+            raise SnapshotFormatError("スナップショットが大きすぎるか壊れています") from e
+
+    def read(self) -> Iterator[tuple[str, list[dict[str, Any]]]]:
+        """
+        読み出せるチャンクを順に取り出す
+
+        Yields:
+            (テーブル名, 行のリスト)
+
+        Raises:
+            SnapshotFormatError: 形式が正しくない場合
+        """
+        try:
+            for obj in self._unpacker:
+                if not isinstance(obj, dict):
+                    raise SnapshotFormatError("スナップショットの形式が正しくありません")
+                if self.header is None:
+                    if obj.get("format") != SNAPSHOT_FORMAT:
+                        raise SnapshotFormatError("スナップショットの形式が正しくありません")
+                    if obj.get("version") not in SNAPSHOT_READABLE_VERSIONS:
+                        raise SnapshotFormatError(f"対応していないバージョンです: {obj.get('version')}")
+                    self.header = obj
+                elif self.footer is not None:
+                    raise SnapshotFormatError("フッターの後にデータがあります")
+                elif obj.get("end"):
+                    self.footer = obj
+                elif obj.get("table") in SNAPSHOT_TABLES:
+                    table = obj["table"]
+                    yield table, decode_rows(table, obj.get("columns") or [], obj.get("rows") or [])
+                else:
+                    raise SnapshotFormatError("不明なチャンクがあります")
+        except SnapshotFormatError:
+            raise
+        except Exception as e:
+            raise SnapshotFormatError("スナップショットが壊れています") from e
+
+    def finish(self) -> dict[str, int]:
+        """
+        読み込みの完了を確認
+
+        Returns:
+            フッターに記録された件数
+
+        Raises:
+            SnapshotFormatError: フッターがない（途中で切れている）場合
+        """
+        if self.header is None or self.footer is None:
+            raise SnapshotFormatError("スナップショットが途中で切れています")
+        return self.footer.get("counts") or {}
@@ -0,0 +1,86 @@
+"""データベースの方言（PostgreSQL / SQLite）の差異を吸収するSQLヘルパー"""
+from sqlalchemy import Date, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+
+def upsert_insert(db: Session, model):
+    """
+    ON CONFLICT 句を使える INSERT 文を接続先の方言で生成
+
+    PostgreSQL と SQLite の INSERT はどちらも on_conflict_do_update / on_conflict_do_nothing
+    （index_elements 指定）と excluded を同じ形で使える。
+
+    Args:
+        db: データベースセッション
+        model: 登録先のモデル
+
+    Returns:
+        INSERT 文
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+class trunc_date(FunctionElement):
+    """
+    日付を集計単位の先頭日に切り捨てる式（週は月曜始まり）
+
+    集計単位（day / week / month / quarter / year）は検証済みの値を渡すこと（SQLにそのまま埋め込む）。
+    """
+
+    type = Date()
+    inherit_cache = True
+    # 集計単位ごとに別のSQLになるため、文のキャッシュキーに含める
+    _traverse_internals = FunctionElement._traverse_internals + [("granularity", InternalTraversal.dp_string)]
+
+    def __init__(self, granularity: str, column) -> None:
+        self.granularity = granularity
+        super().__init__(column)
+
+
+@compiles(trunc_date)
+def _compile_trunc_date(element, compiler, **kw):
+    # date のままだと timestamptz に変換されセッションのタイムゾーンに依存するため timestamp で切り捨てる
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"CAST(date_trunc('{element.granularity}', CAST({column} AS TIMESTAMP)) AS DATE)"
+
+
+@compiles(trunc_date, "sqlite")
+def _compile_trunc_date_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    modifiers = {
+        "day": "",
+        # strftime('%w') は日曜が0のため、月曜からの経過日数に直して戻す
+        "week": f", '-' || ((CAST(strftime('%w', {column}) AS INTEGER) + 6) % 7) || ' days'",
+        "month": ", 'start of month'",
+        "quarter": (
+            f", 'start of month', '-' || ((CAST(strftime('%m', {column}) AS INTEGER) - 1) % 3) || ' months'"
+        ),
+        "year": ", 'start of year'",
+    }
+    return f"date({column}{modifiers[element.granularity]})"
+
+
+class days_between(FunctionElement):
+    """2つの日付の差（日数、end - start）"""
+
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _compile_days_between(element, compiler, **kw):
+    end, start = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"({end} - {start})"
+
+
+@compiles(days_between, "sqlite")
+def _compile_days_between_sqlite(element, compiler, **kw):
+    # 日付は 'YYYY-MM-DD' の文字列で保存されるため、ユリウス日に変換して引く
+    end, start = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CAST(julianday({end}) - julianday({start}) AS INTEGER)"
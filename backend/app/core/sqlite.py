@@ -0,0 +1,102 @@
+"""組み込みモード（SQLite）のエンジン設定
+
+DATABASE_URL に sqlite:///path/to/kakeibon.db を指定すると、PostgreSQL サーバーなしで動作する
+（1ユーザーでの利用・テスト用）。接続ごとに次の設定を行う。
+
+- WAL モード: 読み取りが書き込みを待たず、書き込みも読み取りを待たない
+- synchronous=NORMAL: WAL ではコミットごとの fsync を省いても破損しない（電源断で直近のコミットは失われうる）
+- foreign_keys=ON: ON DELETE CASCADE を有効にする（SQLite の既定は無効）
+- busy_timeout: 他のプロセス（ワーカーなど）が書き込み中の場合に待つ時間
+
+SQLite の書き込みは同時に1つしか実行できないため、プロセス内の書き込みトランザクションは
+ロック（SqliteWriterLock）で順番に実行する。SQLite のビジー待ち（スリープしながらの再試行）を
+スレッド間で起こさないため、書き込みが集中しても待ち時間が伸びにくい。
+"""
+import sqlite3
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 書き込みを開始する文（pysqlite はこれらの文の前に暗黙に BEGIN を発行する）
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def is_sqlite_url(url: str) -> bool:
+    """DATABASE_URL が SQLite か"""
+    return url.startswith("sqlite")
+
+
+class SqliteWriterLock:
+    """
+    プロセス内の書き込みトランザクションを1つずつ実行するロック
+
+    最初の書き込み文の実行前に取得し、接続がプールに返される（コミット・ロールバック後）ときに解放する。
+    コミットがリクエストと別のスレッドで行われる場合があるため、スレッドに紐づかない Lock を使う。
+    """
+
+    def __init__(self, timeout_seconds: float) -> None:
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, info: dict) -> None:
+        """
+        接続が書き込みロックを持っていなければ取得
+
+        Raises:
+            sqlite3.OperationalError: タイムアウトまでに取得できない場合
+        """
+        if info.get("sqlite_writer"):
+            return
+        if not self._lock.acquire(timeout=self.timeout_seconds):
+            raise sqlite3.OperationalError("database is locked")
+        info["sqlite_writer"] = True
+
+    def release(self, info: dict) -> None:
+        """接続が書き込みロックを持っていれば解放"""
+        if info.pop("sqlite_writer", False):
+            self._lock.release()
+
+
+def configure_sqlite_engine(engine: Engine, busy_timeout_seconds: float) -> SqliteWriterLock:
+    """
+    SQLite のエンジンに接続時の PRAGMA と書き込みロックを設定
+
+    Args:
+        engine: SQLite のエンジン
+        busy_timeout_seconds: 書き込みの待ち時間の上限
+
+    Returns:
+        エンジンの書き込みロック
+    """
+    writer_lock = SqliteWriterLock(busy_timeout_seconds)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_seconds * 1000)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # ページキャッシュ 64MiB（負の値は KiB 単位）、メモリマップ 256MiB
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _acquire_writer(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+            writer_lock.acquire(conn.info)
+
+    # セッションはコミット・ロールバックのたびに接続をプールへ返すため、返却時のリセットで解放する
+    # （commit イベントは実際のコミットより前に呼ばれるため使わない）
+    @event.listens_for(engine.pool, "reset")
+    def _release_writer_on_reset(dbapi_connection, connection_record, reset_state) -> None:
+        writer_lock.release(connection_record.info)
+
+    @event.listens_for(engine.pool, "invalidate")
+    def _release_writer_on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        writer_lock.release(connection_record.info)
+
+    return writer_lock
@@ -0,0 +1,267 @@
+"""メモからのカテゴリ推定
+
+ユーザーごとの取引履歴（メモ → カテゴリ）から、入力中のメモに合うカテゴリを推定する。
+メモは NFKC 正規化・小文字化・空白の統一を行い、数字の並びを1つの記号にまとめてから比較し
+（全角英数字や半角カナ、日付・伝票番号の違いを吸収）、完全一致がなければ文字の3-gram の Jaccard 係数（pg_trgm の similarity と同じ考え方）で似たメモを探す。
+
+インデックスはユーザー単位でプロセス内に保持し、LRU で追い出す。取引の書き込み時に差分を反映し、
+TTL（CACHE_TTL_SECONDS）が切れたら履歴から作り直す（他のワーカーでの書き込みはそれまで反映されない）。
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import read_from_replica
+from app.models.transaction import Transaction
+
+_WHITESPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+# 似たメモとみなす類似度の下限
+MIN_SIMILARITY = 0.3
+
+
+def normalize_memo(memo: str) -> str:
+    """比較用にメモを正規化（NFKC・小文字化・数字の並びを # に・連続する空白を1つに）"""
+    normalized = _DIGITS.sub("#", unicodedata.normalize("NFKC", memo).casefold())
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def trigrams(normalized: str) -> frozenset[str]:
+    """前後に空白を補った文字の3-gram の集合"""
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """推定結果"""
+    category_id: UUID
+    # 類似度 × そのメモでのカテゴリの使用割合（0〜1）
+    score: float
+    # 根拠になった過去のメモ（最初に登録されたときの表記）
+    memo: str
+
+
+class MemoIndex:
+    """1ユーザー分のメモ → カテゴリの索引（3-gram の転置索引付き）"""
+
+    def __init__(self) -> None:
+        # 正規化したメモ -> カテゴリごとの使用回数
+        self._categories: dict[str, Counter[UUID]] = {}
+        # 正規化したメモ -> 表示用の元のメモ
+        self._labels: dict[str, str] = {}
+        # 3-gram -> その3-gram を含む正規化したメモ
+        self._postings: dict[str, set[str]] = {}
+        # 正規化したメモ -> 3-gram の集合
+        self._grams: dict[str, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def add(self, memo: str | None, category_id: UUID, count: int = 1) -> None:
+        """
+        メモとカテゴリの組を追加（count が負の場合は取り除く）
+
+        Args:
+            memo: 取引のメモ（空の場合は何もしない）
+            category_id: カテゴリID
+            count: 追加する回数
+        """
+        if not memo:
+            return
+        key = normalize_memo(memo)
+        if not key:
+            return
+
+        counts = self._categories.get(key)
+        if counts is None:
+            if count <= 0:
+                return
+            counts = self._categories[key] = Counter()
+            self._labels[key] = memo
+            grams = self._grams[key] = trigrams(key)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+        counts[category_id] += count
+        if counts[category_id] <= 0:
+            del counts[category_id]
+        if not counts:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        del self._categories[key]
+        del self._labels[key]
+        for gram in self._grams.pop(key):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def _similar(self, grams: frozenset[str]) -> list[tuple[float, str]]:
+        """
+        類似度が MIN_SIMILARITY 以上のメモを探す
+
+        類似度の下限を満たすには ceil(MIN_SIMILARITY * |grams|) 個以上の3-gram が共通する必要があるため、
+        出現の少ない順に |grams| - その個数 + 1 個の3-gram のいずれかを含むメモだけを候補にする
+        （数字や空白を含むどのメモにも現れる3-gram の転置リストをたどらない）。
+        """
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        prefix = len(grams) - math.ceil(MIN_SIMILARITY * len(grams)) + 1
+        candidates = set().union(*postings[:prefix])
+
+        matches = []
+        for candidate in candidates:
+            candidate_grams = self._grams[candidate]
+            # 3-gram の数が大きく違うメモは共通部分を数えるまでもなく類似度が下限に届かない
+            if min(len(grams), len(candidate_grams)) < MIN_SIMILARITY * max(len(grams), len(candidate_grams)):
+                continue
+            overlap = len(grams & candidate_grams)
+            similarity = overlap / (len(grams) + len(candidate_grams) - overlap)
+            if similarity >= MIN_SIMILARITY:
+                matches.append((similarity, candidate))
+        return matches
+
+    def suggest(self, memo: str, limit: int = 3) -> list[Suggestion]:
+        """
+        メモに合うカテゴリを推定
+
+        Args:
+            memo: 入力されたメモ
+            limit: 返す件数の上限
+
+        Returns:
+            スコアの高い順の推定結果（カテゴリごとに1件）
+        """
+        key = normalize_memo(memo)
+        if not key:
+            return []
+
+        # 完全一致があれば3-gram の照合は行わない
+        if key in self._categories:
+            matches = [(1.0, key)]
+        else:
+            matches = self._similar(trigrams(key))
+
+        best: dict[UUID, Suggestion] = {}
+        for similarity, candidate in matches:
+            counts = self._categories[candidate]
+            total = sum(counts.values())
+            for category_id, count in counts.items():
+                score = similarity * count / total
+                current = best.get(category_id)
+                if current is None or score > current.score:
+                    best[category_id] = Suggestion(category_id, round(score, 4), self._labels[candidate])
+
+        return sorted(best.values(), key=lambda s: s.score, reverse=True)[:limit]
+
+
+class MemoSuggester:
+    """
+    ユーザーごとの MemoIndex を保持する（LRU・TTL付き）
+
+    索引がないユーザーは最初の推定時に履歴から作成する。書き込み時の差分反映（observe）は
+    索引を保持しているユーザーに対してのみ行う。
+    """
+
+    def __init__(self, max_users: int = 1000, ttl_seconds: float | None = None) -> None:
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # user_id -> (有効期限, 索引)。最近使われたものが末尾
+        self._indexes: OrderedDict[UUID, tuple[float, MemoIndex]] = OrderedDict()
+
+    def _load(self, db: Session, user_id: UUID) -> MemoIndex:
+        """履歴から索引を作成（同じメモ・カテゴリの組は SQL でまとめる）"""
+        index = MemoIndex()
+        rows = db.execute(
+            select(Transaction.memo, Transaction.category_id, func.count())
+            .where(Transaction.user_id == user_id, Transaction.memo.is_not(None))
+            .group_by(Transaction.memo, Transaction.category_id)
+        )
+        for memo, category_id, count in rows:
+            index.add(memo, category_id, count)
+        return index
+
+    def get_index(self, db: Session, user_id: UUID) -> MemoIndex:
+        """
+        ユーザーの索引を取得（ない、または期限切れの場合は作成）
+
+        Args:
+            db: データベースセッション
+            user_id: ユーザーID
+
+        Returns:
+            ユーザーの索引
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._indexes.move_to_end(user_id)
+                return entry[1]
+
+        index = self._load(db, user_id)
+        if read_from_replica(db):
+            # 反映が遅れている可能性があるため保持しない（保持後の書き込みは observe で反映されるが、
+            # 読み取り時点で未反映の書き込みは反映されない）
+            return index
+        ttl_seconds = self.ttl_seconds if self.ttl_seconds is not None else get_settings().CACHE_TTL_SECONDS
+        with self._lock:
+            self._indexes[user_id] = (time.monotonic() + ttl_seconds, index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def suggest(self, db: Session, user_id: UUID, memo: str, limit: int = 3) -> list[Suggestion]:
+        """
+        メモに合うカテゴリを推定
+
+        Args:
+            db: データベースセッション（索引の作成に使う）
+            user_id: ユーザーID
+            memo: 入力されたメモ
+            limit: 返す件数の上限
+
+        Returns:
+            スコアの高い順の推定結果
+        """
+        index = self.get_index(db, user_id)
+        with self._lock:
+            return index.suggest(memo, limit)
+
+    def observe(self, user_id: UUID, memo: str | None, category_id: UUID, count: int = 1) -> None:
+        """
+        書き込まれた取引を索引に反映（取引の削除・変更前の値は count=-1）
+
+        Args:
+            user_id: ユーザーID
+            memo: 取引のメモ
+            category_id: カテゴリID
+            count: 追加する回数
+        """
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None:
+                entry[1].add(memo, category_id, count)
+
+    def invalidate(self, user_id: UUID) -> None:
+        """ユーザーの索引を破棄（カテゴリの削除など、差分で反映できない変更の後に呼ぶ）"""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+# アプリケーション全体で共有する推定器
+memo_suggester = MemoSuggester()
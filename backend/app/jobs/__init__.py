@@ -0,0 +1,5 @@
+"""バックグラウンドジョブ"""
+from app.jobs.queue import enqueue_job, run_next_job
+from app.jobs.registry import get_handler, job_handler
+
+__all__ = ["enqueue_job", "run_next_job", "get_handler", "job_handler"]
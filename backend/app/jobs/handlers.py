@@ -0,0 +1,125 @@
+"""ジョブハンドラー"""
+import uuid
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.archive import archive_horizon, archive_transactions, archived_before, reaches_archive
+from app.core.balance import invalidate_balance_checkpoints
+from app.core.budget_alerts import SpendingChanges
+from app.core.currency import BASE_CURRENCY
+from app.core.dates import month_range
+from app.core.outbox import record_change
+from app.core.sql import upsert_insert
+from app.jobs.registry import job_handler
+from app.models.archive import ArchivedTransaction
+from app.models.category import Category
+from app.models.job import Job
+from app.models.transaction import Transaction
+
+
+@job_handler("recurring.generate")
+def generate_recurring_transactions(db: Session, job: Job) -> dict:
+    """
+    対象月に未登録の固定費を既定金額で一括登録
+
+    既定金額が設定された固定費カテゴリのうち、対象月に取引がないものについて
+    月初日付の取引を作成する。同じ月に対して再実行しても二重には登録しない。
+    取引の明細IDは (カテゴリ, 月) から決まる値にし、同じ月のジョブが並行して実行された場合も
+    一意インデックスの衝突として読み飛ばす。
+
+    Args:
+        db: データベースセッション
+        job: ジョブ（payload: {"month": "YYYY-MM-DD"}）
+
+    Returns:
+        作成した取引の件数とID
+    """
+    start_date, end_date = month_range(date.fromisoformat(job.payload["month"]))
+
+    has_transaction_in_month = (
+        select(Transaction.transaction_id)
+        .where(
+            Transaction.category_id == Category.category_id,
+            Transaction.date >= start_date,
+            Transaction.date <= end_date,
+        )
+        .exists()
+    )
+    conditions = [
+        Category.user_id == job.user_id,
+        # 部分インデックス（ix_categories_user_id_recurring）の条件と同じ形で書く
+        Category.is_recurring,
+        Category.default_amount.isnot(None),
+        ~has_transaction_in_month,
+    ]
+    if reaches_archive(archived_before(db, job.user_id), start_date):
+        # アーカイブ済みの月は移した取引も確認する
+        conditions.append(
+            ~select(ArchivedTransaction.transaction_id)
+            .where(
+                ArchivedTransaction.category_id == Category.category_id,
+                ArchivedTransaction.date >= start_date,
+                ArchivedTransaction.date <= end_date,
+            )
+            .exists()
+        )
+    categories = db.query(Category).filter(*conditions).all()
+
+    rows = [
+        {
+            "transaction_id": uuid.uuid4(),
+            "user_id": job.user_id,
+            "category_id": category.category_id,
+            "amount": category.default_amount,
+            "currency": BASE_CURRENCY,
+            "type": category.type,
+            "date": start_date,
+            "memo": category.name,
+            "external_id": f"recurring:{category.category_id}:{start_date:%Y-%m}",
+        }
+        for category in categories
+    ]
+    stmt = upsert_insert(db, Transaction).on_conflict_do_nothing(
+        index_elements=[Transaction.user_id, Transaction.external_id],
+        index_where=Transaction.external_id.is_not(None),
+    ).returning(Transaction.transaction_id)
+    created_ids = set(db.scalars(stmt, rows)) if rows else set()
+    created = [row for row in rows if row["transaction_id"] in created_ids]
+    if created:
+        invalidate_balance_checkpoints(db, job.user_id, start_date)
+        spending = SpendingChanges(db)
+        for row in created:
+            spending.add(row["category_id"], row["type"], row["amount"], row["currency"], row["date"])
+        spending.apply(job.user_id)
+        record_change(db, job.user_id, "transaction", "created")
+
+    return {
+        "created": len(created),
+        "transaction_ids": [str(row["transaction_id"]) for row in created],
+    }
+
+
+@job_handler("transactions.archive")
+def archive_old_transactions(db: Session, job: Job) -> dict:
+    """
+    保存期間を過ぎた月の取引をアーカイブ（transaction_archive）に移す
+
+    取引の内容は変わらないため、残高のチェックポイント・予算アラート用の支出の合計・
+    変更イベントは更新しない。同じ境界で再実行しても移す取引がなければ何もしない。
+
+    Args:
+        db: データベースセッション
+        job: ジョブ（payload: {"months": 当月を含めて残す月数}、省略時は TRANSACTION_ARCHIVE_AFTER_MONTHS）
+
+    Returns:
+        移した取引の件数と境界
+    """
+    before = archive_horizon(months=job.payload.get("months"))
+    if before is None:
+        return {"archived": 0, "before": None}
+    return {
+        "archived": archive_transactions(db, job.user_id, before),
+        "before": before.isoformat(),
+    }
@@ -0,0 +1,263 @@
+"""テーブルをキューとして使うジョブの登録・取得・実行
+
+ワーカーは `SELECT ... FOR UPDATE SKIP LOCKED` で実行待ちのジョブを1件ずつ取得するため、
+複数のワーカープロセスが同じジョブを二重に実行することはない。行ロックのない SQLite
+（組み込みモード）では、試行回数を条件にした UPDATE で先に取得したワーカーだけが実行する。
+実行中のジョブはロックの時刻（locked_at）を定期的に更新するため、実行に時間がかかっても
+他のワーカーに再取得されない。
+"""
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.sql import upsert_insert
+from app.jobs.registry import get_handler
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger("app.jobs")
+
+
+def enqueue_job(
+    db: Session,
+    user_id: UUID,
+    kind: str,
+    payload: dict[str, Any] | None = None,
+    max_attempts: int | None = None,
+    dedupe: bool = False,
+) -> Job:
+    """
+    ジョブをキューに登録
+
+    コミットは呼び出し側で行う。同じトランザクション内の他の書き込みと
+    まとめてコミットされるため、書き込みが失敗した場合はジョブも登録されない。
+
+    Args:
+        db: データベースセッション
+        user_id: ジョブを依頼したユーザーID
+        kind: ジョブ種別
+        payload: ハンドラーに渡すパラメータ
+        max_attempts: 最大試行回数（省略時は JOB_MAX_ATTEMPTS）
+        dedupe: True の場合、同じユーザー・種別・payload のジョブが実行待ちか実行中であれば
+            登録せずにそのジョブを返す
+
+    Returns:
+        登録されたジョブ（重複した場合は実行待ち・実行中のジョブ）
+
+    Raises:
+        ValueError: ジョブ種別のハンドラーが登録されていない場合
+    """
+    if get_handler(kind) is None:
+        raise ValueError(f"ジョブ種別 {kind!r} のハンドラーが登録されていません")
+
+    values = {
+        "user_id": user_id,
+        "kind": kind,
+        "payload": payload or {},
+        "max_attempts": max_attempts or get_settings().JOB_MAX_ATTEMPTS,
+    }
+    if not dedupe:
+        job = Job(**values)
+        db.add(job)
+        db.flush()
+        return job
+
+    dedupe_key = hashlib.sha256(json.dumps(values["payload"], sort_keys=True).encode()).hexdigest()
+    while True:
+        # 一意インデックスの衝突として読み飛ばし、並行して登録されたジョブも重複させない
+        job_id = db.scalar(
+            upsert_insert(db, Job)
+            .values(job_id=uuid.uuid4(), dedupe_key=dedupe_key, **values)
+            .on_conflict_do_nothing(
+                index_elements=[Job.user_id, Job.kind, Job.dedupe_key],
+                index_where=Job.dedupe_key.is_not(None),
+            )
+            .returning(Job.job_id)
+        )
+        if job_id is None:
+            # 衝突したジョブがこの間に終了していた場合は見つからないため、登録し直す
+            job_id = db.scalar(
+                select(Job.job_id).where(Job.user_id == user_id, Job.kind == kind, Job.dedupe_key == dedupe_key)
+            )
+        if job_id is not None:
+            return db.get(Job, job_id)
+
+
+def _claim_job(db: Session, worker_id: str) -> Job | None:
+    """
+    実行可能なジョブを1件取得して実行中にする
+
+    実行待ちで実行時刻を過ぎたジョブに加え、ロックの期限が切れた実行中のジョブ
+    （ワーカーが異常終了したもの）も再取得の対象にする。
+
+    Args:
+        db: データベースセッション
+        worker_id: ワーカーの識別子
+
+    Returns:
+        取得したジョブ（実行可能なジョブがない場合は None）
+    """
+    settings = get_settings()
+    now = datetime.utcnow()
+    lock_expired_at = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+
+    while True:
+        job = (
+            db.query(Job)
+            .filter(
+                or_(
+                    and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+                    and_(Job.status == JobStatus.RUNNING, Job.locked_at < lock_expired_at),
+                )
+            )
+            .order_by(Job.run_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.job_id == job.job_id, Job.attempts == job.attempts)
+            .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1, locked_by=worker_id, locked_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return job
+        # 他のワーカーが先に取得した（SKIP LOCKED が使えない SQLite の場合のみ起こる）ため次のジョブを探す
+
+
+def _record_failure(db: Session, job: Job, error: str) -> None:
+    """
+    失敗を記録し、試行回数が残っていれば指数バックオフで再登録する
+
+    Args:
+        db: データベースセッション
+        job: 失敗したジョブ
+        error: エラー内容
+    """
+    settings = get_settings()
+    now = datetime.utcnow()
+    job.error = error
+    job.locked_by = None
+    job.locked_at = None
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.QUEUED
+        job.run_at = now + timedelta(seconds=settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+    else:
+        job.status = JobStatus.FAILED
+        job.finished_at = now
+        job.dedupe_key = None
+    db.commit()
+
+
+@contextmanager
+def _heartbeat(job: Job, worker_id: str) -> Iterator[None]:
+    """
+    実行中のジョブのロックの時刻（locked_at）を定期的に更新する
+
+    ハンドラーのトランザクションとは別のセッションで、ロックの期限（JOB_LOCK_TIMEOUT_SECONDS）の
+    1/3 ごとに更新する。同じワーカーが同じ試行で実行中の場合のみ更新する。
+
+    Args:
+        job: 実行中のジョブ
+        worker_id: ワーカーの識別子
+    """
+    interval = get_settings().JOB_LOCK_TIMEOUT_SECONDS / 3
+    job_id, attempts = job.job_id, job.attempts
+    stop_event = threading.Event()
+
+    def beat() -> None:
+        while not stop_event.wait(interval):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(Job)
+                    .where(
+                        Job.job_id == job_id,
+                        Job.status == JobStatus.RUNNING,
+                        Job.locked_by == worker_id,
+                        Job.attempts == attempts,
+                    )
+                    .values(locked_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            except SQLAlchemyError:
+                # 次の間隔で再試行する（更新できないままロックの期限が切れた場合は再取得される）
+                db.rollback()
+                logger.exception("ジョブのロックの更新に失敗しました: %s", job_id)
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        # ハンドラーのトランザクションを終えてから止める（SQLite では更新が書き込みロックを待つため）
+        stop_event.set()
+        thread.join()
+
+
+def run_next_job(worker_id: str) -> bool:
+    """
+    実行可能なジョブを1件実行
+
+    ハンドラーの書き込みとジョブの完了は同じトランザクションでコミットする。
+    ハンドラーが例外を送出した場合はロールバックしてから失敗を記録する。
+
+    Args:
+        worker_id: ワーカーの識別子
+
+    Returns:
+        ジョブを実行した場合は True（キューが空の場合は False）
+    """
+    db = SessionLocal()
+    try:
+        job = _claim_job(db, worker_id)
+        if job is None:
+            return False
+
+        # ロック期限切れで再取得したジョブが試行回数を使い切っている場合
+        if job.attempts > job.max_attempts:
+            job.attempts = job.max_attempts
+            _record_failure(db, job, job.error or "ワーカーが応答しなくなったため中断されました")
+            return True
+
+        handler = get_handler(job.kind)
+        if handler is None:
+            job.attempts = job.max_attempts
+            _record_failure(db, job, f"ジョブ種別 {job.kind!r} のハンドラーが登録されていません")
+            return True
+
+        with _heartbeat(job, worker_id):
+            try:
+                result = handler(db, job)
+                job.status = JobStatus.SUCCEEDED
+                job.result = result
+                job.error = None
+                job.finished_at = datetime.utcnow()
+                job.locked_by = None
+                job.locked_at = None
+                job.dedupe_key = None
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                _record_failure(db, job, f"{type(e).__name__}: {e}")
+        return True
+    finally:
+        db.close()
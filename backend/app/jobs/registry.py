@@ -0,0 +1,53 @@
+"""ジョブ種別とハンドラーの対応表"""
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+
+# ハンドラーは (DBセッション, ジョブ) を受け取り、JSON化できる結果を返す
+JobHandler = Callable[[Session, Job], Any]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    ジョブ種別のハンドラーを登録するデコレーター
+
+    Args:
+        kind: ジョブ種別（例: "recurring.generate"）
+
+    Returns:
+        ハンドラーをそのまま返すデコレーター
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        if kind in _handlers:
+            raise ValueError(f"ジョブ種別 {kind!r} のハンドラーは既に登録されています")
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def get_handler(kind: str) -> JobHandler | None:
+    """
+    ジョブ種別に対応するハンドラーを取得
+
+    Args:
+        kind: ジョブ種別
+
+    Returns:
+        ハンドラー（未登録の場合は None）
+    """
+    # ハンドラーはインポート時に登録されるため、初回参照時に読み込む
+    import app.jobs.handlers  # noqa: F401
+
+    return _handlers.get(kind)
+
+
+def registered_kinds() -> list[str]:
+    """登録済みのジョブ種別一覧"""
+    import app.jobs.handlers  # noqa: F401
+
+    return sorted(_handlers)
@@ -1,17 +1,61 @@
 """FastAPI アプリケーションのエントリーポイント"""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import settings
-from app.api.endpoints import auth, categories, transactions, budgets
+from app.core.cache import invalidate_user_caches
+from app.core.compression import CompressionMiddleware, compression_stats
+from app.core.config import get_settings
+from app.core.database import init_embedded_database
+from app.core.outbox import ChangeEvent, outbox_relay
+from app.core.rate_limit import AdmissionControlMiddleware, RedisRateLimitBackend
+from app.api.endpoints import auth, categories, transactions, budgets, dashboard, jobs, snapshot, reports, tags, events, ledgers
+
+settings = get_settings()
+
+
+def _invalidate_changed_users(changes: list[ChangeEvent]) -> None:
+    """他のワーカー・ジョブでの書き込みも、TTL を待たずにこのプロセスのキャッシュへ反映する"""
+    for user_id in {change.user_id for change in changes}:
+        invalidate_user_caches(user_id)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動・終了時の処理"""
+    # 組み込みモード（SQLite）ではテーブルを作成する
+    init_embedded_database()
+    if settings.OUTBOX_RELAY_ENABLED:
+        unsubscribe = outbox_relay.subscribe(_invalidate_changed_users)
+        outbox_relay.start()
+    yield
+    if settings.OUTBOX_RELAY_ENABLED:
+        outbox_relay.stop()
+        unsubscribe()
+
 
 # FastAPIアプリケーションの作成
 app = FastAPI(
     title="Kakeibon API",
     description="家計簿アプリケーションのREST API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# レート制限・同時実行数の制御（CORS の内側に置き、429/503 にも CORS ヘッダーを付ける）
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        rate_per_second=settings.RATE_LIMIT_PER_SECOND,
+        burst=settings.RATE_LIMIT_BURST,
+        max_concurrent_per_client=settings.RATE_LIMIT_MAX_CONCURRENT_PER_CLIENT,
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        queue_timeout_seconds=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        exclude_paths=settings.RATE_LIMIT_EXCLUDE_PATHS,
+        backend=RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else None,
+    )
+
 # CORS設定
 app.add_middleware(
     CORSMiddleware,
@@ -21,11 +65,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# レスポンス圧縮設定
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=settings.COMPRESSION_ENCODINGS,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        exclude_paths=settings.COMPRESSION_EXCLUDE_PATHS,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
 # ルーター登録
 app.include_router(auth.router, prefix="/api/auth", tags=["認証"])
 app.include_router(categories.router, prefix="/api/categories", tags=["カテゴリ"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["取引"])
 app.include_router(budgets.router, prefix="/api/budgets", tags=["予算"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["ダッシュボード"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["ジョブ"])
+app.include_router(snapshot.router, prefix="/api/snapshot", tags=["スナップショット"])
+app.include_router(reports.router, prefix="/api/reports", tags=["レポート"])
+app.include_router(tags.router, prefix="/api/tags", tags=["タグ"])
+app.include_router(events.router, prefix="/api/events", tags=["変更イベント"])
+app.include_router(ledgers.router, prefix="/api/ledgers", tags=["共有台帳"])
 
 
 @app.get("/")
@@ -42,3 +106,11 @@ async def root():
 async def health_check():
     """ヘルスチェックエンドポイント"""
     return {"status": "ok"}
+
+
+if settings.COMPRESSION_METRICS_ENABLED:
+    # 内部向けのため、有効にした場合のみ登録し、API ドキュメントにも載せない
+    @app.get("/metrics/compression", include_in_schema=False)
+    async def compression_metrics():
+        """ルート別のレスポンス圧縮統計（削減バイト数・CPU時間）"""
+        return compression_stats.snapshot()
@@ -1,7 +1,15 @@
 """Database models"""
 from app.models.user import User
 from app.models.category import Category, TransactionType
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TransactionTombstone
 from app.models.budget import Budget
+from app.models.job import Job, JobStatus
+from app.models.fx_rate import FxRate
+from app.models.tag import Tag, TransactionTag
+from app.models.balance import BalanceCheckpoint
+from app.models.spending import CategorySpending
+from app.models.outbox import OutboxEvent
+from app.models.ledger import LedgerMember, LedgerRole
+from app.models.archive import ArchivedTransaction, ArchivedTransactionTag, TransactionRollup, ArchiveWatermark
 
-__all__ = ["User", "Category", "Transaction", "Budget", "TransactionType"]
+__all__ = ["User", "Category", "Transaction", "TransactionTombstone", "Budget", "TransactionType", "Job", "JobStatus", "FxRate", "Tag", "TransactionTag", "BalanceCheckpoint", "CategorySpending", "OutboxEvent", "LedgerMember", "LedgerRole", "ArchivedTransaction", "ArchivedTransactionTag", "TransactionRollup", "ArchiveWatermark"]
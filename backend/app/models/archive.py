@@ -0,0 +1,128 @@
+"""取引アーカイブモデル"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    Uuid,
+    text,
+)
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+from app.models.category import TransactionType
+
+
+class ArchivedTransaction(Base):
+    """
+    アーカイブ済みの取引テーブル（保存期間を過ぎた取引を transactions から移したもの）
+
+    列は transactions と同じで、追記と一括削除のみを行う（更新する場合は transactions に戻す）。
+    差分同期や重複検出用のインデックスは持たず、期間・カテゴリ指定の参照と明細IDの確認用のインデックスのみを持つ。
+    """
+
+    __tablename__ = "transaction_archive"
+    __table_args__ = (
+        # 期間指定の一覧・集計用（transactions の ix_transactions_user_id_date と同じ列）
+        Index(
+            "ix_transaction_archive_user_id_date",
+            "user_id",
+            "date",
+            postgresql_include=["category_id", "type", "amount", "currency"],
+        ),
+        # カテゴリ・月単位の存在確認とカテゴリの削除（ON DELETE CASCADE）用
+        Index("ix_transaction_archive_category_id_date", "category_id", "date"),
+        # 取り込み時の重複確認用
+        Index(
+            "ix_transaction_archive_user_id_external_id",
+            "user_id",
+            "external_id",
+            postgresql_where=text("external_id IS NOT NULL"),
+            sqlite_where=text("external_id IS NOT NULL"),
+        ),
+    )
+
+    transaction_id = Column(Uuid, primary_key=True)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Uuid, ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    date = Column(Date, nullable=False)
+    memo = Column(Text, nullable=True)
+    external_id = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # リレーションシップ（参照のみ）
+    tags = relationship("Tag", secondary="transaction_archive_tags", lazy="selectin", viewonly=True)
+
+    # レスポンスでアーカイブ済みの取引を区別する
+    archived = True
+
+    @property
+    def tag_ids(self) -> list[uuid.UUID]:
+        """付けられたタグのID"""
+        return [tag.tag_id for tag in self.tags]
+
+
+class ArchivedTransactionTag(Base):
+    """アーカイブ済みの取引とタグの関連テーブル"""
+
+    __tablename__ = "transaction_archive_tags"
+    __table_args__ = (
+        # タグでの絞り込み・集計用
+        Index("ix_transaction_archive_tags_tag_id_transaction_id", "tag_id", "transaction_id"),
+    )
+
+    transaction_id = Column(
+        Uuid, ForeignKey("transaction_archive.transaction_id", ondelete="CASCADE"), primary_key=True
+    )
+    tag_id = Column(Uuid, ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True)
+
+
+class TransactionRollup(Base):
+    """
+    アーカイブ済みの取引の月・カテゴリ・収支ごとの合計テーブル（基準通貨。レポート用）
+
+    transaction_archive から集計できる値を保存しておくもので、アーカイブ・取引の復元・
+    為替レートの更新のたびに対象の月を集計し直す。
+    """
+
+    __tablename__ = "transaction_rollups"
+    __table_args__ = (
+        # カテゴリの削除（ON DELETE CASCADE）用
+        Index("ix_transaction_rollups_category_id", "category_id"),
+    )
+
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    category_id = Column(Uuid, ForeignKey("categories.category_id", ondelete="CASCADE"), primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    amount = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False)
+
+
+class ArchiveWatermark(Base):
+    """
+    ユーザーごとのアーカイブの境界テーブル
+
+    archived_before より前の日付の取引はアーカイブされている可能性がある（それ以降の取引は
+    必ず transactions にある）。行がないユーザーはアーカイブ済みの取引を持たない。
+    """
+
+    __tablename__ = "transaction_archive_watermarks"
+
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    archived_before = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,22 @@
+"""残高チェックポイントモデル"""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Uuid
+
+from app.core.database import Base
+
+
+class BalanceCheckpoint(Base):
+    """
+    月初時点の残高テーブル（その月より前の全取引の 収入 − 支出 の累計、基準通貨）
+
+    取引から計算できる値を保存しておくもので、参照時に作成し、取引の書き込み時に
+    書き込んだ日付より後の月の分を削除する。
+    """
+
+    __tablename__ = "balance_checkpoints"
+
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    opening_balance = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -2,8 +2,7 @@
 import uuid
 from datetime import datetime, date
 
-from sqlalchemy import Column, Integer, DateTime, Date, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, DateTime, Date, ForeignKey, UniqueConstraint, Uuid
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -13,10 +12,14 @@ class Budget(Base):
     """予算テーブル"""
 
     __tablename__ = "budgets"
+    __table_args__ = (
+        # 同じカテゴリ・同じ月の予算は1件のみ（一括設定の ON CONFLICT の対象）
+        UniqueConstraint("user_id", "category_id", "month", name="uq_budgets_user_id_category_id_month"),
+    )
 
-    budget_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
-    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
+    budget_id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Uuid, ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
     amount = Column(Integer, nullable=False)
     month = Column(Date, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -2,8 +2,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Boolean, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Boolean, Integer, Index, text, Uuid
 from sqlalchemy.orm import relationship
 import enum
 
@@ -26,9 +25,18 @@ class Category(Base):
     """カテゴリテーブル"""
 
     __tablename__ = "categories"
-
-    category_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    __table_args__ = (
+        # 固定費カテゴリのみを対象にした部分インデックス（未登録固定費の取得用）
+        Index(
+            "ix_categories_user_id_recurring",
+            "user_id",
+            postgresql_where=text("is_recurring"),
+            sqlite_where=text("is_recurring"),
+        ),
+    )
+
+    category_id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     color = Column(String(7), default="#808080")
@@ -40,6 +48,9 @@ class Category(Base):
     default_amount = Column(Integer, nullable=True)
 
     # リレーションシップ
+    # 子レコードは外部キーの ON DELETE CASCADE で削除する（削除時に ORM へロードしない）
     user = relationship("User", back_populates="categories")
-    transactions = relationship("Transaction", back_populates="category", cascade="all, delete-orphan")
-    budgets = relationship("Budget", back_populates="category", cascade="all, delete-orphan")
+    transactions = relationship(
+        "Transaction", back_populates="category", cascade="all, delete-orphan", passive_deletes=True
+    )
+    budgets = relationship("Budget", back_populates="category", cascade="all, delete-orphan", passive_deletes=True)
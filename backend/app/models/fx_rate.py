@@ -0,0 +1,14 @@
+"""為替レートモデル"""
+from sqlalchemy import Column, String, Date, Numeric
+
+from app.core.database import Base
+
+
+class FxRate(Base):
+    """為替レートテーブル（1通貨単位あたりの基準通貨額。ファイルから一括登録する）"""
+
+    __tablename__ = "fx_rates"
+
+    currency = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(18, 8), nullable=False)
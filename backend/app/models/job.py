@@ -0,0 +1,54 @@
+"""バックグラウンドジョブモデル"""
+import uuid
+from datetime import datetime
+import enum
+
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Integer, Text, JSON, Index, Uuid, text
+
+from app.core.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """ジョブの状態"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """ジョブキューテーブル（ワーカーが SELECT ... FOR UPDATE SKIP LOCKED で取得する）"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # 実行待ちジョブの取得用
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # 同じ内容のジョブを実行待ち・実行中に1件だけにする（終了時に dedupe_key を消す）
+        Index(
+            "uq_jobs_user_id_kind_dedupe_key",
+            "user_id",
+            "kind",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("dedupe_key IS NOT NULL"),
+            sqlite_where=text("dedupe_key IS NOT NULL"),
+        ),
+    )
+
+    job_id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    # 重複登録を防ぐジョブの payload のハッシュ（実行待ち・実行中の間のみ設定）
+    dedupe_key = Column(String(64), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    # この時刻以降に実行可能（リトライ時は後ろにずらす）
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
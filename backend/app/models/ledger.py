@@ -0,0 +1,33 @@
+"""共有台帳モデル"""
+import enum
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Uuid
+
+from app.core.database import Base
+
+
+class LedgerRole(str, enum.Enum):
+    """共有台帳のメンバーの権限（所有者はメンバーに含めない）"""
+    VIEWER = "viewer"
+    EDITOR = "editor"
+
+
+class LedgerMember(Base):
+    """
+    共有台帳のメンバーテーブル
+
+    台帳はユーザーごとに1つで、台帳IDは所有者のユーザーIDと同じ（取引・カテゴリ・予算の user_id）。
+    所有者が他のユーザーをメンバーに加えると、メンバーは権限に応じて所有者の台帳を参照・編集できる。
+    """
+
+    __tablename__ = "ledger_members"
+    __table_args__ = (
+        # 台帳ごとのメンバー一覧用（主キーはメンバー側からの権限確認用）
+        Index("ix_ledger_members_ledger_id", "ledger_id"),
+    )
+
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    ledger_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    role = Column(Enum(LedgerRole), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
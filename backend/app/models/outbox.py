@@ -0,0 +1,34 @@
+"""変更イベント（アウトボックス）モデル"""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Uuid
+
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    変更イベントのアウトボックステーブル
+
+    取引・カテゴリ・予算・タグを書き込むトランザクション内で追加し、リレー（app.core.outbox）が
+    event_id の順に読み出して購読者に配信する。保持期間を過ぎたイベントはリレーが削除する。
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # SSE の再接続時（Last-Event-ID 以降）の読み出し用
+        Index("ix_outbox_events_user_id_event_id", "user_id", "event_id"),
+        # 保持期間を過ぎたイベントの削除用
+        Index("ix_outbox_events_created_at", "created_at"),
+        # 削除後も ID を再利用しない（リレーは読み出し済みの ID より後だけを読む）
+        {"sqlite_autoincrement": True},
+    )
+
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    # 対象の種類（transaction / category / budget / tag）と操作（created / updated / deleted）
+    entity = Column(String(20), nullable=False)
+    action = Column(String(20), nullable=False)
+    # 対象のID（一括登録・連鎖削除など複数件の変更は NULL）
+    entity_id = Column(Uuid, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,26 @@
+"""カテゴリ別月次支出モデル"""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Index, Uuid
+
+from app.core.database import Base
+
+
+class CategorySpending(Base):
+    """
+    カテゴリ・月ごとの支出の合計テーブル（基準通貨。予算アラートの判定用）
+
+    取引の書き込み時に増減を加算し、行がない場合は取引から集計して作成する。
+    """
+
+    __tablename__ = "category_spending"
+    __table_args__ = (
+        # ユーザー単位の削除（スナップショットの復元時など）用
+        Index("ix_category_spending_user_id", "user_id"),
+    )
+
+    category_id = Column(Uuid, ForeignKey("categories.category_id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    spent = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,39 @@
+"""タグモデル"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, UniqueConstraint, Uuid
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class Tag(Base):
+    """タグテーブル（取引に複数付けられる分類）"""
+
+    __tablename__ = "tags"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_tags_user_id_name"),
+    )
+
+    tag_id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(50), nullable=False)
+    color = Column(String(7), default="#808080")
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # リレーションシップ
+    user = relationship("User", back_populates="tags")
+
+
+class TransactionTag(Base):
+    """取引とタグの関連テーブル"""
+
+    __tablename__ = "transaction_tags"
+    __table_args__ = (
+        # タグでの絞り込み・集計用（主キーは取引からタグを引く向き）
+        Index("ix_transaction_tags_tag_id_transaction_id", "tag_id", "transaction_id"),
+    )
+
+    transaction_id = Column(Uuid, ForeignKey("transactions.transaction_id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Uuid, ForeignKey("tags.tag_id", ondelete="CASCADE"), primary_key=True)
@@ -2,8 +2,7 @@
 import uuid
 from datetime import datetime, date
 
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Enum, Index, Uuid, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -14,16 +13,63 @@ class Transaction(Base):
     """取引テーブル"""
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        # 差分同期（updated_at > since）用
+        Index("ix_transactions_user_id_updated_at", "user_id", "updated_at"),
+        # カテゴリ・月単位の存在確認（未登録固定費のアンチジョイン）用
+        Index("ix_transactions_category_id_date", "category_id", "date"),
+        # 期間指定の一覧・集計用（集計に使う列を含め、インデックスのみで集計できるようにする）
+        Index(
+            "ix_transactions_user_id_date",
+            "user_id",
+            "date",
+            postgresql_include=["category_id", "type", "amount", "currency"],
+        ),
+        # 取り込み元の明細ID（またはその内容のハッシュ）による重複防止。ID のある取引のみを対象にする
+        Index(
+            "uq_transactions_user_id_external_id",
+            "user_id",
+            "external_id",
+            unique=True,
+            postgresql_where=text("external_id IS NOT NULL"),
+            sqlite_where=text("external_id IS NOT NULL"),
+        ),
+    )
 
-    transaction_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
-    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Uuid, ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
+    # 通貨の最小単位（JPY は円、USD はセント）
     amount = Column(Integer, nullable=False)
+    currency = Column(String(3), default="JPY", server_default="JPY", nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     date = Column(Date, nullable=False)
     memo = Column(Text, nullable=True)
+    # 取り込み元での明細ID（銀行・カードの明細番号、または明細の内容から計算したハッシュ）
+    external_id = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # リレーションシップ
     user = relationship("User", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
+    # 一覧の取得時は取引ごとに問い合わせず、IN でまとめて読み込む
+    tags = relationship("Tag", secondary="transaction_tags", lazy="selectin", passive_deletes=True)
+
+    @property
+    def tag_ids(self) -> list[uuid.UUID]:
+        """付けられたタグのID"""
+        return [tag.tag_id for tag in self.tags]
+
+
+class TransactionTombstone(Base):
+    """削除済み取引の墓標テーブル（差分同期用）"""
+
+    __tablename__ = "transaction_tombstones"
+    __table_args__ = (
+        Index("ix_transaction_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    transaction_id = Column(Uuid, primary_key=True)
+    user_id = Column(Uuid, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
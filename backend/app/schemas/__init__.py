@@ -18,12 +18,51 @@ from app.schemas.transaction import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionChangesResponse,
+    CategorySuggestion,
+    TransactionImportItem,
+    TransactionImport,
+    TransactionImportResponse,
+    DuplicateCandidate,
+    DuplicateGroup,
 )
 from app.schemas.budget import (
     BudgetBase,
     BudgetCreate,
     BudgetUpdate,
     BudgetResponse,
+    BudgetTemplateItem,
+    BudgetBulkCreate,
+    BudgetCopyForward,
+)
+from app.schemas.dashboard import (
+    DashboardSummary,
+    DashboardResponse,
+)
+from app.schemas.job import JobResponse
+from app.schemas.snapshot import SnapshotImportResponse
+from app.schemas.report import (
+    CategoryTotal,
+    TimeseriesBucket,
+    TimeseriesResponse,
+    TagTotal,
+    TagReportResponse,
+    BalanceBucket,
+    BalanceReportResponse,
+)
+from app.schemas.event import EventTicketResponse
+from app.schemas.ledger import (
+    LedgerResponse,
+    LedgerMemberCreate,
+    LedgerMemberUpdate,
+    LedgerMemberResponse,
+    LedgerMemberAddResponse,
+)
+from app.schemas.tag import (
+    TagBase,
+    TagCreate,
+    TagUpdate,
+    TagResponse,
 )
 
 __all__ = [
@@ -41,8 +80,39 @@ __all__ = [
     "TransactionCreate",
     "TransactionUpdate",
     "TransactionResponse",
+    "TransactionChangesResponse",
+    "CategorySuggestion",
+    "TransactionImportItem",
+    "TransactionImport",
+    "TransactionImportResponse",
+    "DuplicateCandidate",
+    "DuplicateGroup",
     "BudgetBase",
     "BudgetCreate",
     "BudgetUpdate",
     "BudgetResponse",
+    "BudgetTemplateItem",
+    "BudgetBulkCreate",
+    "BudgetCopyForward",
+    "DashboardSummary",
+    "DashboardResponse",
+    "JobResponse",
+    "SnapshotImportResponse",
+    "CategoryTotal",
+    "TimeseriesBucket",
+    "TimeseriesResponse",
+    "TagTotal",
+    "TagReportResponse",
+    "BalanceBucket",
+    "BalanceReportResponse",
+    "EventTicketResponse",
+    "LedgerResponse",
+    "LedgerMemberCreate",
+    "LedgerMemberUpdate",
+    "LedgerMemberResponse",
+    "LedgerMemberAddResponse",
+    "TagBase",
+    "TagCreate",
+    "TagUpdate",
+    "TagResponse",
 ]
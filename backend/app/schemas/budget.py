@@ -3,7 +3,7 @@ from datetime import datetime, date
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class BudgetBase(BaseModel):
@@ -32,3 +32,33 @@ class BudgetResponse(BudgetBase):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class BudgetTemplateItem(BaseModel):
+    """予算テンプレートの1カテゴリ分"""
+    category_id: UUID
+    amount: int = Field(..., gt=0)
+
+
+class BudgetBulkCreate(BaseModel):
+    """予算一括設定スキーマ（テンプレートを開始月から複数月に適用）"""
+    start_month: date
+    months: int = Field(1, ge=1, le=24)
+    items: list[BudgetTemplateItem] = Field(..., min_length=1, max_length=200)
+    # 既存の予算の金額を上書きするか（False の場合は既存の予算を残す）
+    overwrite: bool = True
+
+    @model_validator(mode="after")
+    def check_unique_categories(self) -> "BudgetBulkCreate":
+        category_ids = [item.category_id for item in self.items]
+        if len(set(category_ids)) != len(category_ids):
+            raise ValueError("同じカテゴリが複数指定されています")
+        return self
+
+
+class BudgetCopyForward(BaseModel):
+    """予算コピースキーマ（指定月の予算を翌月以降の複数月にコピー）"""
+    source_month: date
+    months: int = Field(1, ge=1, le=24)
+    # 既存の予算の金額を上書きするか（False の場合は既存の予算を残す）
+    overwrite: bool = True
@@ -0,0 +1,27 @@
+"""ダッシュボードスキーマ"""
+from datetime import date
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.budget import BudgetResponse
+from app.schemas.category import CategoryResponse
+from app.schemas.transaction import TransactionResponse
+
+
+class DashboardSummary(BaseModel):
+    """月間収支サマリー"""
+    income: int
+    expense: int
+    balance: int
+
+
+class DashboardResponse(BaseModel):
+    """ダッシュボード初期表示用レスポンススキーマ"""
+    month: date
+    categories: list[CategoryResponse]
+    transactions: list[TransactionResponse]
+    budgets: list[BudgetResponse]
+    # categories に含まれるカテゴリのIDのみを返す（重複を避けてペイロードを小さくする）
+    unregistered_recurring_category_ids: list[UUID]
+    summary: DashboardSummary
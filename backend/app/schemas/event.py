@@ -0,0 +1,8 @@
+"""変更イベントスキーマ"""
+from pydantic import BaseModel
+
+
+class EventTicketResponse(BaseModel):
+    """SSE 接続チケットレスポンススキーマ（EventSource はヘッダーを付けられないためクエリで渡す）"""
+    ticket: str
+    expires_in: int
@@ -0,0 +1,24 @@
+"""ジョブスキーマ"""
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    """ジョブ状態レスポンススキーマ"""
+    job_id: UUID
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    run_at: datetime
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
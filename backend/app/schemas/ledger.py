@@ -0,0 +1,41 @@
+"""共有台帳スキーマ"""
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, EmailStr
+
+from app.models.ledger import LedgerRole
+
+
+class LedgerResponse(BaseModel):
+    """参照できる台帳のレスポンススキーマ"""
+    ledger_id: UUID
+    owner_name: str
+    role: Literal["owner", "editor", "viewer"]
+
+
+class LedgerMemberCreate(BaseModel):
+    """メンバー追加スキーマ（自分の台帳に追加する）"""
+    email: EmailStr
+    role: LedgerRole = LedgerRole.VIEWER
+
+
+class LedgerMemberAddResponse(BaseModel):
+    """メンバー追加のレスポンススキーマ（ユーザーが登録済みかどうかによらず同じ内容を返す）"""
+    email: str
+    role: LedgerRole
+
+
+class LedgerMemberUpdate(BaseModel):
+    """メンバーの権限更新スキーマ"""
+    role: LedgerRole
+
+
+class LedgerMemberResponse(BaseModel):
+    """メンバーのレスポンススキーマ"""
+    user_id: UUID
+    name: str
+    email: str
+    role: LedgerRole
+    created_at: datetime
@@ -0,0 +1,73 @@
+"""レポートスキーマ"""
+from datetime import date
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models.category import TransactionType
+
+Granularity = Literal["day", "week", "month", "quarter", "year"]
+
+
+class CategoryTotal(BaseModel):
+    """カテゴリ別の合計"""
+    category_id: UUID
+    type: TransactionType
+    amount: int
+    count: int
+
+
+class TimeseriesBucket(BaseModel):
+    """集計単位ごとの合計"""
+    # 集計単位の先頭日（週は月曜日）
+    period: date
+    income: int
+    expense: int
+    categories: list[CategoryTotal]
+
+
+class TimeseriesResponse(BaseModel):
+    """期間別集計レスポンススキーマ"""
+    granularity: Granularity
+    start_date: date
+    end_date: date
+    # 取引のない集計単位も含めて昇順に並ぶ
+    buckets: list[TimeseriesBucket]
+
+
+class TagTotal(BaseModel):
+    """タグ別の合計"""
+    tag_id: UUID
+    type: TransactionType
+    amount: int
+    count: int
+
+
+class TagReportResponse(BaseModel):
+    """タグ別集計レスポンススキーマ"""
+    start_date: date
+    end_date: date
+    # 複数のタグが付いた取引はそれぞれのタグに計上される
+    tags: list[TagTotal]
+
+
+class BalanceBucket(BaseModel):
+    """集計単位ごとの収支と残高"""
+    # 集計単位の先頭日（週は月曜日）
+    period: date
+    income: int
+    expense: int
+    # 集計単位の終了時点の残高
+    balance: int
+
+
+class BalanceReportResponse(BaseModel):
+    """残高推移レスポンススキーマ"""
+    granularity: Granularity
+    start_date: date
+    end_date: date
+    # 開始日の前日終了時点の残高
+    opening_balance: int
+    # 取引のない集計単位も含めて昇順に並ぶ
+    buckets: list[BalanceBucket]
@@ -0,0 +1,11 @@
+"""スナップショットスキーマ"""
+from pydantic import BaseModel
+
+
+class SnapshotImportResponse(BaseModel):
+    """スナップショット復元結果（テーブルごとの登録件数）"""
+    categories: int
+    tags: int
+    budgets: int
+    transactions: int
+    transaction_tags: int
@@ -0,0 +1,32 @@
+"""タグスキーマ"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class TagBase(BaseModel):
+    """タグベーススキーマ"""
+    name: str = Field(..., min_length=1, max_length=50)
+    color: str = Field(default="#808080", pattern=r"^#[0-9A-Fa-f]{6}$")
+
+
+class TagCreate(TagBase):
+    """タグ作成スキーマ"""
+    pass
+
+
+class TagUpdate(BaseModel):
+    """タグ更新スキーマ"""
+    name: Optional[str] = Field(None, min_length=1, max_length=50)
+    color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$")
+
+
+class TagResponse(TagBase):
+    """タグレスポンススキーマ"""
+    tag_id: UUID
+    user_id: UUID
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
@@ -1,20 +1,38 @@
 """取引スキーマ"""
 from datetime import datetime, date
-from typing import Optional
+from typing import Annotated, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
 
+from app.core.currency import BASE_CURRENCY, CURRENCY_EXPONENTS
 from app.models.category import TransactionType
 
 
+def _check_currency(value: str) -> str:
+    """対応通貨か検証"""
+    value = value.upper()
+    if value not in CURRENCY_EXPONENTS:
+        raise ValueError(f"未対応の通貨です: {value}")
+    return value
+
+
+# ISO 4217 の通貨コード
+Currency = Annotated[str, AfterValidator(_check_currency)]
+
+
 class TransactionBase(BaseModel):
     """取引ベーススキーマ"""
     category_id: UUID
+    # 通貨の最小単位（JPY は円、USD はセント）
     amount: int = Field(..., gt=0)
+    currency: Currency = BASE_CURRENCY
     type: TransactionType
     date: date
     memo: Optional[str] = None
+    tag_ids: list[UUID] = Field(default_factory=list, max_length=20)
+    # 取り込み元での明細ID（同じユーザーで重複不可）
+    external_id: Optional[str] = Field(None, min_length=1, max_length=255)
 
 
 class TransactionCreate(TransactionBase):
@@ -26,9 +44,11 @@ class TransactionUpdate(BaseModel):
     """取引更新スキーマ"""
     category_id: Optional[UUID] = None
     amount: Optional[int] = Field(None, gt=0)
+    currency: Optional[Currency] = None
     type: Optional[TransactionType] = None
     date: Optional[date] = None
     memo: Optional[str] = None
+    tag_ids: Optional[list[UUID]] = Field(None, max_length=20)
 
 
 class TransactionResponse(TransactionBase):
@@ -36,5 +56,83 @@ class TransactionResponse(TransactionBase):
     transaction_id: UUID
     user_id: UUID
     created_at: datetime
+    updated_at: datetime
+    # その取引までの残高（基準通貨。running_balance=true の場合のみ）
+    balance: Optional[int] = None
+    # アーカイブ済みの取引か（保存期間を過ぎて transaction_archive に移された取引）
+    archived: bool = False
+
+    model_config = {"from_attributes": True}
+
+
+class CategorySuggestion(BaseModel):
+    """カテゴリ推定結果スキーマ"""
+    category_id: UUID
+    # 0〜1（メモの類似度 × そのメモでのカテゴリの使用割合）
+    score: float
+    # 根拠になった過去のメモ
+    memo: str
 
     model_config = {"from_attributes": True}
+
+
+class TransactionImportItem(BaseModel):
+    """一括登録する取引1件のスキーマ（カテゴリ省略時はメモから推定）"""
+    category_id: Optional[UUID] = None
+    amount: int = Field(..., gt=0)
+    currency: Currency = BASE_CURRENCY
+    type: TransactionType
+    date: date
+    memo: Optional[str] = None
+    # 取り込み元での明細ID（登録済みのIDの取引は重複として登録しない）
+    external_id: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
+class TransactionImport(BaseModel):
+    """取引一括登録スキーマ"""
+    transactions: list[TransactionImportItem] = Field(..., min_length=1, max_length=5000)
+    # 明細IDのない取引に、日付・金額・通貨・収支・メモから計算したハッシュを明細IDとして付けるか
+    # （期間が重なる明細を取り込み直しても重複しない。同じ内容の取引は出現順で区別する）
+    content_hash: bool = False
+    # 推定できなかった取引に使うカテゴリ（省略時は推定できない取引があればエラー）
+    default_category_id: Optional[UUID] = None
+    # 推定結果を採用するスコアの下限
+    min_score: float = Field(0.5, ge=0, le=1)
+
+
+class TransactionImportResponse(BaseModel):
+    """取引一括登録レスポンススキーマ"""
+    created: int
+    # メモからカテゴリを推定した件数
+    suggested: int
+    # 既定のカテゴリを使った件数
+    defaulted: int
+    # 明細IDが登録済みのため登録しなかった件数
+    duplicates: int
+
+
+class DuplicateCandidate(BaseModel):
+    """重複の候補になった取引スキーマ"""
+    transaction_id: UUID
+    date: date
+    memo: Optional[str] = None
+    external_id: Optional[str] = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class DuplicateGroup(BaseModel):
+    """重複の可能性がある取引のまとまりスキーマ"""
+    amount: int
+    currency: str
+    type: TransactionType
+    # 日付の昇順
+    transactions: list[DuplicateCandidate]
+
+
+class TransactionChangesResponse(BaseModel):
+    """取引差分同期レスポンススキーマ"""
+    changed: list[TransactionResponse]
+    deleted: list[UUID]
+    sync_token: str
@@ -0,0 +1,131 @@
+"""本番用サーバーの起動エントリーポイント
+
+gunicorn がインストールされている場合は uvicorn ワーカーを preload 付きで複数起動し、
+インストールされていない場合は uvicorn のマルチワーカーモードで起動する。
+
+使い方:
+    cd backend
+    python -m app.serve                      # ワーカー数はCPU数から自動決定
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import importlib.util
+import os
+
+
+def default_workers() -> int:
+    """
+    ワーカー数の既定値を決定
+
+    環境変数 WEB_CONCURRENCY があればそれを使い、なければこのプロセスが使えるCPU数とする。
+    各ワーカーは非同期でリクエストを捌き、同期エンドポイントはスレッドプールで実行されるため、
+    1コアあたり1ワーカーを基準にする（ワーカーごとに接続プールを持つ点にも注意）。
+    """
+    env_value = os.environ.get("WEB_CONCURRENCY")
+    if env_value:
+        return max(1, int(env_value))
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return max(1, cpus)
+
+
+def _load_app():
+    """アプリケーションと重いモジュールを読み込む（preload 時はマスタープロセスで実行）"""
+    from app.core.security import preload_crypto_modules
+    from app.main import app
+
+    preload_crypto_modules()
+    return app
+
+
+def _post_fork(server, worker) -> None:
+    """ワーカーのフォーク直後に、マスターから引き継いだ接続プールを破棄する"""
+    from app.core.database import dispose_engine
+
+    dispose_engine()
+
+
+def run_gunicorn(args: argparse.Namespace) -> None:
+    """gunicorn + uvicorn ワーカーで起動"""
+    from gunicorn.app.base import BaseApplication
+
+    class _Application(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return _load_app()
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": args.preload,
+        # SIGTERM 受信後、処理中のリクエストを終えるまで待つ秒数
+        "graceful_timeout": args.graceful_timeout,
+        "timeout": args.timeout,
+        "keepalive": args.keepalive,
+        "loglevel": args.log_level,
+        "post_fork": _post_fork,
+    }
+    _Application(options).run()
+
+
+def run_uvicorn(args: argparse.Namespace) -> None:
+    """uvicorn のマルチワーカーモードで起動（preload なし）"""
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=args.keepalive,
+        # SIGTERM 受信後、処理中のリクエストを終えるまで待つ秒数
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kakeibon API サーバーを起動")
+    parser.add_argument("--host", default="0.0.0.0", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8000, help="待ち受けポート")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="ワーカープロセス数（既定: CPU数）")
+    parser.add_argument(
+        "--server",
+        choices=["auto", "gunicorn", "uvicorn"],
+        default="auto",
+        help="使用するサーバー（auto: gunicorn があれば gunicorn）",
+    )
+    parser.add_argument(
+        "--no-preload",
+        dest="preload",
+        action="store_false",
+        help="マスタープロセスでアプリケーションを事前に読み込まない（gunicorn のみ）",
+    )
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="終了時に処理中のリクエストを待つ秒数")
+    parser.add_argument("--timeout", type=int, default=60, help="応答しないワーカーを再起動するまでの秒数（gunicorn のみ）")
+    parser.add_argument("--keepalive", type=int, default=5, help="Keep-Alive 接続の待機秒数")
+    parser.add_argument("--log-level", default="info", help="ログレベル")
+    args = parser.parse_args()
+
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if importlib.util.find_spec("gunicorn") else "uvicorn"
+
+    if server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()
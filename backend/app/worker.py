@@ -0,0 +1,110 @@
+"""バックグラウンドジョブのワーカー起動エントリーポイント
+
+jobs テーブルから実行待ちのジョブを取得して実行する。複数プロセスを起動しても
+`SELECT ... FOR UPDATE SKIP LOCKED` により同じジョブは1つのワーカーだけが実行する。
+
+使い方:
+    cd backend
+    python -m app.worker                  # 1プロセスで常駐
+    python -m app.worker --processes 4    # 4プロセスで常駐
+    python -m app.worker --burst          # キューが空になったら終了
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+
+logger = logging.getLogger("app.worker")
+
+
+def run_worker(index: int, stop_event, poll_interval: float, burst: bool) -> None:
+    """
+    ジョブを取得して実行するループ
+
+    Args:
+        index: ワーカー番号
+        stop_event: 停止要求を受け取るイベント
+        poll_interval: キューが空のときの待機秒数
+        burst: キューが空になったら終了するか
+    """
+    from app.core.database import dispose_engine
+    from app.jobs import run_next_job
+
+    # 実行中のジョブは最後まで処理してから終了する
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    logger.info("ワーカーを開始しました: %s", worker_id)
+    try:
+        while not stop_event.is_set():
+            try:
+                processed = run_next_job(worker_id)
+            except Exception:
+                # DB接続断などはログに残して次のポーリングで再試行する
+                logger.exception("ジョブの取得に失敗しました")
+                processed = False
+            if not processed:
+                if burst:
+                    break
+                stop_event.wait(poll_interval)
+    finally:
+        dispose_engine()
+        logger.info("ワーカーを終了しました: %s", worker_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kakeibon バックグラウンドジョブワーカーを起動")
+    parser.add_argument("--processes", type=int, default=1, help="ワーカープロセス数")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=None,
+        help="キューが空のときの待機秒数（既定: JOB_POLL_INTERVAL_SECONDS）",
+    )
+    parser.add_argument("--burst", action="store_true", help="キューが空になったら終了する")
+    parser.add_argument("--log-level", default="info", help="ログレベル")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s [%(processName)s] %(message)s",
+    )
+
+    from app.core.config import get_settings
+    from app.core.database import init_embedded_database
+
+    # 組み込みモード（SQLite）ではテーブルを作成する（子プロセスの起動前に行う）
+    init_embedded_database()
+
+    poll_interval = args.poll_interval
+    if poll_interval is None:
+        poll_interval = get_settings().JOB_POLL_INTERVAL_SECONDS
+
+    stop_event = multiprocessing.Event()
+    if args.processes <= 1:
+        run_worker(0, stop_event, poll_interval, args.burst)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(index, stop_event, poll_interval, args.burst),
+            name=f"worker-{index}",
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # 親プロセスは停止シグナルを子プロセスに伝えて終了を待つ
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""取引のアーカイブ
+
+保存期間（TRANSACTION_ARCHIVE_AFTER_MONTHS）を過ぎた月の取引を持つユーザーごとに
+アーカイブのジョブ（transactions.archive）を登録する。ジョブはワーカーが実行する。
+--now を指定するとジョブを登録せず、このプロセスでユーザーごとにアーカイブしてコミットする。
+
+cron などで月に1回実行する想定。
+
+使い方:
+    cd backend
+    uv run python scripts/archive_transactions.py
+    uv run python scripts/archive_transactions.py --months 36
+    uv run python scripts/archive_transactions.py --now
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select  # noqa: E402
+
+from app.core.archive import archive_horizon, archive_transactions  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.jobs import enqueue_job  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="保存期間を過ぎた取引をアーカイブ")
+    parser.add_argument("--months", type=int, default=None, help="当月を含めて残す月数（省略時は TRANSACTION_ARCHIVE_AFTER_MONTHS）")
+    parser.add_argument("--now", action="store_true", help="ジョブを登録せずにこのプロセスでアーカイブする")
+    args = parser.parse_args()
+
+    before = archive_horizon(months=args.months)
+    if before is None:
+        print("アーカイブしない設定です（TRANSACTION_ARCHIVE_AFTER_MONTHS=0）")
+        return 0
+
+    db = SessionLocal()
+    try:
+        # (user_id, date) インデックスで対象の取引を持つユーザーだけを選ぶ
+        user_ids = db.scalars(
+            select(Transaction.user_id).where(Transaction.date < before).distinct()
+        ).all()
+        if args.now:
+            # ユーザーごとにコミットして、トランザクションとロックを小さく保つ
+            archived = 0
+            for user_id in user_ids:
+                archived += archive_transactions(db, user_id, before)
+                db.commit()
+            print(f"{before} より前の取引 {archived} 件をアーカイブしました（{len(user_ids)} ユーザー）")
+        else:
+            payload = {} if args.months is None else {"months": args.months}
+            for user_id in user_ids:
+                enqueue_job(db, user_id, "transactions.archive", payload)
+            db.commit()
+            print(f"{len(user_ids)} ユーザー分のアーカイブのジョブを登録しました（{before} より前の取引）")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
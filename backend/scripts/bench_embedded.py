@@ -0,0 +1,144 @@
+"""組み込みモード（SQLite）のAPIレイテンシのベンチマーク
+
+一時ディレクトリに SQLite のデータベースを作成し、取引を投入したうえで主要なAPIを
+TestClient 経由で呼び出してレイテンシ（中央値・95パーセンタイル）を計測する。
+続いて複数スレッドから同時に取引を登録し、書き込みロックで順番に処理されること
+（"database is locked" にならないこと）とスループットを確認する。
+
+--database-url を指定すると同じ計測を PostgreSQL などに対して行える（作成したユーザーは削除する）。
+TestClient を使うため httpx が必要。
+
+使い方:
+    cd backend
+    uv run --with httpx python scripts/bench_embedded.py --transactions 100000
+    uv run --with httpx python scripts/bench_embedded.py --database-url postgresql://...
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+
+def percentile(samples: list[float], ratio: float) -> float:
+    """パーセンタイル（ミリ秒）"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="組み込みモード（SQLite）のAPIレイテンシのベンチマーク")
+    parser.add_argument("--transactions", type=int, default=100000, help="投入する取引数")
+    parser.add_argument("--requests", type=int, default=200, help="エンドポイントごとのリクエスト数")
+    parser.add_argument("--threads", type=int, default=8, help="同時書き込みのスレッド数")
+    parser.add_argument("--database-url", default=None, help="計測するデータベース（省略時は一時的な SQLite）")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir.name}/kakeibon.db"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    # 計測中のリクエストをレート制限しない
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models import Category, Transaction, TransactionType, User
+
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        startup_seconds = time.perf_counter() - started
+
+        db = SessionLocal()
+        user_id = uuid.uuid4()
+        db.add(User(user_id=user_id, email=f"bench-{user_id}@example.com", password_hash="x", name="bench"))
+        db.flush()
+        category_ids = [uuid.uuid4() for _ in range(30)]
+        db.execute(insert(Category), [
+            {"category_id": cid, "user_id": user_id, "name": f"カテゴリ{i}", "type": TransactionType.EXPENSE}
+            for i, cid in enumerate(category_ids)
+        ])
+        rng = random.Random(0)
+        today = date.today()
+        started = time.perf_counter()
+        for offset in range(0, args.transactions, 10000):
+            db.execute(insert(Transaction), [
+                {"user_id": user_id, "category_id": rng.choice(category_ids), "amount": rng.randint(100, 10000),
+                 "type": TransactionType.EXPENSE, "date": today - timedelta(days=rng.randint(0, 1000)),
+                 "memo": f"メモ{offset + i}"}
+                for i in range(min(10000, args.transactions - offset))
+            ])
+        db.commit()
+        seed_seconds = time.perf_counter() - started
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+        def new_transaction(i: int) -> dict:
+            return {
+                "category_id": str(category_ids[i % len(category_ids)]), "amount": 1000, "type": "expense",
+                "date": today.isoformat(), "memo": f"ベンチ{i}",
+            }
+
+        # (名前, リクエストを送る関数)。レポートは書き込みごとにキャッシュが無効化される条件で計測する
+        cases = [
+            ("POST /api/transactions", lambda i: client.post("/api/transactions", json=new_transaction(i), headers=headers)),
+            ("GET  /api/transactions?limit=100", lambda i: client.get("/api/transactions?limit=100", headers=headers)),
+            ("GET  /api/transactions (期間・カテゴリ)", lambda i: client.get(
+                f"/api/transactions?start_date={today - timedelta(days=90)}&category_id={category_ids[i % 30]}",
+                headers=headers,
+            )),
+            ("GET  /api/dashboard", lambda i: client.get("/api/dashboard", headers=headers)),
+            ("GET  /api/reports/timeseries (月別・1年)", lambda i: client.get(
+                f"/api/reports/timeseries?granularity=month&start_date={today - timedelta(days=365 + i)}",
+                headers=headers,
+            )),
+        ]
+
+        print(f"データベース: {os.environ['DATABASE_URL'].split('://')[0]}, 取引 {args.transactions}件")
+        print(f"  起動（テーブル作成を含む） {startup_seconds * 1000:8.1f} ms")
+        print(f"  取引の投入                 {seed_seconds:8.2f} s")
+        for name, send in cases:
+            samples = []
+            for i in range(args.requests):
+                request_started = time.perf_counter()
+                send(i).raise_for_status()
+                samples.append(time.perf_counter() - request_started)
+            print(
+                f"  {name:<44} p50 {percentile(samples, 0.5):7.2f} ms"
+                f"  p95 {percentile(samples, 0.95):7.2f} ms"
+            )
+
+        def write(i: int) -> float:
+            request_started = time.perf_counter()
+            client.post("/api/transactions", json=new_transaction(i), headers=headers).raise_for_status()
+            return time.perf_counter() - request_started
+
+        total = args.requests * args.threads
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            samples = list(executor.map(write, range(total)))
+        elapsed = time.perf_counter() - started
+        print(
+            f"  同時書き込み {args.threads}スレッド × {args.requests}件  {total / elapsed:8.1f} 件/s"
+            f"  p50 {percentile(samples, 0.5):7.2f} ms  p95 {percentile(samples, 0.95):7.2f} ms"
+            f"  (平均 {statistics.mean(samples) * 1000:.2f} ms)"
+        )
+
+        if args.database_url:
+            db.query(User).filter(User.user_id == user_id).delete()
+            db.commit()
+        db.close()
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
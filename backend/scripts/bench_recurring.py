@@ -0,0 +1,151 @@
+"""未登録固定費クエリのベンチマーク
+
+固定費カテゴリを多数持つユーザーを一時的に作成し、次の3つを比較する。
+  - 旧実装: 月内取引の DISTINCT サブクエリ + NOT IN
+  - 新実装: NOT EXISTS アンチジョイン（部分インデックス利用）
+  - キャッシュヒット時
+
+作成したデータは計測後に削除する（DATABASE_URL のデータベースを使用）。
+
+使い方:
+    cd backend
+    uv run python scripts/bench_recurring.py --categories 500 --transactions-per-month 2000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from app.api.endpoints.categories import _query_unregistered_recurring  # noqa: E402
+from app.core.cache import MISSING, UserScopedCache  # noqa: E402
+from app.core.database import SessionLocal, get_engine  # noqa: E402
+from app.core.dates import month_range  # noqa: E402
+from app.models import Category, Transaction, TransactionType, User  # noqa: E402
+
+
+def legacy_query(db, user_id, start_date, end_date):
+    """旧実装（DISTINCT + NOT IN）"""
+    registered_category_ids = (
+        db.query(Transaction.category_id)
+        .filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= start_date,
+            Transaction.date <= end_date,
+        )
+        .distinct()
+        .subquery()
+    )
+    return (
+        db.query(Category)
+        .filter(
+            Category.user_id == user_id,
+            Category.is_recurring.is_(True),
+            ~Category.category_id.in_(select(registered_category_ids)),
+        )
+        .all()
+    )
+
+
+def seed(db, categories: int, months: int, per_month: int) -> uuid.UUID:
+    """計測用のユーザー・カテゴリ・取引を作成"""
+    user_id = uuid.uuid4()
+    db.add(User(user_id=user_id, email=f"bench-{user_id}@example.com", password_hash="x", name="bench"))
+    db.flush()
+
+    recurring_ids = [uuid.uuid4() for _ in range(categories)]
+    other_ids = [uuid.uuid4() for _ in range(20)]
+    db.execute(insert(Category), [
+        {"category_id": cid, "user_id": user_id, "name": f"固定費{i}", "type": TransactionType.EXPENSE,
+         "is_recurring": True, "frequency": "MONTHLY", "default_amount": 1000}
+        for i, cid in enumerate(recurring_ids)
+    ] + [
+        {"category_id": cid, "user_id": user_id, "name": f"変動費{i}", "type": TransactionType.EXPENSE,
+         "is_recurring": False}
+        for i, cid in enumerate(other_ids)
+    ])
+
+    today = date.today()
+    rng = random.Random(0)
+    for offset in range(months):
+        year, month = divmod(today.year * 12 + today.month - 1 - offset, 12)
+        start_date, end_date = month_range(date(year, month + 1, 1))
+        # 固定費の半分は登録済み、残りは変動費の取引
+        registered = rng.sample(recurring_ids, len(recurring_ids) // 2)
+        rows = [
+            {"user_id": user_id, "category_id": cid, "amount": 1000, "type": TransactionType.EXPENSE,
+             "date": start_date}
+            for cid in registered
+        ] + [
+            {"user_id": user_id, "category_id": rng.choice(other_ids), "amount": rng.randint(100, 10000),
+             "type": TransactionType.EXPENSE, "date": start_date.replace(day=rng.randint(1, end_date.day))}
+            for _ in range(per_month)
+        ]
+        db.execute(insert(Transaction), rows)
+    db.commit()
+    return user_id
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(f"  {label:<28} 中央値 {statistics.median(samples) * 1000:8.3f} ms"
+          f"  (最小 {min(samples) * 1000:.3f} ms, 最大 {max(samples) * 1000:.3f} ms)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="未登録固定費クエリのベンチマーク")
+    parser.add_argument("--categories", type=int, default=500, help="固定費カテゴリ数")
+    parser.add_argument("--months", type=int, default=24, help="取引を作成する月数")
+    parser.add_argument("--transactions-per-month", type=int, default=2000, help="1か月あたりの変動費取引数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測回数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user_id = seed(db, args.categories, args.months, args.transactions_per_month)
+    try:
+        if get_engine().dialect.name == "postgresql":
+            db.execute(text("ANALYZE categories"))
+            db.execute(text("ANALYZE transactions"))
+            db.commit()
+
+        start_date, end_date = month_range(date.today())
+        legacy = {c.category_id for c in legacy_query(db, user_id, start_date, end_date)}
+        current = {c.category_id for c in _query_unregistered_recurring(db, user_id, start_date, end_date)}
+        assert legacy == current, "旧実装と新実装の結果が一致しません"
+
+        cache = UserScopedCache(ttl_seconds=60)
+        cache.set(user_id, start_date, list(current), cache.generation(user_id))
+
+        def cached_lookup():
+            assert cache.get(user_id, start_date) is not MISSING
+
+        print(f"固定費 {args.categories}件, 取引 約{args.months * (args.transactions_per_month + args.categories // 2)}件, "
+              f"未登録 {len(current)}件")
+        report("旧実装 (DISTINCT + NOT IN)", timed(lambda: legacy_query(db, user_id, start_date, end_date), args.repeat))
+        report("新実装 (NOT EXISTS)",
+               timed(lambda: _query_unregistered_recurring(db, user_id, start_date, end_date), args.repeat))
+        report("キャッシュヒット", timed(cached_lookup, args.repeat))
+    finally:
+        db.rollback()
+        db.query(User).filter(User.user_id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
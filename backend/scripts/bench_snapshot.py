@@ -0,0 +1,114 @@
+"""スナップショットの出力・復元のベンチマーク
+
+一時ユーザーに取引を作成し、次の3つを比較する（いずれも FastAPI のアプリを
+TestClient 経由で呼び出すため、HTTP処理・認証・シリアライズを含む）。
+  - スナップショット出力 (GET /api/snapshot)
+  - スナップショット復元 (POST /api/snapshot/import)
+  - 取引APIによる1件ずつの再登録 (POST /api/transactions)。--replay 件だけ実行し全件分に換算する
+
+作成したデータは計測後に削除する（DATABASE_URL のデータベースを使用）。
+TestClient を使うため httpx が必要。
+
+使い方:
+    cd backend
+    uv run --with httpx python scripts/bench_snapshot.py --transactions 100000
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Category, Transaction, TransactionType, User  # noqa: E402
+
+
+def create_user(db, label: str) -> tuple[uuid.UUID, dict[str, str]]:
+    """計測用ユーザーを作成し、認証ヘッダーを返す"""
+    user_id = uuid.uuid4()
+    db.add(User(user_id=user_id, email=f"bench-{label}-{user_id}@example.com", password_hash="x", name="bench"))
+    db.commit()
+    token = create_access_token(data={"sub": str(user_id)})
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def seed(db, user_id: uuid.UUID, transactions: int) -> list[uuid.UUID]:
+    """カテゴリと取引を作成"""
+    category_ids = [uuid.uuid4() for _ in range(30)]
+    db.execute(insert(Category), [
+        {"category_id": cid, "user_id": user_id, "name": f"カテゴリ{i}", "type": TransactionType.EXPENSE}
+        for i, cid in enumerate(category_ids)
+    ])
+    rng = random.Random(0)
+    today = date.today()
+    batch = 10000
+    for offset in range(0, transactions, batch):
+        db.execute(insert(Transaction), [
+            {"user_id": user_id, "category_id": rng.choice(category_ids), "amount": rng.randint(100, 10000),
+             "type": TransactionType.EXPENSE, "date": today - timedelta(days=rng.randint(0, 1000)),
+             "memo": f"メモ{offset + i}"}
+            for i in range(min(batch, transactions - offset))
+        ])
+    db.commit()
+    return category_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="スナップショットの出力・復元のベンチマーク")
+    parser.add_argument("--transactions", type=int, default=100000, help="取引数")
+    parser.add_argument("--replay", type=int, default=1000, help="1件ずつ再登録する取引数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    client = TestClient(app)
+    source_id, source_headers = create_user(db, "source")
+    target_id, target_headers = create_user(db, "target")
+    replay_id, replay_headers = create_user(db, "replay")
+    try:
+        seed(db, source_id, args.transactions)
+
+        started = time.perf_counter()
+        response = client.get("/api/snapshot", headers=source_headers)
+        export_seconds = time.perf_counter() - started
+        response.raise_for_status()
+        snapshot = response.content
+
+        started = time.perf_counter()
+        response = client.post("/api/snapshot/import", content=snapshot, headers=target_headers)
+        import_seconds = time.perf_counter() - started
+        response.raise_for_status()
+        assert response.json()["transactions"] == args.transactions
+
+        category = client.post(
+            "/api/categories", json={"name": "再登録", "type": "expense"}, headers=replay_headers
+        ).json()
+        started = time.perf_counter()
+        for i in range(args.replay):
+            client.post("/api/transactions", json={
+                "category_id": category["category_id"], "amount": 1000, "type": "expense",
+                "date": date.today().isoformat(), "memo": f"メモ{i}",
+            }, headers=replay_headers).raise_for_status()
+        replay_seconds = (time.perf_counter() - started) / args.replay * args.transactions
+
+        print(f"取引 {args.transactions}件, スナップショット {len(snapshot) / 1024 / 1024:.1f} MiB")
+        print(f"  出力 (GET /api/snapshot)           {export_seconds:8.2f} s")
+        print(f"  復元 (POST /api/snapshot/import)   {import_seconds:8.2f} s")
+        print(f"  APIで1件ずつ再登録（{args.replay}件から換算） {replay_seconds:8.2f} s")
+    finally:
+        db.rollback()
+        db.query(User).filter(User.user_id.in_([source_id, target_id, replay_id])).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
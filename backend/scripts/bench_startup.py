@@ -0,0 +1,74 @@
+"""起動時間ベンチマーク（プロセス起動から最初のレスポンスまで）
+
+uvicorn を別プロセスで起動し、指定パスが最初に 200 を返すまでの時間を計測する。
+オートスケールで追加されるワーカーのコールドスタートを想定した指標。
+
+使い方:
+    cd backend
+    uv run python scripts/bench_startup.py
+    uv run python scripts/bench_startup.py --repeat 10 --path /health
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_once(path: str, timeout: float) -> float:
+    """
+    サーバーを1回起動し、最初のレスポンスまでの秒数を返す
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise SystemExit("サーバーが起動前に終了しました")
+            if time.perf_counter() - started > timeout:
+                raise SystemExit(f"{timeout}秒以内に応答がありませんでした")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="起動から最初のレスポンスまでの時間を計測")
+    parser.add_argument("--path", default="/health", help="最初にリクエストするパス")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    parser.add_argument("--timeout", type=float, default=30.0, help="1回あたりのタイムアウト（秒）")
+    args = parser.parse_args()
+
+    samples = [measure_once(args.path, args.timeout) for _ in range(args.repeat)]
+    print(f"time-to-first-response ({args.path}, {args.repeat}回): "
+          f"中央値 {statistics.median(samples) * 1000:.0f} ms "
+          f"(最小 {min(samples) * 1000:.0f} ms, 最大 {max(samples) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
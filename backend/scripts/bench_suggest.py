@@ -0,0 +1,82 @@
+"""メモからのカテゴリ推定（MemoIndex）のベンチマーク
+
+合成した取引履歴（店名 + 支店名・伝票番号などの揺れを含むメモ）から索引を作成し、
+作成時間・メモリ上の件数と、完全一致・部分一致・該当なしのメモでの推定レイテンシ
+（中央値・99パーセンタイル）を計測する。データベースは使わない。
+
+使い方:
+    cd backend
+    uv run python scripts/bench_suggest.py --memos 20000 --shops 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+SHOPS = [
+    "セブンイレブン", "ファミリーマート", "ローソン", "イオン", "スーパーライフ", "マツモトキヨシ",
+    "AMAZON.CO.JP", "楽天市場", "UNIQLO", "スターバックス", "JR東日本", "東京電力", "東京ガス",
+    "NTTドコモ", "NETFLIX.COM", "ヨドバシカメラ", "ダイソー", "すき家", "マクドナルド", "ENEOS",
+]
+BRANCHES = ["新宿店", "渋谷店", "池袋駅前", "横浜西口", "梅田", "天神", "札幌駅", "名古屋栄", ""]
+
+
+def percentile(samples: list[float], ratio: float) -> float:
+    """パーセンタイル（ミリ秒）"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="メモからのカテゴリ推定のベンチマーク")
+    parser.add_argument("--memos", type=int, default=20000, help="履歴の取引数")
+    parser.add_argument("--shops", type=int, default=2000, help="実在の店名に加えて生成する店名の数")
+    parser.add_argument("--lookups", type=int, default=5000, help="種類ごとの推定回数")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from app.core.suggest import MemoIndex
+
+    rng = random.Random(42)
+    kana = [chr(c) for c in range(ord("ァ"), ord("ヶ"))]
+    shops = SHOPS + ["".join(rng.choices(kana, k=rng.randint(3, 8))) for _ in range(args.shops)]
+    categories = [uuid.uuid4() for _ in range(30)]
+    shop_categories = {shop: rng.choice(categories) for shop in shops}
+
+    def memo() -> str:
+        shop = rng.choice(shops)
+        return f"{shop} {rng.choice(BRANCHES)} {rng.randint(1, 9999):04d}".strip()
+
+    history = [memo() for _ in range(args.memos)]
+    started = time.perf_counter()
+    index = MemoIndex()
+    for text in history:
+        index.add(text, shop_categories[text.split()[0]])
+    print(f"索引の作成: {(time.perf_counter() - started) * 1000:.0f}ms（{args.memos}件、異なるメモ {len(index)}件）")
+
+    queries = {
+        "完全一致": lambda: rng.choice(history),
+        "部分一致": lambda: f"{rng.choice(shops)} {rng.choice(BRANCHES)}",
+        "該当なし": lambda: f"個人商店 {rng.randint(1, 999)}",
+    }
+    for label, make_query in queries.items():
+        samples = []
+        for _ in range(args.lookups):
+            text = make_query()
+            started = time.perf_counter()
+            index.suggest(text)
+            samples.append(time.perf_counter() - started)
+        print(
+            f"{label}: p50 {statistics.median(samples) * 1000:.3f}ms"
+            f" / p99 {percentile(samples, 0.99):.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""為替レートの一括登録
+
+CSV（date,currency,rate のヘッダー付き）の為替レートを fx_rates テーブルに登録する。
+rate は外貨1単位あたりの円の額（例: 2026-10-01,USD,149.25）。同じ通貨・日付のレートは上書きする。
+
+起動中の API プロセスには、為替レートのキャッシュ（CACHE_TTL_SECONDS）が切れた後に反映される。
+
+使い方:
+    cd backend
+    uv run python scripts/load_fx_rates.py rates.csv
+    cat rates.csv | uv run python scripts/load_fx_rates.py -
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.archive import refresh_rollups  # noqa: E402
+from app.core.balance import invalidate_balance_checkpoints  # noqa: E402
+from app.core.budget_alerts import reset_spending  # noqa: E402
+from app.core.currency import load_fx_rates_csv  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="為替レートをCSVから一括登録")
+    parser.add_argument("csv", help="CSVファイルのパス（- で標準入力）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.csv == "-":
+            count = load_fx_rates_csv(db, sys.stdin)
+        else:
+            with open(args.csv, encoding="utf-8", newline="") as f:
+                count = load_fx_rates_csv(db, f)
+        # 外貨の取引の換算額が変わるため、残高のチェックポイント・予算アラート用の支出の合計・
+        # アーカイブ済みの取引の月ごとの合計をすべて作り直す
+        invalidate_balance_checkpoints(db)
+        reset_spending(db)
+        refresh_rollups(db)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    print(f"{count} 件の為替レートを登録しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
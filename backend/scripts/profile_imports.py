@@ -0,0 +1,77 @@
+"""インポート時間のプロファイル（python -X importtime ベース）
+
+アプリケーションのインポートにかかる時間をモジュール単位で集計し、
+累積時間・自己時間の大きいものから表示する。
+
+使い方:
+    cd backend
+    uv run python scripts/profile_imports.py
+    uv run python scripts/profile_imports.py --module app.main --top 20 --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def run_importtime(module: str) -> list[tuple[int, int, str]]:
+    """
+    別プロセスで -X importtime を有効にしてモジュールをインポート
+
+    Returns:
+        (自己時間[us], 累積時間[us], モジュール名) のリスト
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"{module} のインポートに失敗しました")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="インポート時間のプロファイル")
+    parser.add_argument("--module", default="app.main", help="計測するモジュール")
+    parser.add_argument("--top", type=int, default=25, help="表示する件数")
+    parser.add_argument("--repeat", type=int, default=3, help="合計時間の計測回数")
+    args = parser.parse_args()
+
+    totals = []
+    entries: list[tuple[int, int, str]] = []
+    for _ in range(args.repeat):
+        entries = run_importtime(args.module)
+        target = [e for e in entries if e[2].strip() == args.module]
+        totals.append(target[-1][1] if target else 0)
+
+    print(f"{args.module} のインポート時間: "
+          f"中央値 {statistics.median(totals) / 1000:.1f} ms "
+          f"(最小 {min(totals) / 1000:.1f} ms, 最大 {max(totals) / 1000:.1f} ms, {args.repeat}回)")
+
+    if args.top <= 0:
+        return
+
+    print(f"\n累積時間の上位{args.top}件:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[1], reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+    print(f"\n自己時間の上位{args.top}件:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[0], reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""テスト共通の設定（backend を import パスに追加する）"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
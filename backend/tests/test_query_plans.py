@@ -0,0 +1,395 @@
+"""クエリプランの回帰テスト
+
+TEST_DATABASE_URL の PostgreSQL サーバーに一時的なデータベースを作成し、計測用のユーザー
+（一覧を取得するユーザーと、同じテーブルに行を持つ他のユーザー）を登録したうえで、
+取引一覧・予算一覧・未登録の固定費の各エンドポイントを TestClient 経由で呼び出す。
+呼び出し中に発行された SQL をそのままのパラメータで `EXPLAIN (FORMAT JSON)` し、次を確認する。
+  - transactions / transaction_archive をシーケンシャルスキャンしていないこと
+  - 条件の組み合わせごとに想定したインデックスを使っていること
+  - 各 SQL の推定コスト（Total Cost）が上限以下であること
+
+推定コストの上限は下の件数で作成したデータに合わせている。
+一時的なデータベースはテストの終了時に削除する（DATABASE_URL のデータベースは使わない）。
+TEST_DATABASE_URL が未設定、または PostgreSQL でない場合はスキップする。
+TestClient を使うため httpx が必要。
+
+使い方:
+    cd backend
+    TEST_DATABASE_URL=postgresql://<user>:<password>@<host>:<port>/postgres \\
+        uv run --with pytest --with httpx pytest tests/test_query_plans.py
+"""
+import os
+import random
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.engine import make_url
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("postgresql"),
+    reason="TEST_DATABASE_URL に PostgreSQL の接続先が設定されていません",
+)
+
+# 他のユーザー数・取引を作成する月数・1か月あたりの取引数（確認するユーザー / 他のユーザー）
+OTHER_USERS = 200
+MONTHS = 36
+TRANSACTIONS_PER_MONTH = 150
+OTHER_TRANSACTIONS_PER_MONTH = 30
+
+# シーケンシャルスキャンを許さないテーブル
+NO_SEQ_SCAN_TABLES = {"transactions", "transaction_archive"}
+# プランを確認する SQL（これらのテーブルを参照するもの。認証のユーザー取得などは対象外）
+_WATCHED_TABLES = re.compile(r"\b(transactions|transaction_archive|budgets|categories)\b")
+
+
+@dataclass
+class Seed:
+    """作成したデータのうち、確認する条件に使うもの"""
+
+    user_id: uuid.UUID
+    member_id: uuid.UUID
+    category_id: uuid.UUID
+    tag_ids: list[uuid.UUID]
+    archived_month: date
+
+
+@dataclass
+class PlanCase:
+    """確認する呼び出しと、そのプランに求める条件"""
+
+    label: str
+    path: str
+    params: Callable[[Seed], dict]
+    # いずれかのSQLのプランに含まれるべきインデックス（タプルはいずれか1つでよい候補）
+    indexes: list[tuple[str, ...]]
+    # 各SQLの推定コストの上限
+    max_cost: float
+    # 台帳を共有されたユーザーとして呼び出すか
+    as_member: bool = False
+
+
+class StatementRecorder:
+    """エンジンで実行された SELECT を記録する"""
+
+    def __init__(self, engine) -> None:
+        self.statements: list[tuple[str, object]] = []
+        self.recording = False
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.recording and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            if _WATCHED_TABLES.search(statement):
+                self.statements.append((statement, parameters))
+
+
+@dataclass
+class PlanEnv:
+    """テスト全体で共有する接続とデータ"""
+
+    client: object
+    recorder: StatementRecorder
+    conn: object
+    seed: Seed
+    headers: dict[str, str] = field(default_factory=dict)
+    member_headers: dict[str, str] = field(default_factory=dict)
+
+
+def _auth(user_id: uuid.UUID) -> dict[str, str]:
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+
+def _months_back(today: date, months: int) -> list[date]:
+    """今月から months か月分の月初（新しい順）"""
+    result = []
+    for offset in range(months):
+        year, month = divmod(today.year * 12 + today.month - 1 - offset, 12)
+        result.append(date(year, month + 1, 1))
+    return result
+
+
+def seed_user(db, rng: random.Random, months: int, per_month: int, label: str, tags: int = 0) -> dict:
+    """ユーザーとカテゴリ・タグ・予算・取引を作成"""
+    from app.core.dates import month_range
+    from app.models import Budget, Category, Tag, Transaction, TransactionTag, TransactionType, User
+
+    user_id = uuid.uuid4()
+    db.add(User(user_id=user_id, email=f"plan-{label}-{user_id}@example.com", password_hash="x", name="plan"))
+    db.flush()
+
+    recurring_ids = [uuid.uuid4() for _ in range(8)]
+    other_ids = [uuid.uuid4() for _ in range(20)]
+    income_id = uuid.uuid4()
+    db.execute(insert(Category), [
+        {"category_id": cid, "user_id": user_id, "name": f"固定費{i}", "type": TransactionType.EXPENSE,
+         "is_recurring": True, "frequency": "MONTHLY", "default_amount": 5000}
+        for i, cid in enumerate(recurring_ids)
+    ] + [
+        {"category_id": cid, "user_id": user_id, "name": f"変動費{i}", "type": TransactionType.EXPENSE,
+         "is_recurring": False}
+        for i, cid in enumerate(other_ids)
+    ] + [
+        {"category_id": income_id, "user_id": user_id, "name": "給与", "type": TransactionType.INCOME,
+         "is_recurring": False},
+    ])
+    tag_ids = [uuid.uuid4() for _ in range(tags)]
+    if tag_ids:
+        db.execute(insert(Tag), [
+            {"tag_id": tid, "user_id": user_id, "name": f"タグ{i}"} for i, tid in enumerate(tag_ids)
+        ])
+
+    budgets, transactions, links = [], [], []
+    for start_date in _months_back(date.today(), months):
+        _, end_date = month_range(start_date)
+        budgets.extend(
+            {"user_id": user_id, "category_id": cid, "amount": 30000, "month": start_date}
+            for cid in rng.sample(other_ids, 10)
+        )
+        rows = [
+            {"user_id": user_id, "category_id": cid, "amount": 5000, "type": TransactionType.EXPENSE,
+             "date": start_date}
+            for cid in rng.sample(recurring_ids, len(recurring_ids) // 2)
+        ]
+        rows.append({"user_id": user_id, "category_id": income_id, "amount": 300000,
+                     "type": TransactionType.INCOME, "date": start_date.replace(day=25)})
+        rows.extend(
+            {"user_id": user_id, "category_id": rng.choice(other_ids), "amount": rng.randint(100, 10000),
+             "type": TransactionType.EXPENSE,
+             "date": start_date + timedelta(days=rng.randint(0, (end_date - start_date).days)),
+             "memo": f"メモ{rng.randint(0, 500)}"}
+            for _ in range(per_month)
+        )
+        for row in rows:
+            row["transaction_id"] = uuid.uuid4()
+            if tag_ids and rng.random() < 0.3:
+                links.extend(
+                    {"transaction_id": row["transaction_id"], "tag_id": tid}
+                    for tid in rng.sample(tag_ids, rng.randint(1, 2))
+                )
+        transactions.extend(rows)
+
+    db.execute(insert(Budget), budgets)
+    db.execute(insert(Transaction), transactions)
+    if links:
+        db.execute(insert(TransactionTag), links)
+    return {"user_id": user_id, "category_id": other_ids[0], "tag_ids": tag_ids}
+
+
+def _this_month() -> tuple[date, date]:
+    from app.core.dates import month_range
+
+    return month_range(date.today())
+
+
+def _quarter_start() -> date:
+    return _months_back(date.today(), 3)[-1]
+
+
+# ユーザーIDが先頭のインデックスはいずれも期間の絞り込みに使える
+_BY_USER = ("ix_transactions_user_id_date", "ix_transactions_user_id_updated_at")
+_BY_TAG = ("ix_transaction_tags_tag_id_transaction_id", "transaction_tags_pkey")
+_BUDGETS = ("uq_budgets_user_id_category_id_month",)
+_RECURRING = [("ix_categories_user_id_recurring",), ("ix_transactions_category_id_date",)]
+
+CASES = [
+    PlanCase("取引: 条件なし（アーカイブを含む）", "/api/transactions", lambda s: {},
+             [_BY_USER, ("ix_transaction_archive_user_id_date",)], 10000),
+    PlanCase("取引: 期間", "/api/transactions",
+             lambda s: {"start_date": _this_month()[0], "end_date": _this_month()[1]}, [_BY_USER], 1500),
+    PlanCase("取引: 期間・2ページ目", "/api/transactions",
+             lambda s: {"start_date": _quarter_start(), "end_date": _this_month()[1], "skip": 100, "limit": 100},
+             [_BY_USER], 1500),
+    PlanCase("取引: カテゴリ", "/api/transactions",
+             lambda s: {"start_date": _quarter_start(), "category_id": s.category_id},
+             [("ix_transactions_category_id_date", "ix_transactions_user_id_date")], 1000),
+    PlanCase("取引: タグ（いずれか）", "/api/transactions",
+             lambda s: {"start_date": _quarter_start(), "tag_ids": s.tag_ids[:2]},
+             [_BY_TAG, (*_BY_USER, "transactions_pkey")], 2500),
+    PlanCase("取引: タグ（すべて）", "/api/transactions",
+             lambda s: {"start_date": _quarter_start(), "tag_ids": s.tag_ids[:2], "tag_match": "all"},
+             [_BY_TAG, (*_BY_USER, "transactions_pkey")], 1000),
+    PlanCase("取引: 残高付き", "/api/transactions",
+             lambda s: {"start_date": _this_month()[0], "running_balance": "true"}, [_BY_USER], 6000),
+    PlanCase("取引: 共有された台帳", "/api/transactions",
+             lambda s: {"start_date": _this_month()[0], "ledger_id": s.user_id}, [_BY_USER], 1500,
+             as_member=True),
+    PlanCase("予算: 条件なし", "/api/budgets", lambda s: {}, [_BUDGETS], 1500),
+    PlanCase("予算: 月", "/api/budgets", lambda s: {"month": _this_month()[0]}, [_BUDGETS], 200),
+    PlanCase("予算: カテゴリ", "/api/budgets", lambda s: {"category_id": s.category_id}, [_BUDGETS], 50),
+    PlanCase("予算: 共有された台帳", "/api/budgets", lambda s: {"ledger_id": s.user_id}, [_BUDGETS], 1500,
+             as_member=True),
+    PlanCase("未登録の固定費: 当月", "/api/categories/recurring/unregistered",
+             lambda s: {"month": _this_month()[0]}, _RECURRING, 200),
+    PlanCase("未登録の固定費: アーカイブ済みの月", "/api/categories/recurring/unregistered",
+             lambda s: {"month": s.archived_month}, _RECURRING, 300),
+]
+
+
+def vacuum_analyze(engine) -> None:
+    """運用中と同じく autovacuum 後の状態（統計情報と可視性マップ）にする"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("categories", "budgets", "transactions", "transaction_tags", "transaction_tombstones",
+                      "transaction_archive", "transaction_archive_tags", "transaction_rollups", "ledger_members"):
+            conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+def walk_plan(node: dict):
+    """プランのノードを深さ優先で列挙"""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def explain(conn, statement: str, parameters) -> dict:
+    """記録した SQL を同じパラメータで EXPLAIN (FORMAT JSON) する"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        return cursor.fetchone()[0][0]["Plan"]
+    finally:
+        cursor.close()
+
+
+def _summary(statement: str, width: int = 100) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= width else flat[:width] + "..."
+
+
+def _seed(db) -> Seed:
+    """確認するユーザー・他のユーザー・台帳を共有されたユーザーを作成し、古い月をアーカイブする"""
+    from app.core.archive import archive_horizon, archive_transactions
+    from app.core.database import get_engine
+    from app.models import LedgerMember, LedgerRole, User
+
+    rng = random.Random(0)
+    target = seed_user(db, rng, MONTHS, TRANSACTIONS_PER_MONTH, "target", tags=10)
+    user_ids = [target["user_id"]]
+    for i in range(OTHER_USERS):
+        user_ids.append(seed_user(db, rng, MONTHS, OTHER_TRANSACTIONS_PER_MONTH, f"other{i}", tags=5)["user_id"])
+    member_id = uuid.uuid4()
+    db.add(User(user_id=member_id, email=f"plan-member-{member_id}@example.com", password_hash="x", name="plan"))
+    db.flush()
+    db.add(LedgerMember(user_id=member_id, ledger_id=target["user_id"], role=LedgerRole.VIEWER))
+    user_ids.append(member_id)
+    db.commit()
+    vacuum_analyze(get_engine())
+
+    # 保存期間を過ぎた月をアーカイブし、アーカイブを合わせて読む経路も確認する
+    before = archive_horizon(months=min(24, MONTHS))
+    for user_id in user_ids:
+        archive_transactions(db, user_id, before)
+    db.commit()
+    vacuum_analyze(get_engine())
+
+    return Seed(
+        user_id=target["user_id"],
+        member_id=member_id,
+        category_id=target["category_id"],
+        tag_ids=target["tag_ids"],
+        archived_month=_months_back(before, 2)[-1],
+    )
+
+
+@pytest.fixture(scope="module")
+def plan_env():
+    """一時的なデータベースを作成してデータを登録し、アプリの接続先をそのデータベースに切り替える"""
+    server_url = make_url(TEST_DATABASE_URL)
+    database = f"kakeibon_plans_{uuid.uuid4().hex[:12]}"
+    admin_engine = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with admin_engine.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{database}"'))
+
+    try:
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv("DATABASE_URL", server_url.set(database=database).render_as_string(hide_password=False))
+            mp.setenv("DATABASE_REPLICA_URLS", "[]")
+            mp.setenv("SECRET_KEY", os.environ.get("SECRET_KEY") or "query-plan-test")
+
+            from fastapi.testclient import TestClient
+
+            import app.models  # noqa: F401  全モデルをメタデータに登録する
+            from app.core.config import get_settings
+            from app.core.database import Base, SessionLocal, get_engine, get_replica_set
+
+            get_settings.cache_clear()
+            get_engine.cache_clear()
+            get_replica_set.cache_clear()
+            try:
+                engine = get_engine()
+                Base.metadata.create_all(engine)
+                db = SessionLocal()
+                try:
+                    seed = _seed(db)
+                finally:
+                    db.close()
+
+                from app.main import app as application
+
+                conn = engine.raw_connection()
+                try:
+                    yield PlanEnv(
+                        client=TestClient(application),
+                        recorder=StatementRecorder(engine),
+                        conn=conn,
+                        seed=seed,
+                        headers=_auth(seed.user_id),
+                        member_headers=_auth(seed.member_id),
+                    )
+                finally:
+                    conn.close()
+            finally:
+                get_engine().dispose()
+                get_settings.cache_clear()
+                get_engine.cache_clear()
+                get_replica_set.cache_clear()
+    finally:
+        with admin_engine.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+        admin_engine.dispose()
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.label for case in CASES])
+def test_query_plan(plan_env: PlanEnv, case: PlanCase) -> None:
+    from app.core.cache import invalidate_user_caches
+
+    # 結果のキャッシュを使わず毎回 SQL を発行させる
+    invalidate_user_caches(plan_env.seed.user_id)
+    recorder = plan_env.recorder
+    recorder.statements.clear()
+    recorder.recording = True
+    try:
+        response = plan_env.client.get(
+            case.path,
+            params=case.params(plan_env.seed),
+            headers=plan_env.member_headers if case.as_member else plan_env.headers,
+        )
+    finally:
+        recorder.recording = False
+    assert response.status_code == 200, response.text[:200]
+    assert recorder.statements, "確認対象の SQL が発行されませんでした"
+
+    failures = []
+    used_indexes: set[str] = set()
+    for statement, parameters in recorder.statements:
+        plan = explain(plan_env.conn, statement, parameters)
+        for node in walk_plan(plan):
+            if "Index Name" in node:
+                used_indexes.add(node["Index Name"])
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in NO_SEQ_SCAN_TABLES:
+                failures.append(f"{node['Relation Name']} をシーケンシャルスキャンしています: {_summary(statement)}")
+        if plan["Total Cost"] > case.max_cost:
+            failures.append(
+                f"推定コスト {plan['Total Cost']:.1f} が上限 {case.max_cost:.0f} を超えています: {_summary(statement)}"
+            )
+    for candidates in case.indexes:
+        if not used_indexes.intersection(candidates):
+            failures.append(f"インデックス {' / '.join(candidates)} を使っていません（使用: {sorted(used_indexes)}）")
+    assert not failures, "\n".join(failures)
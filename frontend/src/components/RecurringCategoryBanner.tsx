@@ -5,17 +5,24 @@ import { showErrorToast } from '../utils/errorHandler';
 
 interface RecurringCategoryBannerProps {
   onRegister: (category: Category) => void;
+  // 取得済みの未登録固定費（指定された場合はAPIを呼び出さない）
+  categories?: Category[];
 }
 
-export const RecurringCategoryBanner = ({ onRegister }: RecurringCategoryBannerProps) => {
-  const [unregisteredCategories, setUnregisteredCategories] = useState<Category[]>([]);
+export const RecurringCategoryBanner = ({ onRegister, categories }: RecurringCategoryBannerProps) => {
+  const [unregisteredCategories, setUnregisteredCategories] = useState<Category[]>(categories ?? []);
   const [isVisible, setIsVisible] = useState(true);
-  const [isLoading, setIsLoading] = useState(true);
+  const [isLoading, setIsLoading] = useState(categories === undefined);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
+    if (categories !== undefined) {
+      setUnregisteredCategories(categories);
+      setIsLoading(false);
+      return;
+    }
     loadUnregisteredCategories();
-  }, []);
+  }, [categories]);
 
   const loadUnregisteredCategories = async () => {
     setIsLoading(true);
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { transactionsApi, categoriesApi } from '../services/api';
+import { transactionsApi, dashboardApi } from '../services/api';
 import type { Transaction, Category, TransactionType } from '../types';
 import { RecurringCategoryBanner } from '../components/RecurringCategoryBanner';
 import { showErrorToast, showSuccessToast } from '../utils/errorHandler';
@@ -7,6 +7,7 @@ import { showErrorToast, showSuccessToast } from '../utils/errorHandler';
 export const Dashboard = () => {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [categories, setCategories] = useState<Category[]>([]);
+  const [unregisteredRecurring, setUnregisteredRecurring] = useState<Category[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [selectedMonth, setSelectedMonth] = useState(
     new Date().toISOString().slice(0, 7)
@@ -19,7 +20,6 @@ export const Dashboard = () => {
     date: new Date().toISOString().split('T')[0],
     memo: '',
   });
-  const [bannerKey, setBannerKey] = useState(0);
 
   useEffect(() => {
     loadData();
@@ -27,15 +27,12 @@ export const Dashboard = () => {
 
   const loadData = async () => {
     try {
-      const [transactionsData, categoriesData] = await Promise.all([
-        transactionsApi.getAll({
-          start_date: `${selectedMonth}-01`,
-          end_date: `${selectedMonth}-31`,
-        }),
-        categoriesApi.getAll(),
-      ]);
-      setTransactions(transactionsData);
-      setCategories(categoriesData);
+      // 初期表示に必要なデータを1回のリクエストで取得
+      const data = await dashboardApi.get(`${selectedMonth}-01`);
+      const unregisteredIds = new Set(data.unregistered_recurring_category_ids);
+      setTransactions(data.transactions);
+      setCategories(data.categories);
+      setUnregisteredRecurring(data.categories.filter((c) => unregisteredIds.has(c.category_id)));
     } catch (error) {
       showErrorToast(error, 'データの読み込みに失敗しました');
     } finally{
@@ -69,8 +66,7 @@ export const Dashboard = () => {
         date: new Date().toISOString().split('T')[0],
         memo: '',
       });
-      loadData(); // ダッシュボードをリロード
-      setBannerKey(prev => prev + 1); // バナーをリフレッシュ
+      loadData(); // ダッシュボードとバナーをリロード
       showSuccessToast('取引を登録しました');
     } catch (error) {
       showErrorToast(error, '取引の作成に失敗しました');
@@ -116,6 +112,12 @@ export const Dashboard = () => {
     .sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime())
     .slice(0, 5);
 
+  // 未登録の固定費が変わったらバナーを作り直し、閉じたバナーを再表示する
+  const bannerKey = unregisteredRecurring
+    .map((c) => c.category_id)
+    .sort()
+    .join(',');
+
   if (isLoading) {
     return (
       <div className="flex justify-center items-center h-64">
@@ -141,7 +143,11 @@ export const Dashboard = () => {
         </div>
       </div>
 
-      <RecurringCategoryBanner key={bannerKey} onRegister={handleRegisterRecurring} />
+      <RecurringCategoryBanner
+        key={bannerKey}
+        categories={unregisteredRecurring}
+        onRegister={handleRegisterRecurring}
+      />
 
       <div className="mt-8 grid grid-cols-1 gap-5 sm:grid-cols-3">
         <div className="bg-white overflow-hidden shadow rounded-lg">
@@ -26,6 +26,7 @@ import type {
   CreateTransactionRequest,
   Budget,
   CreateBudgetRequest,
+  DashboardData,
 } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
@@ -166,4 +167,12 @@ export const budgetsApi = {
   },
 };
 
+export const dashboardApi = {
+  get: async (month?: string): Promise<DashboardData> => {
+    const params = month ? { month } : {};
+    const response = await api.get<DashboardData>('/api/dashboard', { params });
+    return response.data;
+  },
+};
+
 export default api;
@@ -43,13 +43,35 @@ export interface Transaction {
   user_id: string;
   category_id: string;
   amount: number;
+  currency: string;
   type: TransactionType;
   date: string;
   memo?: string;
+  tag_ids: string[];
+  external_id?: string;
   created_at: string;
+  updated_at: string;
+  // running_balance=true で取得した場合のみ
+  balance?: number;
+  // アーカイブ済みの取引（更新・削除すると通常の取引に戻る）
+  archived?: boolean;
   category?: Category;
 }
 
+export interface CategorySuggestion {
+  category_id: string;
+  score: number;
+  memo: string;
+}
+
+export interface Tag {
+  tag_id: string;
+  user_id: string;
+  name: string;
+  color: string;
+  created_at: string;
+}
+
 export interface Budget {
   budget_id: string;
   user_id: string;
@@ -72,9 +94,11 @@ export interface CreateCategoryRequest {
 export interface CreateTransactionRequest {
   category_id: string;
   amount: number;
+  currency?: string;
   type: TransactionType;
   date: string;
   memo?: string;
+  tag_ids?: string[];
 }
 
 export interface CreateBudgetRequest {
@@ -82,3 +106,53 @@ export interface CreateBudgetRequest {
   amount: number;
   month: string;
 }
+
+export interface DashboardSummary {
+  income: number;
+  expense: number;
+  balance: number;
+}
+
+export interface DashboardData {
+  month: string;
+  categories: Category[];
+  transactions: Transaction[];
+  budgets: Budget[];
+  unregistered_recurring_category_ids: string[];
+  summary: DashboardSummary;
+}
+
+export interface EventTicket {
+  ticket: string;
+  expires_in: number;
+}
+
+// GET /api/events の change イベントの data
+export interface ChangeEvent {
+  event_id: number;
+  entity: 'transaction' | 'category' | 'budget' | 'tag';
+  action: 'created' | 'updated' | 'deleted';
+  entity_id: string | null;
+  occurred_at: string;
+}
+
+export type LedgerRole = 'viewer' | 'editor';
+
+export interface Ledger {
+  ledger_id: string;
+  owner_name: string;
+  role: 'owner' | LedgerRole;
+}
+
+export interface LedgerMember {
+  user_id: string;
+  name: string;
+  email: string;
+  role: LedgerRole;
+  created_at: string;
+}
+
+export interface AddLedgerMemberRequest {
+  email: string;
+  role?: LedgerRole;
+}